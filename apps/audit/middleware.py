@@ -1,6 +1,10 @@
 from django.conf import settings
+from django.utils import timezone
+from apps.core.actions import is_read_only
 from apps.core.models import ClientConfiguration
+from apps.core.timing import phase
 from .models import AuditLog
+from .writer import write_audit_entry
 
 
 class AuditMiddleware:
@@ -13,8 +17,9 @@ class AuditMiddleware:
         client_id = getattr(request, 'client_id', '')
         client_type = getattr(request, 'client_type', '')
         
-        if self._should_audit(client_id, client_type):
-            self._log_request(request, response)
+        with phase('audit'):
+            if self._should_audit(client_id, client_type):
+                self._log_request(request, response)
         
         return response
 
@@ -37,19 +42,25 @@ class AuditMiddleware:
             
             try:
                 user = request.user if request.user.is_authenticated else None
-                AuditLog.objects.create(
+                action = action_map.get(request.method, 'read')
+                if is_read_only(request):
+                    # e.g. the SSN lookup, which POSTs to hide the SSN.
+                    action = 'read'
+                entry = AuditLog(
                     user=user,
-                    action=action_map.get(request.method, 'read'),
+                    action=action,
                     resource_type=self._extract_resource_type(request.path),
                     resource_id=self._extract_resource_id(request.path),
                     client_id=getattr(request, 'client_id', ''),
                     ip_address=self._get_client_ip(request),
+                    timestamp=timezone.now(),
                     metadata={
                         'path': request.path,
                         'method': request.method,
                         'status_code': response.status_code,
                     }
                 )
+                write_audit_entry(entry)
             except Exception:
                 pass
 
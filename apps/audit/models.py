@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 
 class AuditLog(models.Model):
@@ -15,7 +16,8 @@ class AuditLog(models.Model):
     resource_type = models.CharField(max_length=50)
     resource_id = models.IntegerField()
     client_id = models.CharField(max_length=100)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # When the request was handled, not when the batch was written.
+    timestamp = models.DateTimeField(default=timezone.now)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     metadata = models.JSONField(default=dict, blank=True)
 
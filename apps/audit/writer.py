@@ -0,0 +1,191 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+from apps.core.metrics import AUDIT_QUEUE_DEPTH
+
+from .models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+_WAKE = object()
+
+
+def bulk_insert(entries):
+    AuditLog.objects.bulk_create(entries)
+
+
+class AuditWriter:
+    def __init__(self, max_queue_size=10000, batch_size=500,
+                 flush_interval=1.0, put_timeout=0.05, sink=bulk_insert):
+        self.queue = queue.Queue(maxsize=max_queue_size)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.sink = sink
+
+        self.submitted_count = 0
+        self.written_count = 0
+        self.overflow_count = 0
+        self.failed_count = 0
+
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def submit(self, entry):
+        self._ensure_started()
+        with self._lock:
+            self.submitted_count += 1
+
+        try:
+            self.queue.put(entry, timeout=self.put_timeout)
+        except queue.Full:
+            with self._lock:
+                self.overflow_count += 1
+            self._write([entry])
+
+    def depth(self):
+        return self.queue.qsize()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'queue_depth': self.queue.qsize(),
+                'submitted': self.submitted_count,
+                'written': self.written_count,
+                'overflow': self.overflow_count,
+                'failed': self.failed_count,
+            }
+
+    def shutdown(self, timeout=5.0):
+        self._stopping.set()
+        try:
+            self.queue.put_nowait(_WAKE)
+        except queue.Full:
+            pass
+
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            thread.join(timeout)
+
+        remaining = self._drain_nowait()
+        while remaining:
+            self._write(remaining[:self.batch_size])
+            remaining = remaining[self.batch_size:]
+
+    def _ensure_started(self):
+        pid = os.getpid()
+        if self._pid == pid and self._thread.is_alive():
+            return
+
+        with self._lock:
+            if self._pid == pid and self._thread.is_alive():
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(
+                target=self._run,
+                name='audit-writer',
+                daemon=True
+            )
+            self._pid = pid
+            self._thread.start()
+
+    def _run(self):
+        try:
+            while True:
+                batch = self._collect()
+                if batch:
+                    # Drop a connection the database closed since the
+                    # last flush instead of failing every later batch.
+                    close_old_connections()
+                    self._write(batch)
+                AUDIT_QUEUE_DEPTH.set(self.depth())
+                if self._stopping.is_set() and self.queue.empty():
+                    break
+        finally:
+            connection.close()
+
+    def _collect(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0 or self._stopping.is_set():
+                batch.extend(self._drain_nowait(self.batch_size - len(batch)))
+                break
+            try:
+                entry = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if entry is not _WAKE:
+                batch.append(entry)
+
+        return batch
+
+    def _drain_nowait(self, limit=None):
+        entries = []
+        while limit is None or len(entries) < limit:
+            try:
+                entry = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is not _WAKE:
+                entries.append(entry)
+        return entries
+
+    def _write(self, entries, retry=True):
+        try:
+            self.sink(entries)
+        except Exception:
+            # Retry once on a fresh connection, unless a surrounding
+            # transaction (an inline write) still needs this one.
+            if retry and not connection.in_atomic_block:
+                logger.warning(
+                    'Retrying %d audit entries on a new connection',
+                    len(entries),
+                    exc_info=True
+                )
+                connection.close()
+                self._write(entries, retry=False)
+                return
+            logger.exception('Failed to write %d audit entries', len(entries))
+            with self._lock:
+                self.failed_count += len(entries)
+        else:
+            with self._lock:
+                self.written_count += len(entries)
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_audit_writer():
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = AuditWriter(
+                    max_queue_size=settings.AUDIT_QUEUE_MAX_SIZE,
+                    batch_size=settings.AUDIT_BATCH_SIZE,
+                    flush_interval=settings.AUDIT_FLUSH_INTERVAL,
+                    put_timeout=settings.AUDIT_QUEUE_PUT_TIMEOUT,
+                )
+                atexit.register(_writer.shutdown)
+    return _writer
+
+
+def write_audit_entry(entry):
+    if settings.AUDIT_ASYNC:
+        get_audit_writer().submit(entry)
+    else:
+        entry.save()
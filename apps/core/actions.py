@@ -0,0 +1,28 @@
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def view_action(request):
+    """Return ``(view_class, action)`` for a resolved request.
+
+    ``action`` is the viewset action, or the lowercased method for other
+    views. Both are None until the URL has been resolved.
+    """
+    match = request.resolver_match
+    view = getattr(match and match.func, 'cls', None)
+    if view is None:
+        return None, None
+    actions = getattr(match.func, 'actions', None) or {}
+    method = request.method.lower()
+    return view, actions.get(method, method)
+
+
+def is_read_only(request):
+    """True for safe methods and a view's ``read_only_actions``.
+
+    A view lists actions there that use an unsafe method only to keep
+    their input out of the URL, like the patient SSN lookup.
+    """
+    if request.method in SAFE_METHODS:
+        return True
+    view, action = view_action(request)
+    return action in getattr(view, 'read_only_actions', ())
@@ -0,0 +1,211 @@
+import math
+import statistics
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.http import HttpResponse
+from django.test import Client
+from django.test.utils import override_settings
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from .middleware import RateLimitMiddleware
+from .query_budget import QueryCounter
+from .ratelimit import rate_limiter
+
+SUITES = {}
+
+
+def register(name):
+    def decorator(func):
+        SUITES[name] = func
+        return func
+    return decorator
+
+
+def measure(func, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+
+    return {
+        'best_ms': round(min(timings) * 1000, 3),
+        'median_ms': round(statistics.median(timings) * 1000, 3),
+    }
+
+
+def speedup(baseline, candidate):
+    if not candidate['median_ms']:
+        return None
+    return round(baseline['median_ms'] / candidate['median_ms'], 2)
+
+
+def make_api_request(path, version='v1', client_type='modern_clinic',
+                     client_id=None, params=None, method='get'):
+    factory = getattr(APIRequestFactory(), method)
+    request = Request(factory(path, params or {}))
+    request.version = version
+    request.client_type = client_type
+    request.client_id = client_id or f'{client_type}_1'
+    return request
+
+
+CLIENT_TYPES = ('legacy_hospital', 'modern_clinic', 'mobile_app')
+API_VERSIONS = ('v1', 'v2', 'v3')
+
+
+def api_client(client_type, version):
+    return Client(
+        HTTP_X_CLIENT_ID=f'{client_type}_bench',
+        HTTP_ACCEPT=f'application/json; version={version}'
+    )
+
+
+def api_benchmark_settings():
+    """Keep the full middleware stack but drop sampling and throttling."""
+    return override_settings(
+        ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+        RATE_LIMIT_ENABLED=False,
+        SERVER_TIMING_ENABLED=False,
+        QUERY_BUDGET_ENABLED=False
+    )
+
+
+def percentile(sorted_values, fraction):
+    index = max(0, math.ceil(fraction * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def measure_requests(send, requests):
+    """Time ``send(i)`` for each of ``requests`` requests.
+
+    Streamed bodies are consumed inside the timing so that every query
+    and every byte counts.
+    """
+    timings = []
+    queries = 0
+    errors = 0
+    for i in range(requests):
+        with QueryCounter() as counter:
+            started = time.perf_counter()
+            response = send(i)
+            if response.streaming:
+                b''.join(response.streaming_content)
+            timings.append(time.perf_counter() - started)
+        queries += counter.count
+        errors += response.status_code >= 400
+
+    total = sum(timings)
+    timings.sort()
+    return {
+        'requests': requests,
+        'errors': errors,
+        'throughput_rps': round(requests / total, 1) if total else None,
+        'p50_ms': round(percentile(timings, 0.5) * 1000, 3),
+        'p99_ms': round(percentile(timings, 0.99) * 1000, 3),
+        'queries_per_request': round(queries / requests, 2),
+    }
+
+
+# Metrics compared against a baseline, and whether higher is better.
+COMPARED_METRICS = {
+    'p50_ms': False,
+    'p99_ms': False,
+    'median_ms': False,
+    'queries_per_request': False,
+    'throughput_rps': True,
+}
+
+
+def _flatten(results, prefix=''):
+    for key, value in results.items():
+        path = f'{prefix}{key}'
+        if isinstance(value, dict):
+            yield from _flatten(value, f'{path}/')
+        elif key in COMPARED_METRICS and isinstance(value, (int, float)):
+            yield path, key, value
+
+
+def compare_to_baseline(results, baseline, tolerance=0.1):
+    """List metrics that got worse than ``baseline`` by over ``tolerance``.
+
+    Timings may drift by the relative ``tolerance``; query counts are
+    deterministic, so any increase is a regression. ``change`` is
+    positive when a metric got worse.
+    """
+    previous = {path: value for path, _, value in _flatten(baseline)}
+    regressions = []
+    improvements = []
+    compared = 0
+
+    for path, metric, value in _flatten(results):
+        before = previous.get(path)
+        if not before or value == before:
+            if before is not None:
+                compared += 1
+            continue
+        compared += 1
+        change = value / before - 1
+        if COMPARED_METRICS[metric]:
+            change = -change
+        entry = {
+            'metric': path,
+            'baseline': before,
+            'current': value,
+            'change': round(change, 3),
+        }
+        if metric == 'queries_per_request':
+            worse = change > 0
+        else:
+            worse = change > tolerance
+        if worse:
+            regressions.append(entry)
+        elif change < -tolerance:
+            improvements.append(entry)
+
+    return {
+        'tolerance': tolerance,
+        'compared': compared,
+        'regressions': regressions,
+        'improvements': improvements,
+    }
+
+
+def run_suite(name, **options):
+    with transaction.atomic():
+        result = SUITES[name](**options)
+        transaction.set_rollback(True)
+    return result
+
+
+@register('rate_limit_overhead')
+def rate_limit_overhead(rows, repeat):
+    middleware = RateLimitMiddleware(lambda request: HttpResponse())
+    requests = []
+    for i in range(rows):
+        request = APIRequestFactory().get('/api/patients/')
+        request.client_type = 'modern_clinic'
+        request.client_id = f'bench_rate_limit_{i % 50}'
+        requests.append(request)
+
+    def run():
+        return sum(
+            middleware(request).status_code == 429 for request in requests
+        )
+
+    results = {'requests': rows, 'clients': min(rows, 50)}
+    for name, enabled in (('disabled', False), ('enabled', True)):
+        with override_settings(RATE_LIMIT_ENABLED=enabled):
+            rate_limiter.reset()
+            results['throttled'] = run()
+            results[name] = measure(run, repeat)
+
+    per_request = (
+        results['enabled']['median_ms'] - results['disabled']['median_ms']
+    ) / rows
+    results['overhead_us_per_request'] = round(per_request * 1000, 3)
+    rate_limiter.reset()
+    return results
@@ -0,0 +1,288 @@
+import logging
+import pickle
+import random
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.db import connections
+
+from .metrics import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+MISSING = object()
+
+
+class LocalLRUCache:
+    def __init__(self, max_size=1024):
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=MISSING):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + timeout)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, False
+
+        try:
+            call.result = fn()
+        except Exception as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+        return call.result, True
+
+    def in_flight(self, key):
+        with self._lock:
+            return key in self._calls
+
+
+class TwoTierCache:
+    def __init__(self, namespace, timeout=3600, max_size=1024,
+                 version_check_interval=1.0, cache_alias='default',
+                 jitter=0.1, early_refresh=0.1, lock_timeout=10,
+                 lock_wait=2.0):
+        self.namespace = namespace
+        self.timeout = timeout
+        self.version_check_interval = version_check_interval
+        self.cache_alias = cache_alias
+        self.jitter = jitter
+        self.early_refresh = early_refresh
+        self.lock_timeout = lock_timeout
+        self.lock_wait = lock_wait
+        self.local = LocalLRUCache(max_size)
+        self.flight = SingleFlight()
+        self.version_key = f'{namespace}:version'
+
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.coalesced = 0
+        self.stale_served = 0
+        self.refreshes = 0
+
+        self._version = None
+        self._version_checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def shared(self):
+        return caches[self.cache_alias]
+
+    def get(self, key):
+        entry = self._read(key)
+        if entry is MISSING:
+            return MISSING
+        return entry[0]
+
+    def set(self, key, value, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        ttl = timeout * (1 - random.uniform(0, self.jitter))
+        now = time.time()
+        entry = (value, now + ttl * (1 - self.early_refresh), now + ttl)
+
+        version = self.current_version()
+        self.shared.set(self._shared_key(version, key), entry, ttl)
+        self._set_local(key, entry, ttl)
+
+    def get_or_load(self, key, loader, timeout=None):
+        entry = self._read(key)
+
+        if entry is not MISSING:
+            value, refresh_at, _ = entry
+            if time.time() >= refresh_at:
+                self.stale_served += 1
+                self._refresh_in_background(key, loader, timeout)
+            return value
+
+        value, leader = self.flight.do(
+            key,
+            lambda: self._load_once(key, loader, timeout)
+        )
+        if not leader:
+            self.coalesced += 1
+            value = _copy(value)
+        return value
+
+    def invalidate(self):
+        try:
+            self.shared.incr(self.version_key)
+        except ValueError:
+            self.shared.add(self.version_key, 1, None)
+            self.shared.incr(self.version_key)
+
+        with self._lock:
+            self.local.clear()
+            self._version_checked_at = 0.0
+
+    def current_version(self):
+        now = time.monotonic()
+        if now - self._version_checked_at < self.version_check_interval:
+            return self._version
+
+        with self._lock:
+            version = self.shared.get(self.version_key)
+            if version is None:
+                self.shared.add(self.version_key, 1, None)
+                version = self.shared.get(self.version_key, 1)
+
+            if version != self._version:
+                self.local.clear()
+                self._version = version
+            self._version_checked_at = now
+            return version
+
+    def stats(self):
+        return {
+            'local_hits': self.local_hits,
+            'shared_hits': self.shared_hits,
+            'misses': self.misses,
+            'loads': self.loads,
+            'coalesced': self.coalesced,
+            'stale_served': self.stale_served,
+            'refreshes': self.refreshes,
+            'local_size': len(self.local),
+            'version': self._version,
+        }
+
+    def _read(self, key):
+        version = self.current_version()
+
+        entry = self.local.get(key)
+        if entry is not MISSING:
+            self.local_hits += 1
+            CACHE_REQUESTS.inc(cache=self.namespace, result='local_hit')
+            data, refresh_at, expires_at = entry
+            return pickle.loads(data), refresh_at, expires_at
+
+        entry = self.shared.get(self._shared_key(version, key), MISSING)
+        if entry is not MISSING:
+            self.shared_hits += 1
+            CACHE_REQUESTS.inc(cache=self.namespace, result='shared_hit')
+            ttl = entry[2] - time.time()
+            if ttl > 0:
+                self._set_local(key, entry, ttl)
+            return entry
+
+        self.misses += 1
+        CACHE_REQUESTS.inc(cache=self.namespace, result='miss')
+        return MISSING
+
+    def _load_once(self, key, loader, timeout):
+        lock_key = self._shared_key(self.current_version(), f'lock:{key}')
+
+        acquired = self.shared.add(lock_key, 1, self.lock_timeout)
+
+        if not acquired:
+            deadline = time.monotonic() + self.lock_wait
+            while time.monotonic() < deadline:
+                time.sleep(0.05)
+                entry = self._read(key)
+                if entry is not MISSING:
+                    return entry[0]
+
+        try:
+            return self._load(key, loader, timeout)
+        finally:
+            if acquired:
+                self.shared.delete(lock_key)
+
+    def _load(self, key, loader, timeout):
+        self.loads += 1
+        value = loader()
+        if callable(timeout):
+            timeout = timeout(value)
+        self.set(key, value, timeout)
+        return value
+
+    def _refresh_in_background(self, key, loader, timeout):
+        if self.flight.in_flight(key):
+            return
+
+        lock_key = self._shared_key(self.current_version(), f'lock:{key}')
+        if not self.shared.add(lock_key, 1, self.lock_timeout):
+            return
+
+        def refresh():
+            try:
+                self.flight.do(key, lambda: self._load(key, loader, timeout))
+                self.refreshes += 1
+            except Exception:
+                logger.exception('Background refresh of %s failed', key)
+            finally:
+                self.shared.delete(lock_key)
+                connections.close_all()
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def _set_local(self, key, entry, ttl):
+        # Kept pickled, like the shared tier, so each read gets its own
+        # copy and a caller that mutates it cannot change other callers'.
+        value, refresh_at, expires_at = entry
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        self.local.set(key, (data, refresh_at, expires_at), ttl)
+
+    def _shared_key(self, version, key):
+        return f'{self.namespace}:{version}:{key}'
+
+
+def _copy(value):
+    return pickle.loads(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
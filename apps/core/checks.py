@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+# Each process gets its own copy of these, so nothing set in one worker
+# is seen by another.
+PROCESS_LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def shared_cache_uses():
+    """``(alias, purpose)`` for cache state every worker must see."""
+    from .models import client_config_cache
+
+    uses = [
+        (client_config_cache.cache_alias, 'client configuration versions'),
+    ]
+    if settings.DATABASE_REPLICAS:
+        uses.append(
+            (settings.REPLICA_STICKY_CACHE_ALIAS, 'replica stickiness')
+        )
+    return uses
+
+
+@register(Tags.caches)
+def check_shared_caches(app_configs=None, **kwargs):
+    if settings.DEBUG:
+        return []
+    warnings = []
+    for alias, purpose in shared_cache_uses():
+        backend = settings.CACHES.get(alias, {}).get('BACKEND')
+        if backend in PROCESS_LOCAL_BACKENDS:
+            warnings.append(Warning(
+                f'Cache "{alias}" holds {purpose} but uses {backend}, '
+                f'which is local to one process.',
+                hint=(
+                    'Other workers will not see changes. Point the alias '
+                    'at a shared cache, e.g. set CACHE_BACKEND and '
+                    'REDIS_URL.'
+                ),
+                id='core.W001'
+            ))
+    return warnings
@@ -0,0 +1,84 @@
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+
+from .models import ClientConfiguration
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def get_requested_fields(request):
+    if request is None:
+        return None
+    if hasattr(request, '_requested_fields'):
+        return request._requested_fields
+
+    request._requested_fields = _parse_requested_fields(request)
+    return request._requested_fields
+
+
+def _parse_requested_fields(request):
+    client_type = getattr(request, 'client_type', None)
+    if client_type != settings.CLIENT_TYPES['MOBILE_APP']:
+        return None
+
+    raw = request.query_params.get('fields')
+    if not raw:
+        return None
+
+    client_id = getattr(request, 'client_id', '')
+    config = ClientConfiguration.get_config(client_id, client_type)
+    allowed = config.get('allow_field_selection', False)
+    if not allowed:
+        return None
+
+    requested = {name.strip() for name in raw.split(',') if name.strip()}
+    if isinstance(allowed, (list, tuple)):
+        requested &= set(allowed)
+    return frozenset(requested)
+
+
+def filter_serializer_fields(fields, requested):
+    if requested is None:
+        return fields
+    for field_name in set(fields) - requested:
+        fields.pop(field_name)
+    return fields
+
+
+def projected_columns(model, requested, sources=None, always=()):
+    sources = sources or {}
+    columns = set(always)
+
+    for name in requested:
+        if name in sources:
+            columns.update(sources[name])
+            continue
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            continue
+        if field.concrete:
+            columns.add(field.name)
+
+    return sorted(columns)
+
+
+class FieldSelectionMixin:
+    field_selection_sources = {}
+    field_selection_always = ('id', 'created_at', 'updated_at')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method not in SAFE_METHODS:
+            return queryset
+
+        requested = get_requested_fields(self.request)
+        if requested is None:
+            return queryset
+
+        return queryset.only(*projected_columns(
+            queryset.model,
+            requested,
+            self.field_selection_sources,
+            self.field_selection_always
+        ))
@@ -0,0 +1,102 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import autodiscover_modules
+
+from apps.core.benchmarks import SUITES, compare_to_baseline, run_suite
+
+
+class Command(BaseCommand):
+    help = ('Run in-process performance benchmarks inside a rolled back '
+            'transaction')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'suites',
+            nargs='*',
+            help='Suites to run (default: all registered suites)'
+        )
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=10000,
+            help='Number of synthetic rows created for each suite'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Timed repetitions per measurement'
+        )
+        parser.add_argument(
+            '--save-baseline',
+            metavar='PATH',
+            help='Write the results to PATH for later comparison'
+        )
+        parser.add_argument(
+            '--baseline',
+            metavar='PATH',
+            help='Compare the results against a saved baseline'
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=0.1,
+            help='Relative slowdown allowed before a timing is a regression'
+        )
+        parser.add_argument(
+            '--fail-on-regression',
+            action='store_true',
+            help='Exit with an error when the baseline comparison regresses'
+        )
+
+    def handle(self, *args, **options):
+        autodiscover_modules('benchmarks')
+
+        names = options['suites'] or sorted(SUITES)
+        unknown = set(names) - set(SUITES)
+        if unknown:
+            raise CommandError(
+                f'Unknown suites: {", ".join(sorted(unknown))}. '
+                f'Available: {", ".join(sorted(SUITES))}'
+            )
+
+        baseline = None
+        if options['baseline']:
+            try:
+                with open(options['baseline']) as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f'Cannot read baseline: {exc}')
+
+        results = {}
+        for name in names:
+            self.stderr.write(f'Running {name}...')
+            results[name] = run_suite(
+                name,
+                rows=options['rows'],
+                repeat=options['repeat']
+            )
+
+        if options['save_baseline']:
+            with open(options['save_baseline'], 'w') as f:
+                json.dump(results, f, indent=2)
+
+        if baseline is None:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        comparison = compare_to_baseline(
+            results,
+            {name: baseline[name] for name in names if name in baseline},
+            options['tolerance']
+        )
+        self.stdout.write(json.dumps(
+            {'results': results, 'comparison': comparison},
+            indent=2
+        ))
+        if options['fail_on_regression'] and comparison['regressions']:
+            raise CommandError(
+                f'{len(comparison["regressions"])} metrics regressed '
+                f'against {options["baseline"]}'
+            )
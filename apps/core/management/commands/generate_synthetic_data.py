@@ -0,0 +1,86 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.synthetic import SyntheticDataGenerator
+
+
+class Command(BaseCommand):
+    help = ('Generate seeded, reproducible patients, medical records and '
+            'audit logs for capacity testing')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--patients',
+            type=int,
+            default=10000,
+            help='Number of patients to create (10k to 10M is typical)'
+        )
+        parser.add_argument(
+            '--records',
+            type=int,
+            help='Number of medical records (default: 3 per patient)'
+        )
+        parser.add_argument(
+            '--audit-logs',
+            type=int,
+            help='Number of audit log entries (default: 5 per patient)'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Random seed; the same seed produces the same data'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Rows inserted per transaction'
+        )
+
+    def handle(self, *args, **options):
+        patients = options['patients']
+        records = options['records']
+        audit_logs = options['audit_logs']
+        if records is None:
+            records = patients * 3
+        if audit_logs is None:
+            audit_logs = patients * 5
+        if min(patients, records, audit_logs) < 0:
+            raise CommandError('Counts must not be negative.')
+        if (records or audit_logs) and not patients:
+            raise CommandError('Records and audit logs need --patients.')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive.')
+
+        generator = SyntheticDataGenerator(
+            seed=options['seed'],
+            batch_size=options['batch_size']
+        )
+        if generator.already_generated():
+            raise CommandError(
+                f'Seed {options["seed"]} was already generated in this '
+                f'database; use another --seed.'
+            )
+
+        started = time.monotonic()
+        counts = generator.generate(
+            patients,
+            records,
+            audit_logs,
+            progress=self.report_progress
+        )
+        elapsed = time.monotonic() - started
+
+        self.stdout.write(json.dumps({
+            'seed': options['seed'],
+            **counts,
+            'seconds': round(elapsed, 3),
+            'rows_per_second': round(sum(counts.values()) / elapsed, 1)
+            if elapsed else None,
+        }, indent=2))
+
+    def report_progress(self, name, done, total):
+        self.stderr.write(f'{name}: {done}/{total}')
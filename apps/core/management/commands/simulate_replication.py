@@ -0,0 +1,41 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from apps.core.replicas import replicate_sqlite
+
+
+class Command(BaseCommand):
+    help = ('Copy the SQLite primary over the SQLite replicas every --lag '
+            'seconds, simulating replication lag for local testing')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lag',
+            type=float,
+            default=2.0,
+            help='Seconds between copies, i.e. the worst replication lag'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Copy once and exit'
+        )
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError('Set DATABASE_REPLICA_URLS first.')
+        aliases = [DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS]
+        if any(connections[alias].vendor != 'sqlite' for alias in aliases):
+            raise CommandError('Replication is only simulated for SQLite.')
+        if options['lag'] <= 0:
+            raise CommandError('--lag must be positive.')
+
+        while True:
+            replicas = replicate_sqlite()
+            self.stdout.write(f'Copied primary to {", ".join(replicas)}')
+            if options['once']:
+                return
+            time.sleep(options['lag'])
@@ -0,0 +1,458 @@
+import hmac
+import json
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.db import connections
+from django.http import Http404, HttpResponse
+
+USED = struct.Struct('q')
+KEY_LENGTH = struct.Struct('i')
+VALUE = struct.Struct('d')
+INITIAL_SIZE = 64 * 1024
+
+
+def _padded(length):
+    return length + (-length % 8)
+
+
+class MmapValues:
+    """Append-only map of keys to float64 values in a memory-mapped file.
+
+    The first 8 bytes hold the number of bytes in use. Entries are a
+    key length, the JSON key padded to 8 bytes and the value. An entry
+    is written before the used size is bumped, so readers in other
+    processes only ever see complete entries.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'a+b')
+        size = os.fstat(self._file.fileno()).st_size
+        if size == 0:
+            self._file.truncate(INITIAL_SIZE)
+            size = INITIAL_SIZE
+        self._map(size)
+        self._used = USED.unpack_from(self._mmap, 0)[0] or USED.size
+        self._indexes = {
+            key: position // VALUE.size
+            for key, position, _ in _read_entries(self._mmap, self._used)
+        }
+
+    def add(self, key, amount):
+        index = self._indexes.get(key)
+        if index is None:
+            index = self._allocate(key)
+        self._values[index] += amount
+
+    def set(self, key, value):
+        index = self._indexes.get(key)
+        if index is None:
+            index = self._allocate(key)
+        self._values[index] = value
+
+    def close(self):
+        self._values.release()
+        self._mmap.close()
+        self._file.close()
+
+    def _map(self, size):
+        self._mmap = mmap.mmap(self._file.fileno(), size)
+        # Values are 8-byte aligned, so they can be updated in place as
+        # doubles without packing.
+        self._values = memoryview(self._mmap).cast('d')
+
+    def _allocate(self, key):
+        encoded = json.dumps(key).encode('utf-8')
+        padded = _padded(len(encoded))
+        size = KEY_LENGTH.size + padded + VALUE.size
+        # Keep values 8-byte aligned after the 4-byte key length.
+        size += -(self._used + KEY_LENGTH.size + padded) % 8
+        needed = self._used + size + VALUE.size
+        if needed > len(self._mmap):
+            self._grow(needed)
+
+        offset = self._used
+        KEY_LENGTH.pack_into(self._mmap, offset, len(encoded))
+        start = offset + KEY_LENGTH.size
+        self._mmap[start:start + len(encoded)] = encoded
+        position = offset + size - VALUE.size
+        VALUE.pack_into(self._mmap, position, 0.0)
+
+        self._used = offset + size
+        USED.pack_into(self._mmap, 0, self._used)
+        self._indexes[key] = position // VALUE.size
+        return self._indexes[key]
+
+    def _grow(self, needed):
+        size = len(self._mmap)
+        while size < needed:
+            size *= 2
+        self._values.release()
+        self._mmap.close()
+        self._file.truncate(size)
+        self._map(size)
+
+
+def _read_entries(data, used):
+    offset = USED.size
+    while offset < used:
+        length = KEY_LENGTH.unpack_from(data, offset)[0]
+        start = offset + KEY_LENGTH.size
+        padded = _padded(length)
+        size = KEY_LENGTH.size + padded
+        size += -(offset + size) % 8
+        position = offset + size
+        encoded = bytes(data[start:start + length])
+        name, suffix, labels = json.loads(encoded)
+        value = VALUE.unpack_from(data, position)[0]
+        yield (name, suffix, tuple(labels)), position, value
+        offset = position + VALUE.size
+
+
+def read_file(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < USED.size:
+        return []
+    used = USED.unpack_from(data, 0)[0]
+    return [(key, value) for key, _, value in _read_entries(data, used)]
+
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class MetricsRegistry:
+    """Metrics written by every worker to its own ``<pid>.db`` file.
+
+    Recording takes one uncontended per-process lock and touches only
+    memory. ``collect`` sums the files of every worker. Gauges are
+    summed over live workers only. A new worker removes the files of
+    dead ones, so counters can reset, which Prometheus handles.
+    """
+
+    def __init__(self):
+        self.metrics = {}
+        self._store = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(self, name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge(self, name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=()):
+        return self._register(
+            Histogram(self, name, documentation, labelnames, buckets)
+        )
+
+    def record(self, updates, replace=False):
+        if not settings.METRICS_ENABLED:
+            return
+        with self._lock:
+            store = self._get_store()
+            for key, amount in updates:
+                if replace:
+                    store.set(key, amount)
+                else:
+                    store.add(key, amount)
+
+    def reset(self):
+        with self._lock:
+            if self._store is not None:
+                self._store.close()
+            self._store = None
+            self._pid = None
+
+    def collect(self):
+        directory = Path(settings.METRICS_DIR)
+        totals = defaultdict(float)
+        for path in directory.glob('*.db'):
+            try:
+                pid = int(path.stem)
+                entries = read_file(path)
+            except (ValueError, OSError):
+                continue
+            live = pid == os.getpid() or pid_alive(pid)
+            for (name, suffix, labels), value in entries:
+                metric = self.metrics.get(name)
+                if metric is None:
+                    continue
+                if metric.kind == 'gauge' and not live:
+                    continue
+                totals[(name, suffix, labels)] += value
+        return totals
+
+    def exposition(self):
+        totals = self.collect()
+        samples = defaultdict(list)
+        for (name, suffix, labels), value in sorted(totals.items()):
+            samples[name].append((suffix, labels, value))
+
+        lines = []
+        for name, metric in sorted(self.metrics.items()):
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.kind}')
+            lines.extend(metric.render(samples.get(name, [])))
+        return '\n'.join(lines) + '\n'
+
+    def _register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def _get_store(self):
+        pid = os.getpid()
+        if self._pid != pid:
+            directory = Path(settings.METRICS_DIR)
+            directory.mkdir(parents=True, exist_ok=True)
+            _remove_dead_files(directory, pid)
+            self._store = MmapValues(directory / f'{pid}.db')
+            self._pid = pid
+        return self._store
+
+
+def _remove_dead_files(directory, pid):
+    for path in directory.glob('*.db'):
+        try:
+            other = int(path.stem)
+        except ValueError:
+            continue
+        if other != pid and not pid_alive(other):
+            path.unlink(missing_ok=True)
+
+
+def _format_labels(labelnames, labels, extra=()):
+    pairs = list(zip(labelnames, labels)) + list(extra)
+    if not pairs:
+        return ''
+    rendered = ','.join(
+        f'{name}="{_escape(value)}"' for name, value in pairs
+    )
+    return '{' + rendered + '}'
+
+
+def _escape(value):
+    return (
+        str(value).replace('\\', r'\\').replace('\n', r'\n')
+        .replace('"', r'\"')
+    )
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, registry, name, documentation, labelnames):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def label_values(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def render(self, samples):
+        return [
+            f'{self.name}{suffix}'
+            f'{_format_labels(self.labelnames, labels)} '
+            f'{_format_value(value)}'
+            for suffix, labels, value in samples
+        ]
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def updates(self, amount=1, **labels):
+        return [((self.name, '_total', self.label_values(labels)), amount)]
+
+    def inc(self, amount=1, **labels):
+        self.registry.record(self.updates(amount, **labels))
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = (self.name, '', self.label_values(labels))
+        self.registry.record([(key, value)], replace=True)
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, registry, name, documentation, labelnames, buckets):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def updates(self, value, **labels):
+        values = self.label_values(labels)
+        bucket = self.buckets[bisect_left(self.buckets, value)]
+        return [
+            ((self.name, f'_bucket:{bucket}', values), 1),
+            ((self.name, '_sum', values), value),
+            ((self.name, '_count', values), 1),
+        ]
+
+    def observe(self, value, **labels):
+        self.registry.record(self.updates(value, **labels))
+
+    def render(self, samples):
+        by_labels = defaultdict(dict)
+        for suffix, labels, value in samples:
+            by_labels[tuple(labels)][suffix] = value
+
+        lines = []
+        for labels, values in sorted(by_labels.items()):
+            cumulative = 0
+            for bucket in self.buckets:
+                cumulative += values.get(f'_bucket:{bucket}', 0)
+                le = [('le', _format_value(bucket))]
+                lines.append(
+                    f'{self.name}_bucket'
+                    f'{_format_labels(self.labelnames, labels, le)} '
+                    f'{_format_value(cumulative)}'
+                )
+            for suffix in ('_sum', '_count'):
+                lines.append(
+                    f'{self.name}{suffix}'
+                    f'{_format_labels(self.labelnames, labels)} '
+                    f'{_format_value(values.get(suffix, 0))}'
+                )
+        return lines
+
+
+registry = MetricsRegistry()
+
+REQUEST_LABELS = ('handler', 'method', 'version', 'client_type')
+
+REQUEST_LATENCY = registry.histogram(
+    'http_request_duration_seconds',
+    'Request latency in seconds.',
+    REQUEST_LABELS,
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+REQUEST_QUERIES = registry.histogram(
+    'http_request_db_queries',
+    'Database queries per request.',
+    REQUEST_LABELS,
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100)
+)
+REQUESTS = registry.counter(
+    'http_requests',
+    'Requests by response status.',
+    REQUEST_LABELS + ('status',)
+)
+CACHE_REQUESTS = registry.counter(
+    'cache_requests',
+    'Two-tier cache lookups by result.',
+    ('cache', 'result')
+)
+AUDIT_QUEUE_DEPTH = registry.gauge(
+    'audit_queue_depth',
+    'Audit entries waiting for the background writer.'
+)
+
+
+def can_scrape(request):
+    """Allow ``METRICS_ALLOWED_IPS`` and bearers of ``METRICS_TOKEN``.
+
+    Only the socket address is checked; ``X-Forwarded-For`` is not
+    trusted here.
+    """
+    if request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS:
+        return True
+    token = settings.METRICS_TOKEN
+    if not token:
+        return False
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    return hmac.compare_digest(
+        header.encode('utf-8'),
+        f'Bearer {token}'.encode('utf-8')
+    )
+
+
+def metrics_view(request):
+    if not settings.METRICS_ENABLED:
+        raise Http404
+    if not can_scrape(request):
+        raise PermissionDenied
+    return HttpResponse(
+        registry.exposition(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
+class _QueryCounter:
+    __slots__ = ('count',)
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+# Any other method is labelled 'other', so clients cannot add series.
+METHODS = frozenset(
+    ('GET', 'HEAD', 'OPTIONS', 'POST', 'PUT', 'PATCH', 'DELETE')
+)
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+
+        queries = _QueryCounter()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(queries))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        match = request.resolver_match
+        labels = {
+            'handler': match.url_name if match else 'unmatched',
+            'method': request.method if request.method in METHODS else 'other',
+            'version': getattr(request, 'api_version', None) or 'none',
+            'client_type': getattr(request, 'client_type', ''),
+        }
+        # One lock acquisition covers every series touched by a request.
+        registry.record(
+            REQUEST_LATENCY.updates(elapsed, **labels)
+            + REQUEST_QUERIES.updates(queries.count, **labels)
+            + REQUESTS.updates(status=response.status_code, **labels)
+        )
+        return response
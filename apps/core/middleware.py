@@ -1,21 +1,43 @@
 from django.conf import settings
 
+from .ratelimit import client_rate_limit, rate_limiter, throttled_response
+from .timing import phase
+
 
 class ClientTypeMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
 
     def __call__(self, request):
-        client_id = request.headers.get('X-Client-ID', '')
-        
-        if 'hospital' in client_id.lower() or 'legacy' in client_id.lower():
-            request.client_type = settings.CLIENT_TYPES['LEGACY_HOSPITAL']
-        elif 'mobile' in client_id.lower() or 'app' in client_id.lower():
-            request.client_type = settings.CLIENT_TYPES['MOBILE_APP']
-        else:
-            request.client_type = settings.CLIENT_TYPES['MODERN_CLINIC']
-        
-        request.client_id = client_id
+        with phase('client_type'):
+            client_id = request.headers.get('X-Client-ID', '')
+            lowered = client_id.lower()
+
+            if 'hospital' in lowered or 'legacy' in lowered:
+                request.client_type = settings.CLIENT_TYPES['LEGACY_HOSPITAL']
+            elif 'mobile' in lowered or 'app' in lowered:
+                request.client_type = settings.CLIENT_TYPES['MOBILE_APP']
+            else:
+                request.client_type = settings.CLIENT_TYPES['MODERN_CLINIC']
+
+            request.client_id = client_id
         
         response = self.get_response(request)
-        return response
\ No newline at end of file
+        return response
+
+
+class RateLimitMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if settings.RATE_LIMIT_ENABLED:
+            with phase('rate_limit'):
+                wait = rate_limiter.check(
+                    request.client_id,
+                    lambda: client_rate_limit(request)
+                )
+            if wait:
+                return throttled_response(wait)
+
+        return self.get_response(request)
@@ -1,5 +1,48 @@
-from django.db import models
-from django.core.cache import cache
+import logging
+
+from django.conf import settings
+from django.db import DatabaseError, connections, models, transaction
+from .cache import TwoTierCache
+from .timing import timed
+
+logger = logging.getLogger(__name__)
+
+NOT_CONFIGURED = '__not_configured__'
+
+client_config_cache = TwoTierCache(
+    'client_config',
+    timeout=settings.CLIENT_CONFIG_CACHE_TIMEOUT,
+    max_size=settings.CLIENT_CONFIG_LOCAL_CACHE_SIZE,
+    version_check_interval=settings.CLIENT_CONFIG_VERSION_CHECK_INTERVAL,
+)
+
+
+def invalidate_client_configs():
+    client_config_cache.invalidate()
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(client_config_cache.invalidate)
+
+
+class ClientConfigurationQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        rows = super().update(**kwargs)
+        invalidate_client_configs()
+        return rows
+
+    def delete(self):
+        result = super().delete()
+        invalidate_client_configs()
+        return result
+
+    def bulk_create(self, *args, **kwargs):
+        objs = super().bulk_create(*args, **kwargs)
+        invalidate_client_configs()
+        return objs
+
+    def bulk_update(self, *args, **kwargs):
+        rows = super().bulk_update(*args, **kwargs)
+        invalidate_client_configs()
+        return rows
 
 
 class ClientConfiguration(models.Model):
@@ -10,36 +53,61 @@ class ClientConfiguration(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ClientConfigurationQuerySet.as_manager()
+
     class Meta:
         db_table = 'client_configurations'
         ordering = ['client_id']
 
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
-        cache.delete(f'client_config_{self.client_id}')
+        invalidate_client_configs()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        invalidate_client_configs()
+        return result
 
     @classmethod
+    @timed('client_config')
     def get_config(cls, client_id, client_type):
-        cache_key = f'client_config_{client_id}'
-        config = cache.get(cache_key)
-        
-        if config is None:
-            try:
-                client_config = cls.objects.get(
-                    client_id=client_id,
-                    is_active=True
-                )
-                config = client_config.config
-            except cls.DoesNotExist:
-                config = cls._get_default_config(client_type)
-            
-            cache.set(cache_key, config, 3600)
-        
+        config = client_config_cache.get_or_load(
+            client_id,
+            lambda: cls._load_config(client_id),
+            cls._config_timeout
+        )
+
+        if config == NOT_CONFIGURED:
+            return cls._get_default_config(client_type)
         return config
 
+    @classmethod
+    def _load_config(cls, client_id):
+        try:
+            return cls.objects.get(client_id=client_id, is_active=True).config
+        except cls.DoesNotExist:
+            return NOT_CONFIGURED
+
+    @staticmethod
+    def _config_timeout(config):
+        if config == NOT_CONFIGURED:
+            return settings.CLIENT_CONFIG_NEGATIVE_CACHE_TIMEOUT
+        return settings.CLIENT_CONFIG_CACHE_TIMEOUT
+
+    @classmethod
+    def preload(cls):
+        configs = cls.objects.filter(is_active=True).values_list(
+            'client_id',
+            'config'
+        )
+        count = 0
+        for client_id, config in configs.iterator():
+            client_config_cache.set(client_id, config)
+            count += 1
+        return count
+
     @staticmethod
     def _get_default_config(client_type):
-        from django.conf import settings
         return settings.CLIENT_FIELD_CONFIGS.get(
             client_type,
             settings.CLIENT_FIELD_CONFIGS.get('modern_clinic', {
@@ -48,4 +116,17 @@ class ClientConfiguration(models.Model):
                 'rate_limit': 5000,
                 'allow_field_selection': True,
             })
-        )
\ No newline at end of file
+        )
+
+
+def preload_client_configs():
+    try:
+        count = ClientConfiguration.preload()
+    except DatabaseError:
+        logger.warning('Could not preload client configurations')
+        return 0
+    finally:
+        connections.close_all()
+
+    logger.info('Preloaded %d client configurations', count)
+    return count
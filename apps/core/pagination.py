@@ -0,0 +1,161 @@
+import base64
+import binascii
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from .models import ClientConfiguration
+
+
+def get_list_mode(request):
+    client_id = getattr(request, 'client_id', '')
+    client_type = getattr(request, 'client_type', '')
+    config = ClientConfiguration.get_config(client_id, client_type)
+    return config.get('list_mode', 'paginated')
+
+
+class KeysetPagination(BasePagination):
+    page_size = api_settings.PAGE_SIZE or 100
+    max_page_size = 1000
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        queryset, cursor = self.get_page_queryset(queryset, request)
+        backwards = cursor is not None and cursor[0] == 'p'
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        if backwards:
+            results.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = cursor is not None
+
+        self.page = results
+        return results
+
+    def get_page_queryset(self, queryset, request):
+        """Return ``(queryset, cursor)`` for the requested page.
+
+        The queryset is filtered and ordered from the cursor; its first
+        ``page_size + 1`` rows are the page and whether another follows.
+        """
+        self.page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+
+        if cursor is None:
+            return queryset.order_by('-created_at', '-id'), cursor
+
+        direction, created_at, pk = cursor
+        if direction == 'p':
+            queryset = queryset.filter(
+                Q(created_at__gt=created_at) |
+                Q(created_at=created_at, id__gt=pk)
+            ).order_by('created_at', 'id')
+        else:
+            queryset = queryset.filter(
+                Q(created_at__lt=created_at) |
+                Q(created_at=created_at, id__lt=pk)
+            ).order_by('-created_at', '-id')
+        return queryset, cursor
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(
+                request.query_params.get(
+                    self.page_size_query_param,
+                    self.page_size
+                )
+            )
+        except (TypeError, ValueError):
+            return self.page_size
+
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            raw = base64.urlsafe_b64decode(padded.encode('ascii'))
+            direction, created_at, pk = raw.decode('ascii').split('|')
+            created_at = parse_datetime(created_at)
+            pk = int(pk)
+        except (TypeError, ValueError, UnicodeError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+
+        if direction not in ('n', 'p') or created_at is None:
+            raise NotFound(self.invalid_cursor_message)
+
+        return direction, created_at, pk
+
+    def encode_cursor(self, direction, obj):
+        raw = f'{direction}|{obj.created_at.isoformat()}|{obj.id}'
+        encoded = base64.urlsafe_b64encode(raw.encode('ascii'))
+        return encoded.decode('ascii').rstrip('=')
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        cursor = self.encode_cursor('n', self.page[-1])
+        return replace_query_param(
+            self.base_url,
+            self.cursor_query_param,
+            cursor
+        )
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        cursor = self.encode_cursor('p', self.page[0])
+        return replace_query_param(
+            self.base_url,
+            self.cursor_query_param,
+            cursor
+        )
+
+    def get_paginated_response(self, data):
+        next_link = self.get_next_link()
+        previous_link = self.get_previous_link()
+
+        if get_list_mode(self.request) in ('array', 'stream'):
+            links = []
+            if next_link:
+                links.append(f'<{next_link}>; rel="next"')
+            if previous_link:
+                links.append(f'<{previous_link}>; rel="prev"')
+            headers = {'Link': ', '.join(links)} if links else None
+            return Response(data, headers=headers)
+
+        return Response({
+            'next': next_link,
+            'previous': previous_link,
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
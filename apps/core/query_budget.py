@@ -0,0 +1,157 @@
+import json
+import logging
+import random
+import re
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+from .actions import view_action
+
+logger = logging.getLogger(__name__)
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r'\bIN \((?:%s|\?)(?:, (?:%s|\?))*\)')
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def sql_shape(sql):
+    """Return ``sql`` with literals and ``IN`` lists collapsed."""
+    return _IN_LISTS.sub('IN (...)', _LITERALS.sub('?', sql))
+
+
+class QueryCounter:
+    """Count the queries run on every connection, grouped by shape."""
+
+    def __init__(self):
+        self.count = 0
+        self.shapes = Counter()
+        self._stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        self.shapes[sql_shape(sql)] += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+        return False
+
+    def repeated(self, threshold):
+        """SELECT shapes run at least ``threshold`` times: likely N+1."""
+        return [
+            (shape, count) for shape, count in self.shapes.most_common()
+            if count >= threshold and shape.startswith('SELECT')
+        ]
+
+    def problems(self, budget, repeat_threshold):
+        problems = []
+        if budget is not None and self.count > budget:
+            problems.append(f'{self.count} queries, budget is {budget}')
+        for shape, count in self.repeated(repeat_threshold):
+            problems.append(f'{count} queries shaped like: {shape}')
+        return problems
+
+
+@contextmanager
+def query_budget(budget, repeat_threshold=None, label='block'):
+    """Fail if the block runs more than ``budget`` queries or N+1s.
+
+    Consume streamed responses inside the block so their queries count.
+    """
+    if repeat_threshold is None:
+        repeat_threshold = settings.QUERY_BUDGET_REPEAT_THRESHOLD
+    with QueryCounter() as counter:
+        yield counter
+    problems = counter.problems(budget, repeat_threshold)
+    if problems:
+        raise QueryBudgetExceeded(f'{label}: ' + '; '.join(problems))
+
+
+def resolve_budget(budgets, action, client_type, version):
+    """Find the budget for one action, client type and API version.
+
+    Keys are an action, ``(action, client_type)`` or
+    ``(action, client_type, version)``, where ``client_type`` may be
+    ``'*'``. The most specific key wins.
+    """
+    for key in ((action, client_type, version), (action, '*', version),
+                (action, client_type), action):
+        if key in budgets:
+            return budgets[key]
+    return None
+
+
+def view_budget(request):
+    """Return ``(label, budget)`` for a request, or None if not budgeted."""
+    view, action = view_action(request)
+    budgets = getattr(view, 'query_budgets', None)
+    if budgets is None:
+        return None
+
+    client_type = getattr(request, 'client_type', '')
+    version = getattr(request, 'api_version', None)
+    budget = resolve_budget(budgets, action, client_type, version)
+    label = f'{view.__name__}.{action} ({client_type}, {version})'
+    return label, budget
+
+
+def should_check():
+    if not settings.QUERY_BUDGET_ENABLED:
+        return False
+    return random.random() < settings.QUERY_BUDGET_SAMPLE_RATE
+
+
+class QueryBudgetMiddleware:
+    """Check sampled requests against their view's ``query_budgets``.
+
+    Violations are logged, and raised when ``QUERY_BUDGET_RAISE`` is set
+    (the default in ``config.test_settings``). The body of a streamed
+    response runs after this returns, so it is not counted.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not should_check():
+            return self.get_response(request)
+
+        with QueryCounter() as counter:
+            response = self.get_response(request)
+
+        budgeted = view_budget(request)
+        if budgeted is None:
+            return response
+
+        label, budget = budgeted
+        problems = counter.problems(
+            budget,
+            settings.QUERY_BUDGET_REPEAT_THRESHOLD
+        )
+        if problems:
+            logger.warning(json.dumps({
+                'event': 'query_budget_exceeded',
+                'view': label,
+                'method': request.method,
+                'path': request.path,
+                'queries': counter.count,
+                'budget': budget,
+                'problems': problems,
+            }))
+            if settings.QUERY_BUDGET_RAISE:
+                raise QueryBudgetExceeded(
+                    f'{label}: ' + '; '.join(problems)
+                )
+        return response
@@ -0,0 +1,189 @@
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import JsonResponse
+
+from .models import ClientConfiguration
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    __slots__ = ('limit', 'rate', 'tokens', 'updated_at', 'synced_at',
+                 'pending', 'seen_total')
+
+    def __init__(self, limit, period, now):
+        self.set_limit(limit, period)
+        self.tokens = float(self.limit)
+        self.updated_at = now
+        self.synced_at = now
+        self.pending = 0
+        self.seen_total = None
+
+    def set_limit(self, limit, period):
+        self.limit = limit or 0
+        self.rate = self.limit / period
+
+    def refill(self, now):
+        self.tokens = min(
+            self.limit,
+            self.tokens + (now - self.updated_at) * self.rate
+        )
+        self.updated_at = now
+
+    def take(self, now):
+        """Consume a token; return 0 or the seconds until one is available."""
+        if not self.limit:
+            return 0
+        self.refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            self.pending += 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """Per-client token buckets shared by every worker.
+
+    Each worker decides locally. Every ``sync_interval`` seconds per
+    client it adds its own consumption to a shared counter, and removes
+    what the other workers consumed meanwhile from its bucket. The
+    global rate can overshoot by at most what the other workers admit
+    in one interval. No request waits on a round-trip.
+    """
+
+    def __init__(self, period, sync_interval, max_clients,
+                 cache_alias='default', namespace='ratelimit'):
+        self.period = period
+        self.sync_interval = sync_interval
+        self.max_clients = max_clients
+        self.cache_alias = cache_alias
+        self.namespace = namespace
+        self.buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.allowed = 0
+        self.throttled = 0
+        self.syncs = 0
+        self.sync_errors = 0
+
+    @property
+    def shared(self):
+        return caches[self.cache_alias]
+
+    def check(self, client_id, load_limit):
+        """Return 0 to admit a request, else the seconds to wait.
+
+        ``load_limit`` is only called for new clients and on sync, so the
+        fast path never reads the client configuration.
+        """
+        now = time.monotonic()
+        with self._lock:
+            bucket = self.buckets.get(client_id)
+            if bucket is None:
+                bucket = TokenBucket(load_limit(), self.period, now)
+                self.buckets[client_id] = bucket
+                while len(self.buckets) > self.max_clients:
+                    self.buckets.popitem(last=False)
+            else:
+                self.buckets.move_to_end(client_id)
+
+            wait = bucket.take(now)
+            if wait:
+                self.throttled += 1
+            else:
+                self.allowed += 1
+
+            sync_due = now - bucket.synced_at >= self.sync_interval
+            if sync_due:
+                bucket.synced_at = now
+                pending, bucket.pending = bucket.pending, 0
+
+        if sync_due:
+            self._sync(client_id, bucket, pending, load_limit)
+        return wait
+
+    def reset(self):
+        with self._lock:
+            self.buckets.clear()
+            self.allowed = self.throttled = 0
+            self.syncs = self.sync_errors = 0
+
+    def stats(self):
+        return {
+            'allowed': self.allowed,
+            'throttled': self.throttled,
+            'syncs': self.syncs,
+            'sync_errors': self.sync_errors,
+            'clients': len(self.buckets),
+        }
+
+    def _sync(self, client_id, bucket, pending, load_limit):
+        try:
+            total = self._add_to_shared(client_id, pending)
+        except Exception:
+            logger.warning('Rate limit sync failed for %s', client_id)
+            with self._lock:
+                self.sync_errors += 1
+                bucket.pending += pending
+            return
+
+        limit = load_limit()
+        with self._lock:
+            self.syncs += 1
+            if (limit or 0) != bucket.limit:
+                bucket.set_limit(limit, self.period)
+                bucket.tokens = min(bucket.tokens, bucket.limit)
+
+            seen = bucket.seen_total
+            # A total below what we saw means the counter expired.
+            if seen is not None and total >= seen + pending:
+                others = total - seen - pending
+                bucket.refill(time.monotonic())
+                bucket.tokens = max(bucket.tokens - others, 0.0)
+            bucket.seen_total = total
+
+    def _add_to_shared(self, client_id, amount):
+        key = f'{self.namespace}:{client_id}'
+        timeout = max(self.period * 10, 3600)
+        try:
+            return self.shared.incr(key, amount)
+        except ValueError:
+            if self.shared.add(key, amount, timeout):
+                return amount
+            return self.shared.incr(key, amount)
+
+
+def client_rate_limit(request):
+    config = ClientConfiguration.get_config(
+        getattr(request, 'client_id', ''),
+        getattr(request, 'client_type', '')
+    )
+    return config.get('rate_limit')
+
+
+def throttled_response(wait):
+    retry_after = max(1, math.ceil(wait))
+    response = JsonResponse(
+        {
+            'detail': f'Request was throttled. Expected available in '
+                      f'{retry_after} seconds.',
+        },
+        status=429
+    )
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+rate_limiter = RateLimiter(
+    period=settings.RATE_LIMIT_PERIOD,
+    sync_interval=settings.RATE_LIMIT_SYNC_INTERVAL,
+    max_clients=settings.RATE_LIMIT_MAX_CLIENTS,
+    cache_alias=settings.RATE_LIMIT_CACHE_ALIAS,
+)
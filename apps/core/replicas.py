@@ -0,0 +1,211 @@
+import itertools
+import logging
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import (
+    DEFAULT_DB_ALIAS,
+    DatabaseError,
+    InterfaceError,
+    OperationalError,
+    connections,
+)
+
+from .actions import is_read_only
+
+logger = logging.getLogger(__name__)
+
+# The replica this request reads from; None reads from the primary.
+_read_alias = ContextVar('read_alias', default=None)
+
+
+class ReplicaPool:
+    """Healthy replicas from ``DATABASE_REPLICAS``, in round-robin order.
+
+    Each replica is probed with ``SELECT 1`` at most once per
+    ``REPLICA_HEALTH_CHECK_INTERVAL`` seconds per worker. A replica that
+    fails a probe or a query is skipped until its next probe succeeds.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counter = itertools.count()
+        self._checked_at = {}
+        self._healthy = {}
+
+    def choose(self):
+        healthy = [alias for alias in settings.DATABASE_REPLICAS
+                   if self.is_healthy(alias)]
+        if not healthy:
+            return None
+        return healthy[next(self._counter) % len(healthy)]
+
+    def is_healthy(self, alias):
+        now = time.monotonic()
+        with self._lock:
+            checked_at = self._checked_at.get(alias)
+            due = (
+                checked_at is None or
+                now - checked_at >= settings.REPLICA_HEALTH_CHECK_INTERVAL
+            )
+            if due:
+                self._checked_at[alias] = now
+            else:
+                return self._healthy[alias]
+
+        healthy = self.check(alias)
+        with self._lock:
+            if self._healthy.get(alias, True) != healthy:
+                logger.warning(
+                    'Replica %s is %s', alias, 'up' if healthy else 'down'
+                )
+            self._healthy[alias] = healthy
+        return healthy
+
+    def check(self, alias):
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except DatabaseError:
+            return False
+        return True
+
+    def mark_down(self, alias):
+        with self._lock:
+            if self._healthy.get(alias, True):
+                logger.warning('Replica %s is down', alias)
+            self._healthy[alias] = False
+            self._checked_at[alias] = time.monotonic()
+
+    def reset(self):
+        with self._lock:
+            self._checked_at.clear()
+            self._healthy.clear()
+
+    def stats(self):
+        with self._lock:
+            return dict(self._healthy)
+
+
+replica_pool = ReplicaPool()
+
+
+class ReplicaRouter:
+    """Send reads to the replica picked for the current request.
+
+    Writes always go to the primary, and pin the rest of the request
+    to it so the request reads its own writes. Only the primary is
+    migrated; replicas get their schema by replication.
+    """
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        if _read_alias.get() is not None:
+            _read_alias.set(None)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        pool = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db != DEFAULT_DB_ALIAS:
+            return False
+        return None
+
+
+def _sticky_key(client_id):
+    return f'replica-sticky:{client_id}'
+
+
+def mark_sticky(client_id):
+    """Read from the primary for ``REPLICA_STICKY_SECONDS`` from now."""
+    caches[settings.REPLICA_STICKY_CACHE_ALIAS].set(
+        _sticky_key(client_id),
+        True,
+        settings.REPLICA_STICKY_SECONDS
+    )
+
+
+def is_sticky(client_id):
+    return bool(
+        caches[settings.REPLICA_STICKY_CACHE_ALIAS].get(_sticky_key(client_id))
+    )
+
+
+class ReplicaRoutingMiddleware:
+    """Route reads of opted-in views to a healthy replica.
+
+    A view opts in with ``use_read_replicas = True``. Only safe methods
+    and ``read_only_actions`` are routed, and not for a client that
+    wrote within the last ``REPLICA_STICKY_SECONDS``. The body of a
+    streamed response is produced after this returns, so it is read
+    from the primary.
+
+    A write makes its client sticky only if it succeeded. Writes
+    through any view count, since other views may read what they
+    changed.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _read_alias.set(None)
+        try:
+            response = self.get_response(request)
+        finally:
+            _read_alias.reset(token)
+
+        client_id = getattr(request, 'client_id', '')
+        if (client_id and
+                settings.DATABASE_REPLICAS and
+                200 <= response.status_code < 400 and
+                not is_read_only(request)):
+            mark_sticky(client_id)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view = getattr(view_func, 'cls', None)
+        if (not is_read_only(request) or
+                not settings.DATABASE_REPLICAS or
+                not getattr(view, 'use_read_replicas', False)):
+            return None
+        if is_sticky(getattr(request, 'client_id', '')):
+            return None
+
+        alias = replica_pool.choose()
+        if alias is not None:
+            request.read_alias = alias
+            _read_alias.set(alias)
+        return None
+
+    def process_exception(self, request, exception):
+        alias = getattr(request, 'read_alias', None)
+        if alias and isinstance(exception, (OperationalError,
+                                            InterfaceError)):
+            replica_pool.mark_down(alias)
+        return None
+
+
+def replicate_sqlite(source=DEFAULT_DB_ALIAS, targets=None):
+    """Copy a SQLite primary over its SQLite replicas.
+
+    Run repeatedly (``manage.py simulate_replication``) this stands in
+    for replication with a lag of up to the interval between copies.
+    """
+    targets = settings.DATABASE_REPLICAS if targets is None else targets
+    primary = connections[source]
+    primary.ensure_connection()
+    for alias in targets:
+        replica = connections[alias]
+        replica.ensure_connection()
+        primary.connection.backup(replica.connection)
+    return list(targets)
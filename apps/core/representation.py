@@ -0,0 +1,19 @@
+from rest_framework import serializers
+
+
+def datetime_converter(field=None):
+    field = field or serializers.DateTimeField()
+    field_timezone = (
+        field.timezone if hasattr(field, 'timezone')
+        else field.default_timezone()
+    )
+    if field_timezone is None:
+        return field.to_representation
+
+    def convert(value):
+        value = value.astimezone(field_timezone).isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+
+    return convert
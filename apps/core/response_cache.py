@@ -0,0 +1,75 @@
+from django.conf import settings
+from django.db import transaction
+
+from .cache import LocalLRUCache
+
+
+class ResponseCache:
+    """Per-process LRU of serialized ``retrieve`` representations.
+
+    Entries are grouped per object, so one invalidation drops every
+    variant. Variants are keyed by the object's ETag, which already
+    covers ``updated_at``, the API version, the client and the query
+    string: a write made by another process changes the ETag, and the
+    old variant can no longer be served.
+    """
+
+    def __init__(self, max_size, timeout, max_variants):
+        self.timeout = timeout
+        self.max_variants = max_variants
+        self.local = LocalLRUCache(max_size)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get_or_serialize(self, instance, etag, serialize):
+        if not settings.RESPONSE_CACHE_ENABLED:
+            return serialize()
+
+        key = self._key(type(instance), instance.pk)
+        variants = self.local.get(key, None)
+        if variants is not None and etag in variants:
+            self.hits += 1
+            return variants[etag]
+
+        self.misses += 1
+        # serializer.data is a ReturnDict that references the serializer
+        # and, through its context, the request; keep only the values.
+        data = dict(serialize())
+
+        # Copy instead of mutating: another thread may be reading it.
+        variants = dict(variants or {})
+        variants[etag] = data
+        while len(variants) > self.max_variants:
+            del variants[next(iter(variants))]
+        self.local.set(key, variants, self.timeout)
+        return data
+
+    def invalidate(self, model, pk):
+        key = self._key(model, pk)
+        self.local.delete(key)
+        self.invalidations += 1
+        if transaction.get_connection().in_atomic_block:
+            # Drop variants other requests cached from the pre-commit row.
+            transaction.on_commit(lambda: self.local.delete(key))
+
+    def clear(self):
+        self.local.clear()
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations,
+            'size': len(self.local),
+        }
+
+    def _key(self, model, pk):
+        return model._meta.label, pk
+
+
+response_cache = ResponseCache(
+    max_size=settings.RESPONSE_CACHE_MAX_OBJECTS,
+    timeout=settings.RESPONSE_CACHE_TIMEOUT,
+    max_variants=settings.RESPONSE_CACHE_MAX_VARIANTS,
+)
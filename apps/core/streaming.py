@@ -0,0 +1,71 @@
+import json
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+from .pagination import get_list_mode
+from .timing import phase
+
+
+def encode_json(data):
+    return json.dumps(
+        data,
+        cls=JSONEncoder,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(',', ':'),
+    ).encode('utf-8')
+
+
+def iter_chunks(queryset, chunk_size):
+    chunk = []
+    for obj in queryset.iterator(chunk_size=chunk_size):
+        chunk.append(obj)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_json_array(queryset, serialize_chunk, chunk_size):
+    yield b'['
+    separator = b''
+    for chunk in iter_chunks(queryset, chunk_size):
+        items = serialize_chunk(chunk)
+        if not items:
+            continue
+        yield separator + b','.join(encode_json(item) for item in items)
+        separator = b','
+    yield b']'
+
+
+class StreamingListMixin:
+    stream_ordering = ('-created_at', '-id')
+
+    def should_stream_list(self, request):
+        paginator = self.paginator
+        if paginator is not None:
+            for param in (paginator.cursor_query_param,
+                          paginator.page_size_query_param):
+                if param in request.query_params:
+                    return False
+        return get_list_mode(request) == 'stream'
+
+    def serialize_list(self, objects):
+        with phase('serialize'):
+            return self.get_serializer(
+                objects,
+                many=True,
+                context={'request': self.request}
+            ).data
+
+    def stream_list(self, queryset):
+        chunk_size = settings.STREAMING_LIST_CHUNK_SIZE
+        queryset = queryset.order_by(*self.stream_ordering)
+
+        return StreamingHttpResponse(
+            iter_json_array(queryset, self.serialize_list, chunk_size),
+            content_type='application/json'
+        )
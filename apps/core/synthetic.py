@@ -0,0 +1,262 @@
+import random
+from array import array
+from datetime import date, timedelta
+
+from django.db import transaction
+
+from apps.audit.models import AuditLog
+from apps.patients.models import Patient
+from apps.records.models import MedicalRecord
+
+FIRST_NAMES = [
+    'James', 'Mary', 'Robert', 'Patricia', 'John', 'Jennifer', 'Michael',
+    'Linda', 'David', 'Elizabeth', 'William', 'Barbara', 'Richard', 'Susan',
+    'Joseph', 'Jessica', 'Thomas', 'Sarah', 'Carlos', 'Maria', 'Wei', 'Mei',
+    'Ahmed', 'Fatima', 'Raj', 'Priya', 'Jon', 'Catherine', 'Katherine',
+    'Stephen', 'Steven', 'Sean', 'Shawn',
+]
+LAST_NAMES = [
+    'Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller',
+    'Davis', 'Rodriguez', 'Martinez', 'Hernandez', 'Lopez', 'Gonzalez',
+    'Wilson', 'Anderson', 'Thomas', 'Taylor', 'Moore', 'Jackson', 'Martin',
+    'Lee', 'Nguyen', 'Chen', 'Patel', 'Khan', 'Smyth', 'Schmidt',
+    "O'Brien", 'Peterson', 'Petersen',
+]
+STREETS = ['Main St', 'Oak Ave', 'Maple Dr', 'Cedar Ln', 'Elm St',
+           'Park Blvd', 'Lakeview Rd', 'Hillcrest Ave']
+CITIES = ['Springfield', 'Riverside', 'Fairview', 'Franklin', 'Georgetown',
+          'Madison', 'Clinton', 'Salem']
+# Weighted roughly by prevalence.
+BLOOD_TYPES = (['O+'] * 37 + ['A+'] * 36 + ['B+'] * 9 + ['AB+'] * 3
+               + ['O-'] * 7 + ['A-'] * 6 + ['B-', 'AB-'])
+ALLERGIES = ['', '', '', '', 'Penicillin', 'Peanuts', 'Latex', 'Sulfa drugs',
+             'Shellfish', 'Penicillin, Latex']
+INSURERS = ['Aetna', 'Blue Cross', 'Cigna', 'Humana', 'Kaiser',
+            'UnitedHealthcare', '']
+
+DIAGNOSES = [
+    ('Essential hypertension', 'Lisinopril 10mg daily, low-sodium diet'),
+    ('Type 2 diabetes mellitus without complications',
+     'Metformin 500mg twice daily, dietary counselling'),
+    ('Acute upper respiratory infection', 'Rest, fluids, paracetamol'),
+    ('Hyperlipidemia', 'Atorvastatin 20mg nightly'),
+    ('Major depressive disorder, single episode',
+     'Sertraline 50mg daily, CBT referral'),
+    ('Low back pain', 'Physical therapy, ibuprofen as needed'),
+    ('Asthma, mild persistent', 'Inhaled fluticasone, albuterol as needed'),
+    ('Chronic obstructive pulmonary disease with exacerbation',
+     'Prednisone taper, nebulised bronchodilators'),
+    ('Urinary tract infection', 'Nitrofurantoin 100mg for 5 days'),
+    ('Osteoarthritis of knee', 'Weight management, topical NSAIDs'),
+]
+LAB_TESTS = [
+    ('HbA1c', '%', 4.0, 11.0, '4.0-5.6'),
+    ('LDL cholesterol', 'mg/dL', 60, 220, '<100'),
+    ('Fasting glucose', 'mg/dL', 65, 250, '70-99'),
+    ('Hemoglobin', 'g/dL', 9.0, 18.0, '12.0-17.5'),
+    ('TSH', 'mIU/L', 0.1, 9.0, '0.4-4.0'),
+    ('Creatinine', 'mg/dL', 0.5, 2.5, '0.6-1.3'),
+    ('White blood cell count', '10^3/uL', 2.5, 18.0, '4.5-11.0'),
+]
+MEDICATIONS = [
+    ('Metformin', ['500mg', '850mg', '1000mg']),
+    ('Lisinopril', ['5mg', '10mg', '20mg']),
+    ('Atorvastatin', ['10mg', '20mg', '40mg']),
+    ('Amoxicillin', ['250mg', '500mg']),
+    ('Sertraline', ['25mg', '50mg', '100mg']),
+    ('Levothyroxine', ['25mcg', '50mcg', '100mcg']),
+    ('Albuterol', ['90mcg/actuation']),
+]
+FREQUENCIES = ['Once daily', 'Twice daily', 'Three times daily',
+               'Every 8 hours', 'As needed', 'At bedtime']
+NOTE_TAGS = ['follow-up', 'phone-call', 'referral', 'urgent', 'billing',
+             'medication-review', 'patient-education']
+NOTE_TEXTS = [
+    'Patient called to report improvement in symptoms.',
+    'Discussed lifestyle changes; patient motivated.',
+    'Referred to cardiology for further evaluation.',
+    'Missed appointment; left voicemail to reschedule.',
+    'Reviewed medication list, no interactions found.',
+]
+CLINICIANS = ['Dr. Adams', 'Dr. Baker', 'Dr. Chen', 'Dr. Diaz',
+              'Dr. Evans', 'NP Foster', 'PA Garcia']
+CLIENT_IDS = ['legacy_hospital_1', 'legacy_hospital_2', 'modern_clinic_1',
+              'modern_clinic_2', 'modern_clinic_3', 'mobile_app_1']
+AUDIT_ACTIONS = ['read'] * 16 + ['create'] * 2 + ['update', 'delete']
+
+# Fixed so that the same seed always produces the same rows.
+REFERENCE_DATE = date(2024, 1, 1)
+
+
+class SyntheticDataGenerator:
+    """Seeded generator of realistic patients, records and audit logs.
+
+    The same seed and counts always produce the same field values;
+    only primary keys depend on what the database already holds.
+    Timestamps set by ``auto_now_add`` are the insert time. Rows are
+    inserted in batches of ``batch_size``, each in its own transaction,
+    so memory use does not grow with the volume.
+    """
+
+    def __init__(self, seed=0, batch_size=5000, namespace=None):
+        self.seed = seed
+        self.namespace = namespace or f'seed{seed}'
+        self.batch_size = batch_size
+        self.random = random.Random(seed)
+        self.patient_ids = array('q')
+        self.record_ids = array('q')
+
+    @property
+    def email_domain(self):
+        return f'{self.namespace}.synthetic.example.com'
+
+    def already_generated(self):
+        return Patient.objects.filter(
+            email__endswith=f'@{self.email_domain}'
+        ).exists()
+
+    def generate(self, patients, records, audit_logs, progress=None):
+        counts = {}
+        for name, build, total in (
+            ('patients', self.build_patient, patients),
+            ('records', self.build_record, records),
+            ('audit_logs', self.build_audit_log, audit_logs),
+        ):
+            counts[name] = self._insert(name, build, total, progress)
+        return counts
+
+    def build_patient(self, index):
+        rng = self.random
+        first_name = rng.choice(FIRST_NAMES)
+        last_name = rng.choice(LAST_NAMES)
+        born = REFERENCE_DATE - timedelta(days=rng.randint(365, 95 * 365))
+        ssn = (f'{rng.randint(100, 899):03d}-{rng.randint(1, 99):02d}-'
+               f'{rng.randint(1, 9999):04d}')
+        legacy = rng.random() < 0.5
+        verified = not legacy and rng.random() < 0.7
+
+        local_part = f'{first_name}.{last_name}.{index}'.replace("'", '')
+
+        patient = Patient(
+            email=f'{local_part.lower()}@{self.email_domain}',
+            first_name=first_name,
+            last_name=last_name,
+            date_of_birth=born,
+            phone=f'555-{rng.randint(0, 9999999):07d}',
+            address=f'{rng.randint(1, 9999)} {rng.choice(STREETS)}, '
+                    f'{rng.choice(CITIES)}',
+            ssn_legacy=ssn if legacy else '',
+            ssn_number='' if legacy else ssn.replace('-', ''),
+            ssn_verified=verified,
+            ssn_verification_date=(
+                REFERENCE_DATE - timedelta(days=rng.randint(0, 1000))
+                if verified else None
+            ),
+            blood_type=rng.choice(BLOOD_TYPES),
+            allergies=rng.choice(ALLERGIES),
+            emergency_contact=f'{rng.choice(FIRST_NAMES)} {last_name}',
+            emergency_phone=f'555-{rng.randint(0, 9999999):07d}',
+            insurance_provider=rng.choice(INSURERS),
+            insurance_number=f'{rng.randint(0, 10 ** 10 - 1):010d}',
+        )
+        patient.update_lookup_keys()
+        return patient
+
+    def build_record(self, index):
+        rng = self.random
+        record_type = rng.choices(
+            ['general', 'lab_result', 'prescription', 'note'],
+            weights=[35, 35, 20, 10]
+        )[0]
+        diagnosis, treatment = rng.choice(DIAGNOSES)
+        return MedicalRecord(
+            patient_id=rng.choice(self.patient_ids),
+            record_type=record_type,
+            diagnosis=diagnosis,
+            treatment=treatment,
+            notes=rng.choice(NOTE_TEXTS) if rng.random() < 0.4 else '',
+            flexible_data=self.flexible_data(record_type),
+            created_by=rng.choice(CLINICIANS),
+        )
+
+    def flexible_data(self, record_type):
+        rng = self.random
+        if record_type == 'lab_result':
+            name, unit, low, high, reference = rng.choice(LAB_TESTS)
+            return {
+                'test_name': name,
+                'results': {
+                    'value': round(rng.uniform(low, high), 1),
+                    'unit': unit,
+                    'reference_range': reference,
+                },
+                'lab_technician': rng.choice(CLINICIANS),
+                'fasting': rng.random() < 0.5,
+            }
+        if record_type == 'prescription':
+            medication, dosages = rng.choice(MEDICATIONS)
+            return {
+                'medication': medication,
+                'dosage': rng.choice(dosages),
+                'frequency': rng.choice(FREQUENCIES),
+                'refills': rng.randint(0, 5),
+            }
+        if record_type == 'note':
+            return {
+                'content': rng.choice(NOTE_TEXTS),
+                'tags': rng.sample(NOTE_TAGS, rng.randint(1, 3)),
+            }
+        return {
+            'vitals': {
+                'systolic': rng.randint(100, 170),
+                'diastolic': rng.randint(60, 105),
+                'heart_rate': rng.randint(50, 110),
+                'temperature_c': round(rng.uniform(36.1, 38.5), 1),
+            },
+        }
+
+    def build_audit_log(self, index):
+        rng = self.random
+        action = rng.choice(AUDIT_ACTIONS)
+        if self.record_ids and rng.random() < 0.6:
+            resource_type = 'records'
+            resource_id = rng.choice(self.record_ids)
+        else:
+            resource_type = 'patients'
+            resource_id = rng.choice(self.patient_ids)
+        method = {'read': 'GET', 'create': 'POST', 'update': 'PATCH',
+                  'delete': 'DELETE'}[action]
+        return AuditLog(
+            action=action,
+            resource_type=resource_type,
+            resource_id=resource_id,
+            client_id=rng.choice(CLIENT_IDS),
+            ip_address=f'10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.'
+                       f'{rng.randint(1, 254)}',
+            metadata={
+                'path': f'/api/{resource_type}/{resource_id}/',
+                'method': method,
+                'status_code': 201 if action == 'create' else 200,
+            },
+        )
+
+    def _insert(self, name, build, total, progress):
+        if total and name != 'patients' and not self.patient_ids:
+            raise ValueError(f'Cannot generate {name} without patients.')
+
+        model = {'patients': Patient, 'records': MedicalRecord,
+                 'audit_logs': AuditLog}[name]
+        ids = {'patients': self.patient_ids,
+               'records': self.record_ids}.get(name)
+        done = 0
+        while done < total:
+            size = min(self.batch_size, total - done)
+            objects = [build(done + i) for i in range(size)]
+            with transaction.atomic():
+                model.objects.bulk_create(objects)
+            if ids is not None:
+                ids.extend(obj.pk for obj in objects)
+            done += size
+            if progress:
+                progress(name, done, total)
+        return done
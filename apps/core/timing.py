@@ -0,0 +1,171 @@
+import functools
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    """Durations and query counts per phase of one sampled request.
+
+    Phases may nest, and both numbers are inclusive: a query run inside
+    ``serialize`` also counts towards any phase that encloses it.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.active = []
+        self.db_ms = 0.0
+        self.queries = 0
+
+    def add(self, name, elapsed_ms, queries):
+        entry = self.phases.setdefault(name, [0.0, 0])
+        entry[0] += elapsed_ms
+        entry[1] += queries
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_ms += (time.perf_counter() - started) * 1000
+            self.queries += 1
+            for phase in self.active:
+                phase.queries += 1
+
+    def total_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def header(self, total_ms):
+        metrics = [f'total;dur={total_ms:.1f}']
+        metrics.append(
+            f'db;dur={self.db_ms:.1f};desc="{self.queries} queries"'
+        )
+        for name, (elapsed_ms, queries) in self.phases.items():
+            metrics.append(
+                f'{name};dur={elapsed_ms:.1f};desc="{queries} queries"'
+            )
+        return ', '.join(metrics)
+
+    def as_dict(self, total_ms):
+        return {
+            'total_ms': round(total_ms, 3),
+            'db_ms': round(self.db_ms, 3),
+            'queries': self.queries,
+            'phases': {
+                name: {'ms': round(elapsed_ms, 3), 'queries': queries}
+                for name, (elapsed_ms, queries) in self.phases.items()
+            },
+        }
+
+
+class _Phase:
+    __slots__ = ('timings', 'name', 'started', 'queries')
+
+    def __init__(self, timings, name):
+        self.timings = timings
+        self.name = name
+        self.queries = 0
+
+    def __enter__(self):
+        self.timings.active.append(self)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed_ms = (time.perf_counter() - self.started) * 1000
+        self.timings.active.remove(self)
+        self.timings.add(self.name, elapsed_ms, self.queries)
+        return False
+
+
+class _NullPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NULL_PHASE = _NullPhase()
+
+
+def phase(name):
+    """Time a block as ``name`` when the current request is sampled."""
+    timings = _current.get()
+    if timings is None:
+        return NULL_PHASE
+    return _Phase(timings, name)
+
+
+def timed(name):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TimedViewMixin:
+    def dispatch(self, request, *args, **kwargs):
+        with phase('view'):
+            return super().dispatch(request, *args, **kwargs)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # Middleware only sees the HttpRequest; hand it the version.
+        request._request.api_version = request.version
+
+
+def should_sample():
+    if not settings.SERVER_TIMING_ENABLED:
+        return False
+    return random.random() < settings.SERVER_TIMING_SAMPLE_RATE
+
+
+class ServerTimingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not should_sample():
+            return self.get_response(request)
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(timings.execute_wrapper)
+                    )
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+
+        total_ms = timings.total_ms()
+        if settings.SERVER_TIMING_HEADER:
+            response['Server-Timing'] = timings.header(total_ms)
+        logger.info(json.dumps({
+            'event': 'request_timing',
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'client_id': getattr(request, 'client_id', ''),
+            **timings.as_dict(total_ms),
+        }))
+        return response
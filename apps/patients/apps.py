@@ -3,4 +3,7 @@ from django.apps import AppConfig
 
 class PatientsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'apps.patients'
\ No newline at end of file
+    name = 'apps.patients'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,294 @@
+from datetime import date
+from itertools import count
+
+from django.conf import settings
+from django.db import transaction
+from django.test.utils import override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from apps.core.benchmarks import (
+    API_VERSIONS,
+    CLIENT_TYPES,
+    api_benchmark_settings,
+    api_client,
+    make_api_request,
+    measure,
+    measure_requests,
+    register,
+    speedup,
+)
+from apps.core.response_cache import response_cache
+from apps.core.synthetic import SyntheticDataGenerator
+from .bulk import BulkPatientCreator
+from .models import Patient
+from .plans import get_plan
+from .serializers import PatientSerializerV1, PatientSerializerV2
+from .views import PatientViewSet
+
+VARIANTS = [
+    ('v1', PatientSerializerV1, 'legacy_hospital', None),
+    ('v1', PatientSerializerV1, 'modern_clinic', None),
+    ('v2', PatientSerializerV2, 'modern_clinic', None),
+    ('v2', PatientSerializerV2, 'mobile_app', 'id,email,first_name,ssn'),
+]
+
+
+def create_patients(rows):
+    Patient.objects.bulk_create(
+        [
+            Patient(
+                email=f'bench{i}@example.com',
+                first_name=f'First{i}',
+                last_name=f'Last{i}',
+                date_of_birth=date(1950 + i % 50, 1 + i % 12, 1 + i % 28),
+                phone=f'555-{i:07d}',
+                address=f'{i} Benchmark Street',
+                ssn_legacy=f'{i:09d}' if i % 2 else '',
+                ssn_number='' if i % 2 else f'{i:09d}',
+                ssn_verified=not i % 4,
+                blood_type='O+',
+            )
+            for i in range(rows)
+        ],
+        batch_size=1000
+    )
+    return list(Patient.objects.all())
+
+
+@register('patient_serialization')
+def patient_serialization(rows, repeat):
+    patients = create_patients(rows)
+    renderer = JSONRenderer()
+    results = {}
+
+    for version, serializer_class, client_type, fields in VARIANTS:
+        params = {'fields': fields} if fields else None
+        request = make_api_request(
+            '/api/patients/',
+            version,
+            client_type,
+            params=params
+        )
+
+        def serialize():
+            return serializer_class(
+                patients,
+                many=True,
+                context={'request': request}
+            ).data
+
+        def compiled():
+            plan = get_plan(serializer_class, request)
+            return [plan(patient) for patient in patients]
+
+        identical = renderer.render(serialize()) == renderer.render(compiled())
+        serializer_timing = measure(serialize, repeat)
+        plan_timing = measure(compiled, repeat)
+
+        results[f'{version}/{client_type}/{fields or "all"}'] = {
+            'rows': rows,
+            'identical_output': identical,
+            'serializer': serializer_timing,
+            'plan': plan_timing,
+            'speedup': speedup(serializer_timing, plan_timing),
+        }
+
+    return results
+
+
+BULK_VARIANTS = [
+    ('v1', PatientSerializerV1, 'legacy_hospital'),
+    ('v2', PatientSerializerV2, 'modern_clinic'),
+]
+
+
+def patient_payloads(prefix, rows, version):
+    payloads = []
+    for i in range(rows):
+        if version == 'v1':
+            ssn = f'{i:09d}'
+        else:
+            ssn = {
+                'number': f'{i:09d}',
+                'verified': True,
+                'verification_date': '2024-01-15',
+            }
+        payloads.append({
+            'email': f'{prefix}-{i}@example.com',
+            'first_name': f'First{i}',
+            'last_name': f'Last{i}',
+            'date_of_birth': '1980-01-01',
+            'phone': f'555-{i:07d}',
+            'ssn': ssn,
+        })
+    return payloads
+
+
+def rows_per_second(rows, timing):
+    if not timing['median_ms']:
+        return None
+    return round(rows / (timing['median_ms'] / 1000), 1)
+
+
+@register('patient_bulk_create')
+def patient_bulk_create(rows, repeat):
+    runs = count()
+    chunk_size = settings.PATIENT_BULK_MAX_ITEMS
+    results = {}
+
+    for version, serializer_class, client_type in BULK_VARIANTS:
+        request = make_api_request(
+            '/api/patients/',
+            version,
+            client_type,
+            method='post'
+        )
+        created = {}
+
+        def one_by_one():
+            payloads = patient_payloads(f'single{next(runs)}', rows, version)
+            for payload in payloads:
+                serializer = serializer_class(
+                    data=payload,
+                    context={'request': request}
+                )
+                serializer.is_valid(raise_exception=True)
+                serializer.save()
+                serializer.data
+            created['one_by_one'] = len(payloads)
+
+        def bulk():
+            payloads = patient_payloads(f'bulk{next(runs)}', rows, version)
+            total = 0
+            for start in range(0, rows, chunk_size):
+                creator = BulkPatientCreator(serializer_class, request)
+                total += sum(
+                    1
+                    for result in creator.create(
+                        payloads[start:start + chunk_size]
+                    )
+                    if result['status'] == 201
+                )
+            created['bulk'] = total
+
+        single_timing = measure(one_by_one, repeat)
+        bulk_timing = measure(bulk, repeat)
+
+        results[f'{version}/{client_type}'] = {
+            'rows': rows,
+            'all_created': created == {'one_by_one': rows, 'bulk': rows},
+            'one_by_one': single_timing,
+            'bulk': bulk_timing,
+            'one_by_one_rows_per_second': rows_per_second(rows, single_timing),
+            'bulk_rows_per_second': rows_per_second(rows, bulk_timing),
+            'speedup': speedup(single_timing, bulk_timing),
+        }
+
+    return results
+
+
+@register('patient_retrieve_cache')
+def patient_retrieve_cache(rows, repeat):
+    patients = create_patients(min(rows, 1000))
+    view = PatientViewSet.as_view({'get': 'retrieve'})
+    factory = APIRequestFactory()
+    results = {}
+
+    for version, _, client_type, fields in VARIANTS:
+        params = {'fields': fields} if fields else {}
+
+        def retrieve_all():
+            bodies = []
+            for patient in patients:
+                request = factory.get(
+                    f'/api/patients/{patient.pk}/',
+                    params,
+                    HTTP_ACCEPT=f'application/json; version={version}'
+                )
+                request.client_type = client_type
+                request.client_id = f'{client_type}_1'
+                bodies.append(view(request, pk=patient.pk).render().content)
+            return bodies
+
+        with override_settings(RESPONSE_CACHE_ENABLED=False):
+            expected = retrieve_all()
+            uncached_timing = measure(retrieve_all, repeat)
+
+        response_cache.clear()
+        identical = retrieve_all() == expected
+        before = response_cache.stats()
+        cached_timing = measure(retrieve_all, repeat)
+        after = response_cache.stats()
+
+        results[f'{version}/{client_type}/{fields or "all"}'] = {
+            'rows': len(patients),
+            'identical_output': identical,
+            'cache_hits': after['hits'] - before['hits'],
+            'cache_misses': after['misses'] - before['misses'],
+            'uncached': uncached_timing,
+            'cached': cached_timing,
+            'speedup': speedup(uncached_timing, cached_timing),
+        }
+
+    response_cache.clear()
+    return results
+
+
+API_BULK_ITEMS = 50
+
+
+@register('patient_api')
+def patient_api(rows, repeat):
+    SyntheticDataGenerator(namespace='patient-api-bench').generate(rows, 0, 0)
+    ids = list(Patient.objects.order_by('id').values_list('id', flat=True))
+    requests = repeat * 10
+    runs = count()
+    results = {}
+
+    with api_benchmark_settings():
+        for client_type in CLIENT_TYPES:
+            for version in API_VERSIONS:
+                client = api_client(client_type, version)
+                run = next(runs)
+
+                def create(i):
+                    return client.post(
+                        '/api/patients/',
+                        patient_payloads(f'api{run}-{i}', 1, version)[0],
+                        content_type='application/json'
+                    )
+
+                def bulk(i):
+                    return client.post(
+                        '/api/patients/bulk/',
+                        patient_payloads(
+                            f'apibulk{run}-{i}',
+                            API_BULK_ITEMS,
+                            version
+                        ),
+                        content_type='application/json'
+                    )
+
+                results[f'{version}/{client_type}'] = {
+                    'rows': rows,
+                    'list': measure_requests(
+                        lambda i: client.get('/api/patients/'),
+                        requests
+                    ),
+                    'retrieve': measure_requests(
+                        lambda i: client.get(
+                            f'/api/patients/{ids[i % len(ids)]}/'
+                        ),
+                        requests
+                    ),
+                }
+                # Roll writes back so every variant reads the same rows.
+                with transaction.atomic():
+                    results[f'{version}/{client_type}'].update({
+                        'create': measure_requests(create, requests),
+                        'bulk': measure_requests(bulk, requests),
+                    })
+                    transaction.set_rollback(True)
+
+    return results
@@ -0,0 +1,181 @@
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
+
+from apps.core.models import ClientConfiguration
+from .models import Patient
+from .plans import get_plan
+
+
+SSN_MAX_LENGTH = Patient._meta.get_field('ssn_number').max_length
+
+
+def ssn_errors(ssn_value):
+    """Return the errors of an item's ``ssn``, or None if it is usable.
+
+    The serializers take ``ssn`` unvalidated, so the bulk endpoint checks
+    its shape itself rather than fail the whole batch on one item.
+    """
+    if isinstance(ssn_value, str):
+        number = ssn_value
+    elif isinstance(ssn_value, dict):
+        number = ssn_value.get('number', '')
+        if not isinstance(number, str):
+            return ['"number" must be a string.']
+        if not isinstance(ssn_value.get('verified', False), bool):
+            return ['"verified" must be a boolean.']
+        verification_date = ssn_value.get('verification_date')
+        if verification_date and not isinstance(verification_date, str):
+            return ['"verification_date" must be a string.']
+    else:
+        return ['Expected a string or an object.']
+
+    if len(number) > SSN_MAX_LENGTH:
+        return [
+            f'Ensure the SSN has no more than {SSN_MAX_LENGTH} characters.'
+        ]
+    return None
+
+
+def apply_ssn(patient, ssn_value):
+    if isinstance(ssn_value, str):
+        patient.set_ssn_from_string(ssn_value)
+    elif isinstance(ssn_value, dict):
+        patient.set_ssn_from_object(ssn_value)
+
+
+class BulkPatientCreator:
+    def __init__(self, serializer_class, request, batch_size=None):
+        self.request = request
+        self.batch_size = batch_size or settings.PATIENT_BULK_BATCH_SIZE
+        config = ClientConfiguration.get_config(
+            getattr(request, 'client_id', ''),
+            getattr(request, 'client_type', '')
+        )
+
+        self.serializer = serializer_class(context={
+            'request': request,
+            'client_config': config,
+        })
+        self.plan = get_plan(serializer_class, request)
+        self.unique_message = self._drop_unique_email_validator()
+
+    def create(self, items):
+        results = [None] * len(items)
+        pending = []
+
+        for index, item in enumerate(items):
+            patient = self._build(index, item, results)
+            if patient is not None:
+                pending.append((index, patient))
+
+        pending = self._reject_duplicate_emails(pending, results)
+        self._insert(pending, results)
+        return results
+
+    def _drop_unique_email_validator(self):
+        field = self.serializer.fields.get('email')
+        if field is None:
+            return None
+
+        message = None
+        validators = []
+        for validator in field.validators:
+            if isinstance(validator, UniqueValidator):
+                message = validator.message
+            else:
+                validators.append(validator)
+        field.validators = validators
+        return message
+
+    def _build(self, index, item, results):
+        if not isinstance(item, dict):
+            results[index] = self._failure(index, {
+                'non_field_errors': ['Expected an object.'],
+            })
+            return None
+
+        try:
+            validated_data = self.serializer.run_validation(item)
+        except serializers.ValidationError as exc:
+            results[index] = self._failure(index, exc.detail)
+            return None
+
+        ssn_value = item.get('ssn')
+        errors = ssn_errors(ssn_value) if ssn_value else None
+        if errors:
+            results[index] = self._failure(index, {'ssn': errors})
+            return None
+
+        validated_data.pop('ssn', None)
+        patient = Patient(**validated_data)
+
+        if ssn_value:
+            try:
+                apply_ssn(patient, ssn_value)
+            except (ValueError, OverflowError):
+                results[index] = self._failure(index, {
+                    'ssn': ['Invalid verification date.'],
+                })
+                return None
+        patient.update_lookup_keys()
+        return patient
+
+    def _reject_duplicate_emails(self, pending, results):
+        if self.unique_message is None or not pending:
+            return pending
+
+        existing = set(
+            Patient.objects.filter(
+                email__in={patient.email for _, patient in pending}
+            ).values_list('email', flat=True)
+        )
+
+        accepted = []
+        for index, patient in pending:
+            if patient.email in existing:
+                results[index] = self._duplicate(index)
+                continue
+            existing.add(patient.email)
+            accepted.append((index, patient))
+        return accepted
+
+    def _insert(self, pending, results):
+        if not pending:
+            return
+
+        try:
+            with transaction.atomic():
+                Patient.objects.bulk_create(
+                    [patient for _, patient in pending],
+                    batch_size=self.batch_size
+                )
+        except IntegrityError:
+            self._insert_one_by_one(pending, results)
+            return
+
+        for index, patient in pending:
+            results[index] = self._success(index, patient)
+
+    def _insert_one_by_one(self, pending, results):
+        # A concurrent request claimed one of the emails between the IN
+        # check and the insert; fall back to per-row savepoints.
+        for index, patient in pending:
+            patient.pk = None
+            try:
+                with transaction.atomic():
+                    patient.save(force_insert=True)
+            except IntegrityError:
+                results[index] = self._duplicate(index)
+            else:
+                results[index] = self._success(index, patient)
+
+    def _success(self, index, patient):
+        return {'index': index, 'status': 201, 'data': self.plan(patient)}
+
+    def _failure(self, index, errors):
+        return {'index': index, 'status': 400, 'errors': errors}
+
+    def _duplicate(self, index):
+        return self._failure(index, {'email': [self.unique_message]})
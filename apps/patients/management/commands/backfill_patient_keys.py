@@ -0,0 +1,126 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max, Min, Q
+from apps.patients.models import SEARCH_KEY_FIELDS, SSN_KEY_FIELDS, Patient
+
+KEY_GROUPS = {
+    'search': {
+        'fields': SEARCH_KEY_FIELDS,
+        'sources': ('first_name', 'last_name', 'email'),
+        'pending': Q(email_key=''),
+        'update': Patient.update_search_keys,
+    },
+    'ssn': {
+        'fields': SSN_KEY_FIELDS,
+        'sources': ('ssn_legacy', 'ssn_number'),
+        'pending': (
+            Q(ssn_hash='') & (~Q(ssn_legacy='') | ~Q(ssn_number='')) |
+            Q(ssn_number_hash='') & ~Q(ssn_legacy='') & ~Q(ssn_number='') |
+            Q(ssn_number='') & ~Q(ssn_number_hash='')
+        ),
+        'update': Patient.update_ssn_hash,
+    },
+}
+
+
+def backfill_range(group, start, end, recompute=False):
+    spec = KEY_GROUPS[group]
+    patients = Patient.objects.filter(id__gte=start, id__lt=end)
+    if not recompute:
+        patients = patients.filter(spec['pending'])
+
+    with transaction.atomic():
+        batch = list(
+            patients.select_for_update().only('id', *spec['sources'])
+        )
+        for patient in batch:
+            spec['update'](patient)
+        Patient.objects.bulk_update(batch, spec['fields'])
+    return len(batch)
+
+
+class Command(BaseCommand):
+    help = 'Backfill precomputed patient lookup keys in primary key batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'groups',
+            nargs='*',
+            help=f'Key groups to backfill ({", ".join(KEY_GROUPS)}); '
+                 f'defaults to all'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Width of each primary key range processed per batch'
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0,
+            help='Seconds to pause between batches'
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            dest='recompute',
+            help='Recompute keys for every patient, not only missing ones'
+        )
+
+    def handle(self, *args, **options):
+        groups = options['groups'] or list(KEY_GROUPS)
+        unknown = set(groups) - set(KEY_GROUPS)
+        if unknown:
+            raise CommandError(
+                f'Unknown key groups: {", ".join(sorted(unknown))}'
+            )
+
+        for group in groups:
+            self.backfill(
+                group,
+                options['batch_size'],
+                options['sleep'],
+                options['recompute']
+            )
+
+    def backfill(self, group, batch_size, sleep, recompute):
+        patients = Patient.objects.all()
+        if not recompute:
+            patients = patients.filter(KEY_GROUPS[group]['pending'])
+
+        total = patients.count()
+        self.stdout.write(f'Found {total} patients to backfill {group} keys')
+        bounds = patients.aggregate(min_id=Min('id'), max_id=Max('id'))
+        if bounds['min_id'] is None:
+            return
+
+        done = 0
+        started = time.monotonic()
+        first, last = bounds['min_id'], bounds['max_id']
+        for start in range(first, last + 1, batch_size):
+            done += backfill_range(
+                group,
+                start,
+                start + batch_size,
+                recompute
+            )
+
+            elapsed = time.monotonic() - started
+            rate = done / elapsed if elapsed > 0 else 0
+            eta = 'unknown'
+            if rate:
+                eta = timedelta(seconds=round((total - done) / rate))
+            self.stdout.write(
+                f'Backfilled {done}/{total} {group} keys '
+                f'({rate:.0f} rows/s, ETA {eta})'
+            )
+            if sleep:
+                time.sleep(sleep)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully backfilled {done} {group} keys')
+        )
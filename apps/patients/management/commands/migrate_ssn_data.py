@@ -1,17 +1,106 @@
-from django.core.management.base import BaseCommand
-from django.db import transaction
+import json
+import multiprocessing
+import os
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections, transaction
+from django.db.models import Count, F, Max, Min, Q
+from django.utils import timezone
 from apps.patients.models import Patient
 
+FORWARD_PENDING = (
+    Q(ssn_legacy__isnull=False) & ~Q(ssn_legacy='') & Q(ssn_number='')
+)
+ROLLBACK_PENDING = Q(ssn_number__isnull=False) & ~Q(ssn_number='')
+
+
+def migrate_range(start, end):
+    # QuerySet.update() skips auto_now and Patient.save(); bump
+    # updated_at so ETags change, and keep ssn_number_hash (which now
+    # hashes the same value as ssn_hash) in step.
+    with transaction.atomic():
+        return Patient.objects.filter(
+            FORWARD_PENDING,
+            id__gte=start,
+            id__lt=end
+        ).update(
+            ssn_number=F('ssn_legacy'),
+            ssn_number_hash=F('ssn_hash'),
+            ssn_verified=False,
+            updated_at=timezone.now()
+        )
+
+
+def rollback_range(start, end):
+    batch = Patient.objects.filter(ROLLBACK_PENDING, id__gte=start, id__lt=end)
+
+    with transaction.atomic():
+        batch.filter(ssn_legacy='').update(ssn_legacy=F('ssn_number'))
+        return batch.update(
+            ssn_number='',
+            ssn_number_hash='',
+            ssn_verified=False,
+            ssn_verification_date=None,
+            updated_at=timezone.now()
+        )
+
+
+DIRECTIONS = {
+    'forward': (FORWARD_PENDING, migrate_range, 'Migrated'),
+    'rollback': (ROLLBACK_PENDING, rollback_range, 'Rolled back'),
+}
+
+LOCK_RETRIES = 8
+LOCK_BACKOFF = 0.05
+
+
+def split_ranges(start, max_id, batch_size):
+    return [
+        (range_start, range_start + batch_size)
+        for range_start in range(start, max_id + 1, batch_size)
+    ]
+
+
+def run_range_task(direction, start, end, sleep=0):
+    process_range = DIRECTIONS[direction][1]
+
+    for attempt in range(LOCK_RETRIES + 1):
+        try:
+            rows = process_range(start, end)
+            break
+        except OperationalError as exc:
+            if 'locked' not in str(exc) or attempt == LOCK_RETRIES:
+                raise
+            time.sleep(LOCK_BACKOFF * 2 ** attempt)
+
+    if sleep:
+        time.sleep(sleep)
+    return rows
+
+
+def snapshot_counts():
+    return Patient.objects.aggregate(
+        with_legacy=Count('id', filter=~Q(ssn_legacy='')),
+        with_number=Count('id', filter=~Q(ssn_number='')),
+        with_any=Count('id', filter=~Q(ssn_legacy='') | ~Q(ssn_number='')),
+        pending_forward=Count('id', filter=FORWARD_PENDING),
+    )
+
 
 class Command(BaseCommand):
     help = 'Migrate SSN data from legacy format to new format'
+    executor_class = ProcessPoolExecutor
 
     def add_arguments(self, parser):
         parser.add_argument(
             '--batch-size',
             type=int,
             default=1000,
-            help='Number of records to process per batch'
+            help='Width of each primary key range processed per batch'
         )
         parser.add_argument(
             '--dry-run',
@@ -23,11 +112,44 @@ class Command(BaseCommand):
             action='store_true',
             help='Rollback migration (new format to legacy)'
         )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0,
+            help='Seconds to pause between batches'
+        )
+        parser.add_argument(
+            '--checkpoint-file',
+            default='migrate_ssn_data.checkpoint.json',
+            help='File used to resume an interrupted run'
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Ignore an existing checkpoint and start from the beginning'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Number of worker processes, each with its own connection'
+        )
+        parser.add_argument(
+            '--max-retries',
+            type=int,
+            default=3,
+            help='Times a failed range is resubmitted before giving up'
+        )
 
     def handle(self, *args, **options):
         batch_size = options['batch_size']
         dry_run = options['dry_run']
         rollback = options['rollback']
+        self.sleep = options['sleep']
+        self.checkpoint_file = options['checkpoint_file']
+        self.restart = options['restart']
+        self.workers = options['workers']
+        self.max_retries = options['max_retries']
 
         if rollback:
             self.rollback_migration(batch_size, dry_run)
@@ -36,74 +158,231 @@ class Command(BaseCommand):
 
     def migrate_forward(self, batch_size, dry_run):
         self.stdout.write('Starting SSN migration (legacy to new format)...')
-        
-        patients = Patient.objects.filter(
-            ssn_legacy__isnull=False,
-            ssn_number=''
-        ).exclude(ssn_legacy='')
+        migrated = self.run('forward', batch_size, dry_run, 'migrate')
+
+        if migrated is not None:
+            self.stdout.write(self.style.SUCCESS(
+                f'Successfully migrated {migrated} patients'
+            ))
+
+    def rollback_migration(self, batch_size, dry_run):
+        self.stdout.write('Starting SSN rollback (new format to legacy)...')
+        rolled_back = self.run('rollback', batch_size, dry_run, 'rollback')
+
+        if rolled_back is not None:
+            self.stdout.write(
+                self.style.SUCCESS(f'Successfully rolled back {rolled_back}')
+            )
+
+    def run(self, direction, batch_size, dry_run, verb):
+        pending, process_range, label = DIRECTIONS[direction]
+        patients = Patient.objects.filter(pending)
 
         total = patients.count()
-        self.stdout.write(f'Found {total} patients to migrate')
+        self.stdout.write(f'Found {total} patients to {verb}')
 
         if dry_run:
             self.stdout.write(self.style.WARNING('DRY RUN - No changes made'))
-            return
-
-        migrated = 0
-        for i in range(0, total, batch_size):
-            batch = patients[i:i + batch_size]
-            
-            with transaction.atomic():
-                for patient in batch:
-                    patient.ssn_number = patient.ssn_legacy
-                    patient.ssn_verified = False
-                    patient.save(update_fields=[
-                        'ssn_number',
-                        'ssn_verified'
-                    ])
-                    migrated += 1
-
-            self.stdout.write(f'Migrated {migrated}/{total} patients')
+            return None
+
+        before = snapshot_counts()
+        bounds = patients.aggregate(min_id=Min('id'), max_id=Max('id'))
+        if bounds['min_id'] is None:
+            self.clear_checkpoint()
+            return 0
+
+        checkpoint = self.load_checkpoint(direction)
+        start = bounds['min_id']
+        self.processed = 0
+        if checkpoint:
+            start = max(start, checkpoint['last_id'] + 1)
+            self.processed = checkpoint['processed']
+            self.stdout.write(f'Resuming after id {checkpoint["last_id"]}')
+
+        ranges = split_ranges(start, bounds['max_id'], batch_size)
+        self.progress = {
+            'direction': direction,
+            'label': label,
+            'ranges': ranges,
+            'completed': set(),
+            'next_index': 0,
+            'resumed': self.processed,
+            'expected': self.processed + total,
+            'started': time.monotonic(),
+        }
+
+        if self.workers > 1:
+            failed = self.run_parallel(direction, ranges)
+        else:
+            failed = self.run_sequential(process_range, ranges)
+
+        if failed:
+            raise CommandError(
+                f'{len(failed)} ranges failed after {self.max_retries} '
+                f'retries, first failure at ids {failed[0][0]}-'
+                f'{failed[0][1] - 1}; rerun to resume'
+            )
 
+        self.clear_checkpoint()
+        self.verify(direction, before, total)
+        return self.processed
+
+    def run_sequential(self, process_range, ranges):
+        for index, (start, end) in enumerate(ranges):
+            rows = process_range(start, end)
+            self.record_range((start, end), rows)
+            if self.sleep and index < len(ranges) - 1:
+                time.sleep(self.sleep)
+        return []
+
+    def run_parallel(self, direction, ranges):
         self.stdout.write(
-            self.style.SUCCESS(f'Successfully migrated {migrated} patients')
+            f'Processing {len(ranges)} ranges with {self.workers} workers'
         )
+        connections.close_all()
 
-    def rollback_migration(self, batch_size, dry_run):
-        self.stdout.write('Starting SSN rollback (new format to legacy)...')
-        
-        patients = Patient.objects.filter(
-            ssn_number__isnull=False
-        ).exclude(ssn_number='')
+        attempts = Counter()
+        failed = []
+        executor = self.executor_class(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('fork')
+        )
 
-        total = patients.count()
-        self.stdout.write(f'Found {total} patients to rollback')
+        with executor:
+            futures = {
+                executor.submit(run_range_task, direction, start, end,
+                                self.sleep): (start, end)
+                for start, end in ranges
+            }
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    id_range = futures.pop(future)
+                    try:
+                        rows = future.result()
+                    except Exception as exc:
+                        attempts[id_range] += 1
+                        if attempts[id_range] > self.max_retries:
+                            failed.append(id_range)
+                            self.stderr.write(
+                                f'Range {id_range[0]}-{id_range[1] - 1} '
+                                f'failed: {exc}'
+                            )
+                            continue
+                        self.stdout.write(self.style.WARNING(
+                            f'Retrying range {id_range[0]}-'
+                            f'{id_range[1] - 1} ({exc})'
+                        ))
+                        retry = executor.submit(
+                            run_range_task,
+                            direction,
+                            id_range[0],
+                            id_range[1],
+                            self.sleep
+                        )
+                        futures[retry] = id_range
+                        continue
 
-        if dry_run:
-            self.stdout.write(self.style.WARNING('DRY RUN - No changes made'))
-            return
-
-        rolled_back = 0
-        for i in range(0, total, batch_size):
-            batch = patients[i:i + batch_size]
-            
-            with transaction.atomic():
-                for patient in batch:
-                    if not patient.ssn_legacy:
-                        patient.ssn_legacy = patient.ssn_number
-                    patient.ssn_number = ''
-                    patient.ssn_verified = False
-                    patient.ssn_verification_date = None
-                    patient.save(update_fields=[
-                        'ssn_legacy',
-                        'ssn_number',
-                        'ssn_verified',
-                        'ssn_verification_date'
-                    ])
-                    rolled_back += 1
-
-            self.stdout.write(f'Rolled back {rolled_back}/{total} patients')
+                    self.record_range(id_range, rows)
+
+        return sorted(failed)
+
+    def record_range(self, id_range, rows):
+        progress = self.progress
+        ranges = progress['ranges']
+        self.processed += rows
+        progress['completed'].add(id_range)
+
+        watermark = None
+        while (progress['next_index'] < len(ranges) and
+               ranges[progress['next_index']] in progress['completed']):
+            watermark = ranges[progress['next_index']][1] - 1
+            progress['next_index'] += 1
+        if watermark is not None:
+            self.save_checkpoint(
+                progress['direction'],
+                watermark,
+                self.processed
+            )
+
+        elapsed = time.monotonic() - progress['started']
+        rate = self.format_rate(self.processed - progress['resumed'], elapsed)
+        eta = self.format_eta(
+            len(progress['completed']),
+            len(ranges),
+            elapsed
+        )
+        self.stdout.write(
+            f'{progress["label"]} {self.processed}/{progress["expected"]} '
+            f'patients ({rate}, ETA {eta})'
+        )
+
+    def verify(self, direction, before, total):
+        after = snapshot_counts()
+
+        if direction == 'forward':
+            expected = {
+                'pending_forward': 0,
+                'with_number': before['with_number'] + total,
+            }
+        else:
+            expected = {
+                'with_number': 0,
+                'with_legacy': before['with_any'],
+            }
+
+        mismatches = {
+            key: (value, after[key])
+            for key, value in expected.items()
+            if after[key] != value
+        }
+        if mismatches:
+            details = ', '.join(
+                f'{key} expected {want} got {got}'
+                for key, (want, got) in mismatches.items()
+            )
+            raise CommandError(f'Post-migration check failed: {details}')
 
         self.stdout.write(
-            self.style.SUCCESS(f'Successfully rolled back {rolled_back}')
-        )
\ No newline at end of file
+            f'Verified: {after["with_legacy"]} legacy SSNs, '
+            f'{after["with_number"]} new-format SSNs'
+        )
+
+    def format_rate(self, rows, elapsed):
+        if elapsed <= 0:
+            return f'{rows} rows/s'
+        return f'{rows / elapsed:.0f} rows/s'
+
+    def format_eta(self, done, total, elapsed):
+        if done <= 0 or elapsed <= 0:
+            return 'unknown'
+        seconds = round((total - done) * elapsed / done)
+        return str(timedelta(seconds=seconds))
+
+    def load_checkpoint(self, direction):
+        if self.restart or not os.path.exists(self.checkpoint_file):
+            return None
+
+        with open(self.checkpoint_file) as f:
+            checkpoint = json.load(f)
+
+        if checkpoint.get('direction') != direction:
+            self.stdout.write(self.style.WARNING(
+                f'Ignoring checkpoint for {checkpoint.get("direction")} run'
+            ))
+            return None
+        return checkpoint
+
+    def save_checkpoint(self, direction, last_id, processed):
+        tmp_path = f'{self.checkpoint_file}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                'direction': direction,
+                'last_id': last_id,
+                'processed': processed,
+            }, f)
+        os.replace(tmp_path, self.checkpoint_file)
+
+    def clear_checkpoint(self):
+        if os.path.exists(self.checkpoint_file):
+            os.remove(self.checkpoint_file)
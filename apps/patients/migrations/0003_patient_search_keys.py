@@ -0,0 +1,58 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0002_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='patient',
+            name='email_key',
+            field=models.CharField(blank=True, editable=False, max_length=254),
+        ),
+        migrations.AddField(
+            model_name='patient',
+            name='first_name_key',
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='patient',
+            name='first_name_phonetic',
+            field=models.CharField(blank=True, editable=False, max_length=4),
+        ),
+        migrations.AddField(
+            model_name='patient',
+            name='last_name_key',
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='patient',
+            name='last_name_phonetic',
+            field=models.CharField(blank=True, editable=False, max_length=4),
+        ),
+        migrations.AddIndex(
+            model_name='patient',
+            index=models.Index(fields=['last_name_key', 'first_name_key'], name='patients_last_name_key_idx', opclasses=['varchar_pattern_ops', 'varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='patient',
+            index=models.Index(fields=['first_name_key'], name='patients_first_name_key_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='patient',
+            index=models.Index(fields=['last_name_phonetic', 'first_name_phonetic'], name='patients_phonetic_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='patient',
+            index=models.Index(fields=['email_key'], name='patients_email_key_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='patient',
+            index=models.Index(fields=['date_of_birth', 'last_name_key'], name='patients_dob_last_name_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0003_patient_search_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='patient',
+            name='ssn_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='patient',
+            index=models.Index(fields=['ssn_hash'], name='patients_ssn_hash_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0004_patient_ssn_hash'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='patient',
+            index=models.Index(fields=['updated_at', 'id'], name='patients_updated_47c2e0_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-17 20:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0005_sync_cursor_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='patient',
+            name='ssn_number_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='patient',
+            index=models.Index(fields=['ssn_number_hash'], name='patients_ssn_number_hash_idx'),
+        ),
+    ]
@@ -1,4 +1,37 @@
 from django.db import models
+from django.db.models import Q
+
+from .search_keys import (
+    normalize_email,
+    normalize_name,
+    phonetic_key,
+    ssn_hash,
+)
+
+LOOKUP_KEY_SOURCES = {
+    'first_name': ('first_name_key', 'first_name_phonetic'),
+    'last_name': ('last_name_key', 'last_name_phonetic'),
+    'email': ('email_key',),
+    'ssn_legacy': ('ssn_hash', 'ssn_number_hash'),
+    'ssn_number': ('ssn_hash', 'ssn_number_hash'),
+}
+SEARCH_KEY_FIELDS = (
+    'first_name_key',
+    'last_name_key',
+    'first_name_phonetic',
+    'last_name_phonetic',
+    'email_key',
+)
+SSN_KEY_FIELDS = ('ssn_hash', 'ssn_number_hash')
+LOOKUP_KEY_FIELDS = SEARCH_KEY_FIELDS + SSN_KEY_FIELDS
+
+
+class PatientQuerySet(models.QuerySet):
+    def by_ssn(self, ssn):
+        digest = ssn_hash(ssn)
+        if not digest:
+            return self.none()
+        return self.filter(Q(ssn_hash=digest) | Q(ssn_number_hash=digest))
 
 
 class Patient(models.Model):
@@ -21,8 +54,39 @@ class Patient(models.Model):
     insurance_provider = models.CharField(max_length=100, blank=True)
     insurance_number = models.CharField(max_length=50, blank=True)
     
+    first_name_key = models.CharField(
+        max_length=100,
+        blank=True,
+        editable=False
+    )
+    last_name_key = models.CharField(
+        max_length=100,
+        blank=True,
+        editable=False
+    )
+    first_name_phonetic = models.CharField(
+        max_length=4,
+        blank=True,
+        editable=False
+    )
+    last_name_phonetic = models.CharField(
+        max_length=4,
+        blank=True,
+        editable=False
+    )
+    email_key = models.CharField(max_length=254, blank=True, editable=False)
+    ssn_hash = models.CharField(max_length=64, blank=True, editable=False)
+    # Only set while ssn_legacy, which ssn_hash covers, shadows ssn_number.
+    ssn_number_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        editable=False
+    )
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    objects = PatientQuerySet.as_manager()
     
     class Meta:
         db_table = 'patients'
@@ -31,8 +95,67 @@ class Patient(models.Model):
             models.Index(fields=['email']),
             models.Index(fields=['ssn_legacy']),
             models.Index(fields=['ssn_number']),
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['updated_at', 'id']),
+            models.Index(
+                fields=['last_name_key', 'first_name_key'],
+                name='patients_last_name_key_idx',
+                opclasses=['varchar_pattern_ops', 'varchar_pattern_ops']
+            ),
+            models.Index(
+                fields=['first_name_key'],
+                name='patients_first_name_key_idx',
+                opclasses=['varchar_pattern_ops']
+            ),
+            models.Index(
+                fields=['last_name_phonetic', 'first_name_phonetic'],
+                name='patients_phonetic_idx'
+            ),
+            models.Index(
+                fields=['email_key'],
+                name='patients_email_key_idx',
+                opclasses=['varchar_pattern_ops']
+            ),
+            models.Index(
+                fields=['date_of_birth', 'last_name_key'],
+                name='patients_dob_last_name_idx'
+            ),
+            models.Index(fields=['ssn_hash'], name='patients_ssn_hash_idx'),
+            models.Index(
+                fields=['ssn_number_hash'],
+                name='patients_ssn_number_hash_idx'
+            ),
         ]
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            for source, keys in LOOKUP_KEY_SOURCES.items():
+                if source in update_fields:
+                    update_fields.update(keys)
+            kwargs['update_fields'] = update_fields
+
+        self.update_lookup_keys()
+        super().save(*args, **kwargs)
+
+    def update_lookup_keys(self):
+        self.update_search_keys()
+        self.update_ssn_hash()
+
+    def update_search_keys(self):
+        self.first_name_key = normalize_name(self.first_name)
+        self.last_name_key = normalize_name(self.last_name)
+        self.first_name_phonetic = phonetic_key(self.first_name)
+        self.last_name_phonetic = phonetic_key(self.last_name)
+        self.email_key = normalize_email(self.email)
+
+    def update_ssn_hash(self):
+        self.ssn_hash = ssn_hash(self.get_ssn_v1())
+        self.ssn_number_hash = (
+            ssn_hash(self.ssn_number) if self.ssn_legacy else ''
+        )
+
     def get_ssn_v1(self):
         return self.ssn_legacy or self.ssn_number
 
@@ -58,6 +181,7 @@ class Patient(models.Model):
         if self.ssn_number:
             return
         self.ssn_legacy = ssn_value
+        self.update_ssn_hash()
 
     def set_ssn_from_object(self, ssn_data):
         self.ssn_number = ssn_data.get('number', '')
@@ -65,4 +189,5 @@ class Patient(models.Model):
         verification_date = ssn_data.get('verification_date')
         if verification_date:
             from dateutil import parser
-            self.ssn_verification_date = parser.parse(verification_date).date()
\ No newline at end of file
+            self.ssn_verification_date = parser.parse(verification_date).date()
+        self.update_ssn_hash()
\ No newline at end of file
@@ -0,0 +1,140 @@
+import threading
+from operator import attrgetter
+
+from rest_framework import ISO_8601, fields as drf_fields
+from rest_framework.settings import api_settings
+
+from apps.core.fields import get_requested_fields
+from apps.core.representation import datetime_converter
+from .serializers import PatientSerializerV1, PatientSerializerV2
+
+
+def ssn_v1(patient):
+    return patient.ssn_legacy or patient.ssn_number
+
+
+def ssn_v2(patient):
+    if patient.ssn_number:
+        verification_date = patient.ssn_verification_date
+        return {
+            'number': patient.ssn_number,
+            'verified': patient.ssn_verified,
+            'verification_date': (
+                verification_date.isoformat() if verification_date else None
+            ),
+        }
+    if patient.ssn_legacy:
+        return {
+            'number': patient.ssn_legacy,
+            'verified': False,
+            'verification_date': None,
+        }
+    return None
+
+
+INLINE_METHODS = {
+    (PatientSerializerV1, 'get_ssn'): ssn_v1,
+    (PatientSerializerV2, 'get_ssn'): ssn_v2,
+}
+
+
+def _date_converter(field):
+    return lambda value: value.isoformat()
+
+
+def _boolean_converter(field):
+    return lambda value: value if value is True or value is False else (
+        field.to_representation(value)
+    )
+
+
+FAST_CONVERTERS = {
+    drf_fields.IntegerField: lambda field: int,
+    drf_fields.CharField: lambda field: str,
+    drf_fields.EmailField: lambda field: str,
+    drf_fields.BooleanField: _boolean_converter,
+    drf_fields.DateField: _date_converter,
+    drf_fields.DateTimeField: datetime_converter,
+}
+
+ISO_FORMAT_SETTINGS = {
+    drf_fields.DateField: 'DATE_FORMAT',
+    drf_fields.DateTimeField: 'DATETIME_FORMAT',
+}
+
+
+def _field_step(serializer, field):
+    if isinstance(field, drf_fields.SerializerMethodField):
+        key = (type(serializer), field.method_name)
+        method = INLINE_METHODS.get(key)
+        if method is None:
+            method = getattr(serializer, field.method_name)
+        return field.field_name, method, None, True
+
+    field_type = type(field)
+    factory = FAST_CONVERTERS.get(field_type)
+    setting = ISO_FORMAT_SETTINGS.get(field_type)
+    if setting is not None:
+        output_format = getattr(
+            field,
+            'format',
+            getattr(api_settings, setting)
+        )
+        if output_format is None or output_format.lower() != ISO_8601:
+            factory = None
+
+    converter = factory(field) if factory is not None else None
+    if converter is None:
+        converter = field.to_representation
+
+    if len(field.source_attrs) == 1:
+        getter = attrgetter(field.source_attrs[0])
+    else:
+        getter = field.get_attribute
+    return field.field_name, getter, converter, False
+
+
+def compile_plan(serializer):
+    steps = tuple(
+        _field_step(serializer, field)
+        for field in serializer.fields.values()
+        if not field.write_only
+    )
+
+    def to_representation(instance):
+        data = {}
+        for name, getter, converter, is_method in steps:
+            value = getter(instance)
+            if is_method or value is None:
+                data[name] = value
+            else:
+                data[name] = converter(value)
+        return data
+
+    to_representation.field_names = tuple(step[0] for step in steps)
+    return to_representation
+
+
+MAX_PLANS = 1024
+
+_plans = {}
+_plans_lock = threading.Lock()
+
+
+def get_plan(serializer_class, request):
+    requested = get_requested_fields(request)
+    key = (
+        serializer_class,
+        request.version,
+        getattr(request, 'client_type', None),
+        requested,
+    )
+
+    plan = _plans.get(key)
+    if plan is None:
+        serializer = serializer_class(context={'request': request})
+        plan = compile_plan(serializer)
+        with _plans_lock:
+            if len(_plans) < MAX_PLANS:
+                plan = _plans.setdefault(key, plan)
+    return plan
@@ -0,0 +1,87 @@
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+
+from .search_keys import (
+    normalize_email,
+    normalize_name,
+    phonetic_key,
+    prefix_upper_bound,
+)
+
+SEARCH_ORDERING = ('last_name_key', 'first_name_key', 'id')
+NAME_FIELDS = {
+    'first_name': ('first_name_key', 'first_name_phonetic'),
+    'last_name': ('last_name_key', 'last_name_phonetic'),
+}
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+
+def prefix_q(vendor, field, prefix):
+    # PostgreSQL serves LIKE 'x%' from the varchar_pattern_ops indexes;
+    # SQLite only uses an index for a range on a BINARY-collated column.
+    if vendor == 'postgresql':
+        return Q(**{f'{field}__startswith': prefix})
+    condition = Q(**{f'{field}__gte': prefix})
+    upper_bound = prefix_upper_bound(prefix)
+    if upper_bound is not None:
+        condition &= Q(**{f'{field}__lt': upper_bound})
+    return condition
+
+
+def get_limit(params):
+    try:
+        limit = int(params.get('limit', DEFAULT_LIMIT))
+    except (TypeError, ValueError):
+        raise ValidationError({'limit': ['A valid integer is required.']})
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def search_patients(queryset, params):
+    vendor = connections[queryset.db].vendor
+    fuzzy = params.get('fuzzy', 'true').lower() != 'false'
+    conditions = []
+
+    for param, (key_field, phonetic_field) in NAME_FIELDS.items():
+        value = params.get(param)
+        if not value:
+            continue
+        key = normalize_name(value)
+        if not key:
+            raise ValidationError({param: ['Enter at least one letter.']})
+
+        condition = prefix_q(vendor, key_field, key)
+        code = phonetic_key(value) if fuzzy else ''
+        if code:
+            condition |= Q(**{phonetic_field: code})
+        conditions.append(condition)
+
+    email = params.get('email')
+    if email:
+        key = normalize_email(email)
+        if not key:
+            raise ValidationError({'email': ['Enter at least one character.']})
+        conditions.append(prefix_q(vendor, 'email_key', key))
+
+    date_of_birth = params.get('date_of_birth')
+    if date_of_birth:
+        try:
+            parsed = parse_date(date_of_birth)
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise ValidationError({
+                'date_of_birth': ['Enter a valid date (YYYY-MM-DD).'],
+            })
+        conditions.append(Q(date_of_birth=parsed))
+
+    if not conditions:
+        raise ValidationError({
+            'detail': 'Provide first_name, last_name, email or date_of_birth.',
+        })
+
+    return queryset.filter(*conditions).order_by(*SEARCH_ORDERING)[
+        :get_limit(params)
+    ]
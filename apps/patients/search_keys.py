@@ -0,0 +1,80 @@
+import hashlib
+import hmac
+import re
+import sys
+import unicodedata
+
+from django.conf import settings
+
+NON_NAME_CHARS = re.compile(r'[^a-z0-9]')
+NON_DIGITS = re.compile(r'\D')
+SOUNDEX_CODES = {
+    **dict.fromkeys('bfpv', '1'),
+    **dict.fromkeys('cgjkqsxz', '2'),
+    **dict.fromkeys('dt', '3'),
+    'l': '4',
+    **dict.fromkeys('mn', '5'),
+    'r': '6',
+}
+
+
+def strip_accents(value):
+    decomposed = unicodedata.normalize('NFKD', value)
+    return ''.join(
+        char for char in decomposed if not unicodedata.combining(char)
+    )
+
+
+def normalize_name(value):
+    """Lowercase ASCII letters and digits only: "O'Brién" -> "obrien"."""
+    return NON_NAME_CHARS.sub('', strip_accents(value or '').lower())
+
+
+def normalize_email(value):
+    return strip_accents(value or '').strip().lower()
+
+
+def normalize_ssn(value):
+    return NON_DIGITS.sub('', value or '')
+
+
+def ssn_hash(value):
+    """Keyed hash of an SSN's digits; "123-45-6789" and "123456789" match."""
+    digits = normalize_ssn(value)
+    if not digits:
+        return ''
+    return hmac.new(
+        settings.PATIENT_SSN_HASH_KEY.encode(),
+        digits.encode(),
+        hashlib.sha256
+    ).hexdigest()
+
+
+def phonetic_key(value):
+    """American Soundex of a name, so "Smyth" and "Smith" share a key."""
+    name = ''.join(char for char in normalize_name(value) if char.isalpha())
+    if not name:
+        return ''
+
+    codes = [name[0].upper()]
+    previous = SOUNDEX_CODES.get(name[0], '')
+    for char in name[1:]:
+        code = SOUNDEX_CODES.get(char, '')
+        if code and code != previous:
+            codes.append(code)
+            if len(codes) == 4:
+                break
+        if char not in 'hw':
+            previous = code
+    return ''.join(codes).ljust(4, '0')
+
+
+def prefix_upper_bound(prefix):
+    """Smallest string above every string starting with ``prefix``.
+
+    Returns None when there is no such bound, as for an empty prefix.
+    """
+    prefix = prefix.rstrip(chr(sys.maxunicode))
+    if not prefix:
+        return None
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
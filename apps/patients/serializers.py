@@ -1,7 +1,8 @@
 from rest_framework import serializers
 from django.conf import settings
+from apps.core.fields import filter_serializer_fields, get_requested_fields
 from apps.core.models import ClientConfiguration
-from .models import Patient
+from .models import LOOKUP_KEY_FIELDS, Patient
 
 
 class PatientSerializerV1(serializers.ModelSerializer):
@@ -9,7 +10,7 @@ class PatientSerializerV1(serializers.ModelSerializer):
 
     class Meta:
         model = Patient
-        fields = '__all__'
+        exclude = LOOKUP_KEY_FIELDS
 
     def get_ssn(self, obj):
         return obj.get_ssn_v1()
@@ -22,12 +23,8 @@ class PatientSerializerV1(serializers.ModelSerializer):
             client_type = request.client_type
             
             if client_type == settings.CLIENT_TYPES['MOBILE_APP']:
-                requested_fields = request.query_params.get('fields')
-                if requested_fields:
-                    allowed = set(requested_fields.split(','))
-                    existing = set(fields.keys())
-                    for field_name in existing - allowed:
-                        fields.pop(field_name)
+                requested = get_requested_fields(request)
+                filter_serializer_fields(fields, requested)
             
             elif client_type == settings.CLIENT_TYPES['LEGACY_HOSPITAL']:
                 for field in ['ssn_number', 'ssn_verified',
@@ -44,7 +41,12 @@ class PatientSerializerV1(serializers.ModelSerializer):
                 client_id = getattr(request, 'client_id', '')
                 client_type = request.client_type
                 
-                config = ClientConfiguration.get_config(client_id, client_type)
+                config = self.context.get('client_config')
+                if config is None:
+                    config = ClientConfiguration.get_config(
+                        client_id,
+                        client_type
+                    )
                 required_fields = config.get('required_fields', [])
                 
                 for field in required_fields:
@@ -73,7 +75,7 @@ class PatientSerializerV2(serializers.ModelSerializer):
 
     class Meta:
         model = Patient
-        fields = '__all__'
+        exclude = LOOKUP_KEY_FIELDS
 
     def get_ssn(self, obj):
         return obj.get_ssn_v2()
@@ -86,12 +88,8 @@ class PatientSerializerV2(serializers.ModelSerializer):
             client_type = request.client_type
             
             if client_type == settings.CLIENT_TYPES['MOBILE_APP']:
-                requested_fields = request.query_params.get('fields')
-                if requested_fields:
-                    allowed = set(requested_fields.split(','))
-                    existing = set(fields.keys())
-                    for field_name in existing - allowed:
-                        fields.pop(field_name)
+                requested = get_requested_fields(request)
+                filter_serializer_fields(fields, requested)
         
         for field in ['ssn_legacy', 'ssn_number', 'ssn_verified',
                       'ssn_verification_date']:
@@ -107,7 +105,12 @@ class PatientSerializerV2(serializers.ModelSerializer):
                 client_id = getattr(request, 'client_id', '')
                 client_type = request.client_type
                 
-                config = ClientConfiguration.get_config(client_id, client_type)
+                config = self.context.get('client_config')
+                if config is None:
+                    config = ClientConfiguration.get_config(
+                        client_id,
+                        client_type
+                    )
                 required_fields = config.get('required_fields', [])
                 
                 for field in required_fields:
@@ -128,4 +131,10 @@ class PatientSerializerV2(serializers.ModelSerializer):
                 patient.set_ssn_from_string(ssn_value)
             patient.save()
         
-        return patient
\ No newline at end of file
+        return patient
+
+
+def serializer_class_for_version(version):
+    if version == 'v2' or version == 'v3':
+        return PatientSerializerV2
+    return PatientSerializerV1
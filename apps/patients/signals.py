@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.core.response_cache import response_cache
+from .models import Patient
+
+
+@receiver([post_save, post_delete], sender=Patient)
+def invalidate_patient_responses(sender, instance, **kwargs):
+    response_cache.invalidate(Patient, instance.pk)
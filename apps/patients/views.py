@@ -1,19 +1,47 @@
+from django.conf import settings
 from rest_framework import viewsets, status
+from rest_framework.decorators import action
 from rest_framework.response import Response
+from apps.core.conditional import ConditionalGetMixin
+from apps.core.fields import FieldSelectionMixin
 from apps.core.permissions import RoleBasedPermission
+from apps.core.response_cache import response_cache
+from apps.core.streaming import StreamingListMixin
+from apps.core.timing import TimedViewMixin, phase
+from .bulk import BulkPatientCreator
 from .models import Patient
-from .serializers import PatientSerializerV1, PatientSerializerV2
+from .plans import get_plan
+from .search import search_patients
+from .search_keys import normalize_ssn
+from .serializers import serializer_class_for_version
 
 
-class PatientViewSet(viewsets.ModelViewSet):
+class PatientViewSet(TimedViewMixin, ConditionalGetMixin, FieldSelectionMixin,
+                     StreamingListMixin, viewsets.ModelViewSet):
     queryset = Patient.objects.all()
     permission_classes = [RoleBasedPermission]
+    use_read_replicas = True
+    # POSTs that only read: routed, audited and not sticky like GETs.
+    read_only_actions = ('ssn_lookup',)
+    # Includes a cold client config load and session authentication.
+    query_budgets = {
+        'list': 5,
+        'retrieve': 4,
+        'search': 4,
+        'ssn_lookup': 4,
+    }
+    field_selection_sources = {
+        'ssn': ('ssn_legacy', 'ssn_number', 'ssn_verified',
+                'ssn_verification_date'),
+    }
 
     def get_serializer_class(self):
-        version = self.request.version
-        if version == 'v2' or version == 'v3':
-            return PatientSerializerV2
-        return PatientSerializerV1
+        return serializer_class_for_version(self.request.version)
+
+    def serialize_list(self, objects):
+        with phase('serialize'):
+            plan = get_plan(self.get_serializer_class(), self.request)
+            return [plan(obj) for obj in objects]
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(
@@ -29,29 +57,95 @@ class PatientViewSet(viewsets.ModelViewSet):
             headers=headers
         )
 
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk(self, request, *args, **kwargs):
+        items = request.data
+        max_items = settings.PATIENT_BULK_MAX_ITEMS
+
+        if not isinstance(items, list) or not items:
+            return Response(
+                {'detail': 'Expected a non-empty list of patients.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(items) > max_items:
+            return Response(
+                {'detail': f'At most {max_items} patients per request.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        creator = BulkPatientCreator(self.get_serializer_class(), request)
+        results = creator.create(items)
+        created = sum(1 for result in results if result['status'] == 201)
+
+        if created == len(results):
+            response_status = status.HTTP_201_CREATED
+        elif created:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+
+        return Response(
+            {
+                'created': created,
+                'failed': len(results) - created,
+                'results': results,
+            },
+            status=response_status
+        )
+
+    @action(detail=False, methods=['get'], url_path='search')
+    def search(self, request, *args, **kwargs):
+        patients = search_patients(self.get_queryset(), request.query_params)
+        return Response({'results': self.serialize_list(patients)})
+
+    @action(detail=False, methods=['post'], url_path='ssn-lookup')
+    def ssn_lookup(self, request, *args, **kwargs):
+        # POST keeps the SSN out of URLs, access logs and the audit trail.
+        ssn = None
+        if isinstance(request.data, dict):
+            ssn = request.data.get('ssn')
+        if not isinstance(ssn, str) or not normalize_ssn(ssn):
+            return Response(
+                {'ssn': ['Enter an SSN.']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        patients = self.get_queryset().by_ssn(ssn)
+        return Response({'results': self.serialize_list(patients)})
+
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
-        serializer = self.get_serializer(
-            instance,
-            context={'request': request}
-        )
-        return Response(serializer.data)
+        etag = self.get_object_etag(instance)
+        not_modified = self.not_modified_response(etag)
+        if not_modified is not None:
+            return not_modified
+
+        with phase('serialize'):
+            data = response_cache.get_or_serialize(
+                instance,
+                etag,
+                lambda: self.get_serializer(
+                    instance,
+                    context={'request': request}
+                ).data
+            )
+        return Response(data)
 
     def list(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
+        stream = self.should_stream_list(request)
+        not_modified = self.not_modified_response(
+            self.get_list_etag(queryset, paginated=not stream)
+        )
+        if not_modified is not None:
+            return not_modified
+
+        if stream:
+            return self.stream_list(queryset)
+
         page = self.paginate_queryset(queryset)
         
         if page is not None:
-            serializer = self.get_serializer(
-                page,
-                many=True,
-                context={'request': request}
-            )
-            return self.get_paginated_response(serializer.data)
+            return self.get_paginated_response(self.serialize_list(page))
 
-        serializer = self.get_serializer(
-            queryset,
-            many=True,
-            context={'request': request}
-        )
-        return Response(serializer.data)
\ No newline at end of file
+        return Response(self.serialize_list(queryset))
\ No newline at end of file
@@ -3,4 +3,7 @@ from django.apps import AppConfig
 
 class RecordsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'apps.records'
\ No newline at end of file
+    name = 'apps.records'
+
+    def ready(self):
+        from . import checks, signals  # noqa: F401
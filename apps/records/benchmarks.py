@@ -0,0 +1,231 @@
+import json
+
+from django.db import connection, transaction
+
+from apps.core.benchmarks import (
+    API_VERSIONS,
+    CLIENT_TYPES,
+    api_benchmark_settings,
+    api_client,
+    make_api_request,
+    measure,
+    measure_requests,
+    register,
+    speedup,
+)
+from apps.core.synthetic import SyntheticDataGenerator
+from apps.patients.models import Patient
+from .formats import FAST_FORMATS, raw_rows
+from .search import INDEX_TEARDOWN
+from .models import MedicalRecord
+from .serializers import (
+    MedicalRecordFlexibleSerializer,
+    MedicalRecordLegacySerializer,
+)
+
+FLEXIBLE_DATA = {
+    'general': {},
+    'lab_result': {
+        'test_name': 'HbA1c',
+        'results': {'value': 6.4, 'unit': '%'},
+        'lab_technician': 'J. Smith',
+    },
+    'prescription': {
+        'medication': 'Metformin',
+        'dosage': '500mg',
+        'frequency': 'Twice daily',
+    },
+    'note': {'content': 'Patient stable', 'tags': ['follow-up']},
+}
+
+VARIANTS = [
+    ('flexible', MedicalRecordFlexibleSerializer, 'modern_clinic'),
+    ('legacy', MedicalRecordLegacySerializer, 'legacy_hospital'),
+]
+
+
+DIAGNOSES = [
+    'Type 2 diabetes mellitus without complications',
+    'Essential hypertension',
+    'Acute upper respiratory infection',
+    'Chronic obstructive pulmonary disease with exacerbation',
+]
+
+
+def build_records(patient, rows):
+    record_types = list(FLEXIBLE_DATA)
+    return [
+        MedicalRecord(
+            patient=patient,
+            record_type=record_types[i % len(record_types)],
+            diagnosis=f'Diagnosis {i}',
+            treatment=f'Treatment {i}',
+            notes=f'Notes {i}',
+            flexible_data=FLEXIBLE_DATA[record_types[i % len(record_types)]],
+        )
+        for i in range(rows)
+    ]
+
+
+def create_records(rows):
+    patient = Patient.objects.create(email='records-bench@example.com')
+    MedicalRecord.objects.bulk_create(
+        build_records(patient, rows),
+        batch_size=1000
+    )
+
+
+@register('record_serialization')
+def record_serialization(rows, repeat):
+    create_records(rows)
+    queryset = MedicalRecord.objects.order_by('-created_at', '-id')
+    results = {}
+
+    for name, serializer_class, client_type in VARIANTS:
+        request = make_api_request('/api/records/', client_type=client_type)
+        columns, build = FAST_FORMATS[name]
+
+        def serialize():
+            return serializer_class(
+                list(queryset.all()),
+                many=True,
+                context={'request': request}
+            ).data
+
+        def fast():
+            return build(raw_rows(queryset, columns))
+
+        model_timing = measure(serialize, repeat)
+        fast_timing = measure(fast, repeat)
+        results[name] = {
+            'rows': rows,
+            'identical_output': list(serialize()) == fast(),
+            'model_path': model_timing,
+            'fast_path': fast_timing,
+            'model_ms_per_1000': round(
+                model_timing['median_ms'] * 1000 / rows, 3
+            ),
+            'fast_ms_per_1000': round(
+                fast_timing['median_ms'] * 1000 / rows, 3
+            ),
+            'speedup': speedup(model_timing, fast_timing),
+        }
+
+    return results
+
+
+@register('record_search_index')
+def record_search_index(rows, repeat):
+    if connection.vendor not in INDEX_TEARDOWN:
+        return {'skipped': f'no search index on {connection.vendor}'}
+
+    patient = Patient.objects.create(email='search-bench@example.com')
+
+    def insert():
+        records = build_records(patient, rows)
+        for i, record in enumerate(records):
+            record.diagnosis = DIAGNOSES[i % len(DIAGNOSES)]
+            record.notes = f'Follow-up visit {i}; patient reports improvement'
+        MedicalRecord.objects.bulk_create(records, batch_size=1000)
+
+    indexed = measure(insert, repeat)
+    with connection.cursor() as cursor:
+        for sql in INDEX_TEARDOWN[connection.vendor]:
+            cursor.execute(sql)
+    unindexed = measure(insert, repeat)
+
+    return {
+        'rows': rows,
+        'with_index': indexed,
+        'without_index': unindexed,
+        'with_index_ms_per_1000': round(
+            indexed['median_ms'] * 1000 / rows, 3
+        ),
+        'without_index_ms_per_1000': round(
+            unindexed['median_ms'] * 1000 / rows, 3
+        ),
+        'insert_overhead': round(
+            indexed['median_ms'] / unindexed['median_ms'] - 1, 3
+        ) if unindexed['median_ms'] else None,
+    }
+
+
+API_IMPORT_LINES = 50
+
+
+def record_payload(patient_id, i):
+    return {
+        'patient': patient_id,
+        'record_type': 'prescription',
+        'diagnosis': f'Benchmark diagnosis {i}',
+        'treatment': f'Benchmark treatment {i}',
+        # `data` is the modern clinic name, `flexible_data` the mobile one.
+        'data': FLEXIBLE_DATA['prescription'],
+        'flexible_data': FLEXIBLE_DATA['prescription'],
+    }
+
+
+@register('record_api')
+def record_api(rows, repeat):
+    SyntheticDataGenerator(namespace='record-api-bench').generate(
+        max(1, rows // 10),
+        rows,
+        0
+    )
+    ids = list(
+        MedicalRecord.objects.order_by('id').values_list('id', flat=True)
+    )
+    patient_ids = list(
+        Patient.objects.order_by('id').values_list('id', flat=True)
+    )
+    requests = repeat * 10
+    results = {}
+
+    with api_benchmark_settings():
+        for client_type in CLIENT_TYPES:
+            for version in API_VERSIONS:
+                client = api_client(client_type, version)
+
+                def create(i):
+                    return client.post(
+                        '/api/records/',
+                        record_payload(patient_ids[i % len(patient_ids)], i),
+                        content_type='application/json'
+                    )
+
+                def bulk(i):
+                    lines = [
+                        json.dumps(record_payload(
+                            patient_ids[(i + line) % len(patient_ids)],
+                            line
+                        ))
+                        for line in range(API_IMPORT_LINES)
+                    ]
+                    return client.post(
+                        '/api/records/import/',
+                        '\n'.join(lines) + '\n',
+                        content_type='application/x-ndjson'
+                    )
+
+                results[f'{version}/{client_type}'] = {
+                    'rows': rows,
+                    'list': measure_requests(
+                        lambda i: client.get('/api/records/'),
+                        requests
+                    ),
+                    'retrieve': measure_requests(
+                        lambda i: client.get(
+                            f'/api/records/{ids[i % len(ids)]}/'
+                        ),
+                        requests
+                    ),
+                }
+                # Roll writes back so every variant reads the same rows.
+                with transaction.atomic():
+                    results[f'{version}/{client_type}'].update({
+                        'create': measure_requests(create, requests),
+                        'bulk': measure_requests(bulk, requests),
+                    })
+                    transaction.set_rollback(True)
+
+    return results
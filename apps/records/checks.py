@@ -0,0 +1,71 @@
+from django.core.checks import Error, Tags, register
+from django.db import connections, router
+from django.db.migrations.recorder import MigrationRecorder
+
+SEARCH_MIGRATION = ('records', '0005_record_search')
+
+# Created with raw SQL by SEARCH_MIGRATION, so nothing else recreates them.
+SEARCH_SCHEMA = {
+    'sqlite': (
+        'medical_records_fts',
+        'medical_records_fts_insert',
+        'medical_records_fts_delete',
+        'medical_records_fts_update',
+    ),
+    'postgresql': (
+        'search_vector',
+        'medical_records_search_idx',
+    ),
+}
+
+
+def missing_search_objects(connection):
+    """Names from ``SEARCH_SCHEMA`` that the database does not have."""
+    expected = SEARCH_SCHEMA.get(connection.vendor, ())
+    if not expected:
+        return []
+
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                "SELECT name FROM sqlite_master "
+                "WHERE type IN ('table', 'trigger')"
+            )
+            found = {name for name, in cursor.fetchall()}
+        else:
+            introspection = connection.introspection
+            found = {
+                column.name for column in
+                introspection.get_table_description(cursor, 'medical_records')
+            }
+            found.update(
+                introspection.get_constraints(cursor, 'medical_records')
+            )
+    return [name for name in expected if name not in found]
+
+
+@register(Tags.database)
+def check_search_schema(databases=None, **kwargs):
+    errors = []
+    for alias in databases or ():
+        # Replicas get their schema from the primary, not from migrate.
+        if not router.allow_migrate(alias, 'records'):
+            continue
+        connection = connections[alias]
+        recorder = MigrationRecorder(connection)
+        if (not recorder.has_table() or
+                SEARCH_MIGRATION not in recorder.applied_migrations()):
+            continue
+        missing = missing_search_objects(connection)
+        if missing:
+            errors.append(Error(
+                f'Record search objects are missing on database '
+                f'"{alias}": {", ".join(missing)}.',
+                hint=(
+                    'They are created with raw SQL by records migration '
+                    '0005_record_search. Run "migrate records 0004" and '
+                    'then "migrate records" to recreate them.'
+                ),
+                id='records.E001'
+            ))
+    return errors
@@ -0,0 +1,89 @@
+from datetime import datetime, time
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+
+from .models import FLEXIBLE_DATA_KEYS, FlexibleDataKey, MedicalRecord
+
+DATA_PREFIX = 'data.'
+RANGE_LOOKUPS = ('gt', 'gte', 'lt', 'lte')
+RECORD_TYPES = {value for value, _ in MedicalRecord.RECORD_TYPES}
+
+
+def parse_timestamp(name, value):
+    parsed = parse_datetime(value)
+    if parsed is None:
+        parsed_date = parse_date(value)
+        if parsed_date is not None:
+            parsed = datetime.combine(parsed_date, time.min)
+    if parsed is None:
+        raise ValidationError({name: ['Enter a valid date or datetime.']})
+
+    if settings.USE_TZ and timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def parse_data_filter(record_type, name, value):
+    key, _, lookup = name[len(DATA_PREFIX):].partition('__')
+    keys = FLEXIBLE_DATA_KEYS.get(record_type, {})
+    if key not in keys:
+        if record_type is None:
+            message = 'Filtering on data keys requires record_type.'
+        else:
+            message = f'"{key}" is not a filterable key for {record_type}.'
+        raise ValidationError({name: [message]})
+
+    path, kind = keys[key]
+    if kind == 'number':
+        if lookup and lookup not in RANGE_LOOKUPS:
+            raise ValidationError({name: [f'Unsupported lookup "{lookup}".']})
+        try:
+            value = float(value)
+        except ValueError:
+            raise ValidationError({name: ['A valid number is required.']})
+    elif lookup:
+        raise ValidationError({name: [f'Unsupported lookup "{lookup}".']})
+
+    return key, path, kind, lookup or 'exact', value
+
+
+def filter_records(queryset, params):
+    record_type = params.get('record_type') or None
+    if record_type is not None:
+        if record_type not in RECORD_TYPES:
+            raise ValidationError({
+                'record_type': [f'"{record_type}" is not a valid choice.'],
+            })
+        queryset = queryset.filter(record_type=record_type)
+
+    created_after = params.get('created_after')
+    if created_after:
+        queryset = queryset.filter(
+            created_at__gte=parse_timestamp('created_after', created_after)
+        )
+    created_before = params.get('created_before')
+    if created_before:
+        queryset = queryset.filter(
+            created_at__lt=parse_timestamp('created_before', created_before)
+        )
+
+    aliases = {}
+    lookups = {}
+    for name in params:
+        if not name.startswith(DATA_PREFIX):
+            continue
+        key, path, kind, lookup, value = parse_data_filter(
+            record_type,
+            name,
+            params.get(name)
+        )
+        alias = f'data_{key}'
+        aliases[alias] = FlexibleDataKey(path, kind)
+        lookups[f'{alias}__{lookup}'] = value
+
+    if aliases:
+        queryset = queryset.alias(**aliases).filter(**lookups)
+    return queryset
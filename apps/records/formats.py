@@ -0,0 +1,94 @@
+from django.conf import settings
+
+from apps.core.representation import datetime_converter
+
+FLEXIBLE_COLUMNS = (
+    'id',
+    'patient_id',
+    'record_type',
+    'created_at',
+    'diagnosis',
+    'treatment',
+    'notes',
+    'flexible_data',
+)
+
+LEGACY_COLUMNS = (
+    'id',
+    'patient_id',
+    'diagnosis',
+    'treatment',
+    'notes',
+    'created_at',
+)
+
+NO_DATA = {}
+
+
+def raw_rows(queryset, columns):
+    """Rows of ``columns`` as named tuples, for the ``*_format_rows``.
+
+    Named so pagination can read ``id`` and ``created_at`` off a row.
+    """
+    return queryset.values_list(*columns, named=True)
+
+
+def flexible_format_rows(rows):
+    # One dict display per row; the flexible data is unpacked into it
+    # rather than merged with a second update() pass.
+    items = []
+    append = items.append
+
+    for (pk, patient_id, record_type, created_at, diagnosis, treatment,
+         notes, flexible_data) in rows:
+        if record_type == 'general':
+            append({
+                'id': pk,
+                'patient_id': patient_id,
+                'record_type': record_type,
+                'created_at': created_at.isoformat(),
+                'diagnosis': diagnosis,
+                'treatment': treatment,
+                'notes': notes,
+                **(flexible_data or NO_DATA),
+            })
+        else:
+            append({
+                'id': pk,
+                'patient_id': patient_id,
+                'record_type': record_type,
+                'created_at': created_at.isoformat(),
+                **(flexible_data or NO_DATA),
+            })
+
+    return items
+
+
+def legacy_format_rows(rows):
+    convert = datetime_converter()
+    return [
+        {
+            'id': pk,
+            'patient': patient_id,
+            'diagnosis': diagnosis,
+            'treatment': treatment,
+            'notes': notes,
+            'created_at': convert(created_at) if created_at else None,
+        }
+        for pk, patient_id, diagnosis, treatment, notes, created_at in rows
+    ]
+
+
+FAST_FORMATS = {
+    'flexible': (FLEXIBLE_COLUMNS, flexible_format_rows),
+    'legacy': (LEGACY_COLUMNS, legacy_format_rows),
+}
+
+
+def get_fast_format(request):
+    client_type = getattr(request, 'client_type', None)
+    if client_type == settings.CLIENT_TYPES['MODERN_CLINIC']:
+        return 'flexible'
+    if client_type == settings.CLIENT_TYPES['LEGACY_HOSPITAL']:
+        return 'legacy'
+    return None
@@ -0,0 +1,206 @@
+import json
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from rest_framework import serializers
+
+from apps.patients.models import Patient
+from .models import MedicalRecord, RecordImport
+from .serializers import validate_record_data
+
+RECORD_TYPES = {value for value, _ in MedicalRecord.RECORD_TYPES}
+TEXT_FIELDS = ('diagnosis', 'treatment', 'notes')
+SKIP_CHUNK_SIZE = 1024 * 1024
+# Largest value a 64-bit primary key column holds.
+MAX_ID = 2 ** 63 - 1
+
+
+class RejectedLine(Exception):
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def iter_lines(stream, offset=0, max_line_bytes=None):
+    """Yield ``(end_offset, raw_line)`` pairs from a binary stream.
+
+    Lines longer than ``max_line_bytes`` are yielded as ``None`` so the
+    caller can reject them without holding the whole line in memory.
+    """
+    max_line_bytes = max_line_bytes or settings.RECORD_IMPORT_MAX_LINE_BYTES
+    _skip_to(stream, offset)
+
+    while True:
+        line = stream.readline(max_line_bytes + 1)
+        if not line:
+            return
+        offset += len(line)
+
+        if len(line) > max_line_bytes and not line.endswith(b'\n'):
+            while line and not line.endswith(b'\n'):
+                line = stream.readline(SKIP_CHUNK_SIZE)
+                offset += len(line)
+            yield offset, None
+            continue
+
+        yield offset, line
+
+
+def _skip_to(stream, offset):
+    if not offset:
+        return
+    if getattr(stream, 'seekable', lambda: False)():
+        stream.seek(offset)
+        return
+
+    remaining = offset
+    while remaining:
+        chunk = stream.read(min(remaining, SKIP_CHUNK_SIZE))
+        if not chunk:
+            return
+        remaining -= len(chunk)
+
+
+def parse_line(raw):
+    if raw is None:
+        raise RejectedLine({'non_field_errors': ['Line is too long.']})
+
+    try:
+        payload = json.loads(raw)
+    except ValueError as exc:
+        raise RejectedLine({'non_field_errors': [f'Invalid JSON: {exc}']})
+
+    if not isinstance(payload, dict):
+        raise RejectedLine({'non_field_errors': ['Expected an object.']})
+
+    errors = {}
+    patient_id = payload.get('patient')
+    if isinstance(patient_id, str) and patient_id.isdigit():
+        patient_id = int(patient_id)
+    if (isinstance(patient_id, bool) or not isinstance(patient_id, int) or
+            not 1 <= patient_id <= MAX_ID):
+        errors['patient'] = ['A valid patient id is required.']
+
+    record_type = payload.get('record_type', 'general')
+    if not isinstance(record_type, str) or record_type not in RECORD_TYPES:
+        errors['record_type'] = [f'"{record_type}" is not a valid choice.']
+
+    flexible_data = payload.get('data') or {}
+    if not isinstance(flexible_data, dict):
+        errors['data'] = ['Expected an object.']
+
+    values = {}
+    for field in TEXT_FIELDS:
+        value = payload.get(field, '')
+        if not isinstance(value, str):
+            errors[field] = ['Not a valid string.']
+        values[field] = value
+
+    if not errors:
+        try:
+            validate_record_data(record_type, flexible_data)
+        except serializers.ValidationError as exc:
+            errors = serializers.as_serializer_error(exc)
+
+    if errors:
+        raise RejectedLine(errors)
+
+    return MedicalRecord(
+        patient_id=patient_id,
+        record_type=record_type,
+        flexible_data=flexible_data,
+        **values
+    )
+
+
+class RecordImporter:
+    def __init__(self, source, batch_size=None, created_by='',
+                 on_reject=None, on_chunk=None):
+        self.source = source
+        self.batch_size = batch_size or settings.RECORD_IMPORT_BATCH_SIZE
+        self.created_by = created_by
+        self.on_reject = on_reject
+        self.on_chunk = on_chunk
+
+    def run(self, stream, restart=False):
+        state, _ = RecordImport.objects.get_or_create(source=self.source)
+        if restart:
+            state.offset = state.lines = state.imported = state.rejected = 0
+            state.save()
+
+        self.state = state
+        self.imported = 0
+        self.rejected = 0
+
+        line_number = self.flushed_lines = state.lines
+        records = []
+        rejects = []
+
+        for end_offset, raw in iter_lines(stream, state.offset):
+            line_number += 1
+            if raw is not None and not raw.strip():
+                continue
+
+            try:
+                record = parse_line(raw)
+            except RejectedLine as exc:
+                rejects.append(self._reject(line_number, raw, exc.errors))
+            else:
+                record.created_by = self.created_by
+                records.append((line_number, raw, record))
+
+            if len(records) + len(rejects) >= self.batch_size:
+                self._flush(records, rejects, end_offset, line_number)
+                records, rejects = [], []
+
+        if line_number != self.flushed_lines:
+            self._flush(records, rejects, end_offset, line_number)
+
+        state.refresh_from_db()
+        return state
+
+    def _flush(self, records, rejects, end_offset, line_number):
+        known = set()
+        if records:
+            known.update(
+                Patient.objects.filter(
+                    id__in={record.patient_id for _, _, record in records}
+                ).order_by().values_list('id', flat=True)
+            )
+
+        accepted = []
+        for number, raw, record in records:
+            if record.patient_id in known:
+                accepted.append(record)
+                continue
+            rejects.append(self._reject(number, raw, {
+                'patient': [
+                    f'Invalid pk "{record.patient_id}" - '
+                    f'object does not exist.'
+                ],
+            }))
+        rejects.sort(key=lambda reject: reject['line'])
+
+        with transaction.atomic():
+            MedicalRecord.objects.bulk_create(accepted)
+            RecordImport.objects.filter(pk=self.state.pk).update(
+                offset=end_offset,
+                lines=line_number,
+                imported=F('imported') + len(accepted),
+                rejected=F('rejected') + len(rejects)
+            )
+            if self.on_reject is not None:
+                for reject in rejects:
+                    self.on_reject(reject)
+
+        self.flushed_lines = line_number
+        self.imported += len(accepted)
+        self.rejected += len(rejects)
+        if self.on_chunk is not None:
+            self.on_chunk(self, end_offset)
+
+    def _reject(self, line_number, raw, errors):
+        if raw is not None:
+            raw = raw.decode('utf-8', 'replace').rstrip('\r\n')
+        return {'line': line_number, 'errors': errors, 'raw': raw}
@@ -0,0 +1,89 @@
+import json
+import os
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from apps.records.importer import RecordImporter
+
+
+class Command(BaseCommand):
+    help = 'Import medical records from an NDJSON file'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='NDJSON file to import, or - to read standard input'
+        )
+        parser.add_argument(
+            '--source',
+            help='Name the import is tracked under (defaults to the path)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Lines written per transaction'
+        )
+        parser.add_argument(
+            '--rejects-file',
+            default='import_records.rejects.ndjson',
+            help='File rejected lines are appended to'
+        )
+        parser.add_argument(
+            '--created-by',
+            default='import',
+            help='Value stored in created_by for imported records'
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Ignore the saved offset and import from the beginning'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if path == '-':
+            source = options['source'] or 'stdin'
+        else:
+            if not os.path.exists(path):
+                raise CommandError(f'{path} does not exist')
+            source = options['source'] or os.path.abspath(path)
+
+        self.started = time.monotonic()
+        with open(options['rejects_file'], 'a') as rejects:
+            importer = RecordImporter(
+                source,
+                batch_size=options['batch_size'],
+                created_by=options['created_by'],
+                on_reject=lambda reject: self.write_reject(rejects, reject),
+                on_chunk=self.report_progress
+            )
+
+            if path == '-':
+                state = importer.run(sys.stdin.buffer, options['restart'])
+            else:
+                with open(path, 'rb') as stream:
+                    state = importer.run(stream, options['restart'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {importer.imported} records, rejected '
+            f'{importer.rejected} lines ({state.imported} imported and '
+            f'{state.rejected} rejected in total for {source})'
+        ))
+        if importer.rejected:
+            self.stdout.write(self.style.WARNING(
+                f'Rejected lines written to {options["rejects_file"]}'
+            ))
+
+    def write_reject(self, rejects, reject):
+        rejects.write(json.dumps(reject) + '\n')
+        rejects.flush()
+
+    def report_progress(self, importer, offset):
+        elapsed = time.monotonic() - self.started
+        rate = importer.imported / elapsed if elapsed > 0 else 0
+        self.stdout.write(
+            f'Imported {importer.imported}, rejected {importer.rejected} '
+            f'(offset {offset}, {rate:.0f} records/s)'
+        )
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('records', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='medicalrecord',
+            name='medical_rec_created_d796b8_idx',
+        ),
+        migrations.AddIndex(
+            model_name='medicalrecord',
+            index=models.Index(fields=['created_at', 'id'], name='medical_rec_created_1e3bfa_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:22
+
+import apps.records.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('records', '0003_record_imports'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='medicalrecord',
+            index=models.Index(apps.records.models.FlexibleDataKey('test_name', 'text'), models.F('created_at'), condition=models.Q(('record_type', 'lab_result')), name='rec_test_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='medicalrecord',
+            index=models.Index(apps.records.models.FlexibleDataKey('results__value', 'number'), models.F('created_at'), condition=models.Q(('record_type', 'lab_result')), name='rec_result_value_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='medicalrecord',
+            index=models.Index(apps.records.models.FlexibleDataKey('medication', 'text'), models.F('created_at'), condition=models.Q(('record_type', 'prescription')), name='rec_medication_idx'),
+        ),
+    ]
@@ -0,0 +1,96 @@
+from django.db import migrations
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE medical_records_fts USING fts5(
+        diagnosis,
+        treatment,
+        notes,
+        content='medical_records',
+        content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER medical_records_fts_insert AFTER INSERT ON medical_records
+    BEGIN
+        INSERT INTO medical_records_fts(rowid, diagnosis, treatment, notes)
+        VALUES (new.id, new.diagnosis, new.treatment, new.notes);
+    END
+    """,
+    """
+    CREATE TRIGGER medical_records_fts_delete AFTER DELETE ON medical_records
+    BEGIN
+        INSERT INTO medical_records_fts(
+            medical_records_fts, rowid, diagnosis, treatment, notes
+        )
+        VALUES ('delete', old.id, old.diagnosis, old.treatment, old.notes);
+    END
+    """,
+    """
+    CREATE TRIGGER medical_records_fts_update
+    AFTER UPDATE OF diagnosis, treatment, notes ON medical_records
+    BEGIN
+        INSERT INTO medical_records_fts(
+            medical_records_fts, rowid, diagnosis, treatment, notes
+        )
+        VALUES ('delete', old.id, old.diagnosis, old.treatment, old.notes);
+        INSERT INTO medical_records_fts(rowid, diagnosis, treatment, notes)
+        VALUES (new.id, new.diagnosis, new.treatment, new.notes);
+    END
+    """,
+    "INSERT INTO medical_records_fts(medical_records_fts) VALUES ('rebuild')",
+]
+
+SQLITE_REVERSE = [
+    'DROP TRIGGER IF EXISTS medical_records_fts_update',
+    'DROP TRIGGER IF EXISTS medical_records_fts_delete',
+    'DROP TRIGGER IF EXISTS medical_records_fts_insert',
+    'DROP TABLE IF EXISTS medical_records_fts',
+]
+
+POSTGRESQL_FORWARD = [
+    """
+    ALTER TABLE medical_records ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(diagnosis, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(treatment, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(notes, '')), 'C')
+    ) STORED
+    """,
+    """
+    CREATE INDEX medical_records_search_idx
+    ON medical_records USING GIN (search_vector)
+    """,
+]
+
+POSTGRESQL_REVERSE = [
+    'DROP INDEX IF EXISTS medical_records_search_idx',
+    'ALTER TABLE medical_records DROP COLUMN IF EXISTS search_vector',
+]
+
+STATEMENTS = {
+    'sqlite': (SQLITE_FORWARD, SQLITE_REVERSE),
+    'postgresql': (POSTGRESQL_FORWARD, POSTGRESQL_REVERSE),
+}
+
+
+def run_statements(direction):
+    def run(apps, schema_editor):
+        statements = STATEMENTS.get(schema_editor.connection.vendor)
+        if statements is None:
+            return
+        for sql in statements[direction]:
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('records', '0004_flexible_data_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_statements(0), run_statements(1)),
+    ]
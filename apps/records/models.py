@@ -1,7 +1,89 @@
 from django.db import models
+from django.db.models import F, FloatField, Func, Q, TextField
+from django.db.models.fields.json import KT
+from django.db.models.functions import Cast
 from apps.patients.models import Patient
 
+FLEXIBLE_DATA_KEYS = {
+    'lab_result': {
+        'test_name': ('test_name', 'text'),
+        'result_value': ('results__value', 'number'),
+    },
+    'prescription': {
+        'medication': ('medication', 'text'),
+    },
+}
 
+
+class FlexibleDataKey(Func):
+    """Extract a whitelisted ``flexible_data`` key with stable SQL.
+
+    The path is rendered inline rather than as a parameter so the same
+    expression in a query matches the expression index it was declared
+    with.
+    """
+
+    def __init__(self, path, kind):
+        self.path = path
+        self.kind = kind
+        output_field = FloatField() if kind == 'number' else TextField()
+        super().__init__(F('flexible_data'), output_field=output_field)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        expression = KT(f'flexible_data__{self.path}')
+        if self.kind == 'number':
+            expression = Cast(expression, FloatField())
+        return compiler.compile(expression)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        json_path = "'$." + '.'.join(self.path.split('__')) + "'"
+        value = f'JSON_EXTRACT(%(expressions)s, {json_path})'
+        if self.kind == 'number':
+            value = (
+                f'CASE WHEN JSON_TYPE(%(expressions)s, {json_path}) '
+                f"IN ('integer', 'real') THEN {value} END"
+            )
+        return super().as_sql(
+            compiler,
+            connection,
+            template=value,
+            **extra_context
+        )
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        json_path = "'{" + ','.join(self.path.split('__')) + "}'"
+        value = f'(%(expressions)s #>> {json_path})'
+        if self.kind == 'number':
+            value = (
+                f'CASE WHEN jsonb_typeof(%(expressions)s #> {json_path}) '
+                f"= 'number' THEN {value}::double precision END"
+            )
+        return super().as_sql(
+            compiler,
+            connection,
+            template=value,
+            **extra_context
+        )
+
+
+def flexible_data_indexes():
+    return [
+        models.Index(
+            FlexibleDataKey(path, kind),
+            F('created_at'),
+            condition=Q(record_type=record_type),
+            name=f'rec_{key}_idx'
+        )
+        for record_type, keys in FLEXIBLE_DATA_KEYS.items()
+        for key, (path, kind) in keys.items()
+    ]
+
+
+# Full-text search is not declared here: migration 0005_record_search
+# creates the FTS5 table and triggers (SQLite) or the generated
+# search_vector column and its GIN index (PostgreSQL) with raw SQL.
+# Django will not recreate them, so check records.E001 reports them
+# missing.
 class MedicalRecord(models.Model):
     RECORD_TYPES = [
         ('general', 'General'),
@@ -36,7 +118,9 @@ class MedicalRecord(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['patient', 'record_type']),
-            models.Index(fields=['created_at']),
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['updated_at', 'id']),
+            *flexible_data_indexes(),
         ]
 
     def get_legacy_format(self):
@@ -65,4 +149,17 @@ class MedicalRecord(models.Model):
             })
         
         base.update(self.flexible_data)
-        return base
\ No newline at end of file
+        return base
+
+
+class RecordImport(models.Model):
+    source = models.CharField(max_length=255, unique=True)
+    offset = models.BigIntegerField(default=0)
+    lines = models.BigIntegerField(default=0)
+    imported = models.BigIntegerField(default=0)
+    rejected = models.BigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'record_imports'
@@ -0,0 +1,147 @@
+import base64
+import binascii
+import re
+
+from django.db import DEFAULT_DB_ALIAS, NotSupportedError, connections
+from rest_framework.exceptions import NotFound
+
+from apps.core.pagination import KeysetPagination
+
+TERM_PATTERN = re.compile(r'(\w+)(\*?)', re.UNICODE)
+MAX_TERMS = 16
+
+# bm25 weights for diagnosis, treatment and notes; lower ranks are better.
+SQLITE_SEARCH = """
+    SELECT id, rank FROM (
+        SELECT medical_records.id AS id,
+               bm25(medical_records_fts, 10.0, 5.0, 1.0) AS rank
+        FROM medical_records_fts
+        JOIN medical_records ON medical_records.id = medical_records_fts.rowid
+        WHERE medical_records_fts MATCH %s{scope}
+    ) AS matches
+    {after}
+    ORDER BY rank, id
+    LIMIT %s
+"""
+
+# ts_rank_cd is negated so both backends order ascending.
+POSTGRESQL_SEARCH = """
+    SELECT id, rank FROM (
+        SELECT medical_records.id AS id,
+               -ts_rank_cd(medical_records.search_vector, query) AS rank
+        FROM medical_records, to_tsquery('english', %s) AS query
+        WHERE medical_records.search_vector @@ query{scope}
+    ) AS matches
+    {after}
+    ORDER BY rank, id
+    LIMIT %s
+"""
+
+
+def parse_terms(query):
+    return [
+        (term.lower(), bool(prefix))
+        for term, prefix in TERM_PATTERN.findall(query or '')
+    ][:MAX_TERMS]
+
+
+def sqlite_match(terms):
+    return ' '.join(
+        f'"{term}"*' if prefix else f'"{term}"'
+        for term, prefix in terms
+    )
+
+
+def postgresql_match(terms):
+    return ' & '.join(
+        f'{term}:*' if prefix else term
+        for term, prefix in terms
+    )
+
+
+# Drops the search index inside the current transaction so benchmarks can
+# measure inserts without it; the migration owns the real schema.
+INDEX_TEARDOWN = {
+    'sqlite': [
+        'DROP TRIGGER medical_records_fts_update',
+        'DROP TRIGGER medical_records_fts_delete',
+        'DROP TRIGGER medical_records_fts_insert',
+    ],
+    'postgresql': [
+        'DROP INDEX medical_records_search_idx',
+        'ALTER TABLE medical_records DROP COLUMN search_vector',
+    ],
+}
+
+BACKENDS = {
+    'sqlite': (SQLITE_SEARCH, sqlite_match),
+    'postgresql': (POSTGRESQL_SEARCH, postgresql_match),
+}
+
+
+def search_records(terms, limit, patient_id=None, record_type=None,
+                   after=None, using=None):
+    """Return ``(id, rank)`` pairs for records matching every term.
+
+    Results are ordered best match first; ``after`` is the ``(rank, id)``
+    of the last row of the previous page.
+    """
+    conn = connections[using or DEFAULT_DB_ALIAS]
+    if conn.vendor not in BACKENDS:
+        raise NotSupportedError(
+            f'Record search is not available on {conn.vendor}'
+        )
+    template, build_match = BACKENDS[conn.vendor]
+
+    params = [build_match(terms)]
+    scope = ''
+    if patient_id is not None:
+        scope += ' AND medical_records.patient_id = %s'
+        params.append(patient_id)
+    if record_type is not None:
+        scope += ' AND medical_records.record_type = %s'
+        params.append(record_type)
+
+    after_sql = ''
+    if after is not None:
+        after_sql = 'WHERE rank > %s OR (rank = %s AND id > %s)'
+        params.extend([after[0], after[0], after[1]])
+    params.append(limit)
+
+    sql = template.format(scope=scope, after=after_sql)
+    with conn.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+class SearchPagination(KeysetPagination):
+    """Cursor pagination over ``(id, rank)`` search matches, best first."""
+
+    def paginate_matches(self, search, request):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+
+        matches = search(self.page_size + 1, self.decode_cursor(request))
+        self.has_next = len(matches) > self.page_size
+        self.has_previous = False
+        self.page = matches[:self.page_size]
+        return self.page
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            raw = base64.urlsafe_b64decode(padded.encode('ascii'))
+            rank, pk = raw.decode('ascii').split('|')
+            return float(rank), int(pk)
+        except (TypeError, ValueError, UnicodeError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, direction, match):
+        pk, rank = match
+        encoded = base64.urlsafe_b64encode(f'{rank!r}|{pk}'.encode('ascii'))
+        return encoded.decode('ascii').rstrip('=')
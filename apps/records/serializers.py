@@ -1,7 +1,23 @@
 from rest_framework import serializers
 from django.conf import settings
+from apps.core.fields import filter_serializer_fields, get_requested_fields
 from .models import MedicalRecord
 
+REQUIRED_DATA_KEYS = {
+    'lab_result': ('test_name', 'test_name is required for lab results'),
+    'prescription': ('medication', 'medication is required for prescriptions'),
+}
+
+
+def validate_record_data(record_type, flexible_data):
+    rule = REQUIRED_DATA_KEYS.get(record_type)
+    if rule is None:
+        return
+
+    key, message = rule
+    if not (flexible_data or {}).get(key):
+        raise serializers.ValidationError({'data': message})
+
 
 class MedicalRecordLegacySerializer(serializers.ModelSerializer):
     class Meta:
@@ -34,22 +50,10 @@ class MedicalRecordFlexibleSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
     def validate(self, data):
-        record_type = data.get('record_type', 'general')
-        
-        if record_type == 'lab_result':
-            flexible_data = data.get('flexible_data', {})
-            if not flexible_data.get('test_name'):
-                raise serializers.ValidationError(
-                    {'data': 'test_name is required for lab results'}
-                )
-        
-        elif record_type == 'prescription':
-            flexible_data = data.get('flexible_data', {})
-            if not flexible_data.get('medication'):
-                raise serializers.ValidationError(
-                    {'data': 'medication is required for prescriptions'}
-                )
-        
+        validate_record_data(
+            data.get('record_type', 'general'),
+            data.get('flexible_data', {})
+        )
         return data
 
     def to_representation(self, instance):
@@ -68,6 +72,11 @@ class MedicalRecordSerializer(serializers.ModelSerializer):
         model = MedicalRecord
         fields = '__all__'
 
+    def get_fields(self):
+        fields = super().get_fields()
+        requested = get_requested_fields(self.context.get('request'))
+        return filter_serializer_fields(fields, requested)
+
     def __new__(cls, *args, **kwargs):
         context = kwargs.get('context', {})
         request = context.get('request')
@@ -80,4 +89,4 @@ class MedicalRecordSerializer(serializers.ModelSerializer):
             elif client_type == settings.CLIENT_TYPES['MODERN_CLINIC']:
                 return MedicalRecordFlexibleSerializer(*args, **kwargs)
         
-        return super().__new__(cls)
\ No newline at end of file
+        return super().__new__(cls, *args, **kwargs)
\ No newline at end of file
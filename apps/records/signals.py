@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.core.response_cache import response_cache
+from apps.patients.models import Patient
+from .models import MedicalRecord
+
+
+@receiver([post_save, post_delete], sender=MedicalRecord)
+def invalidate_record_responses(sender, instance, **kwargs):
+    response_cache.invalidate(MedicalRecord, instance.pk)
+    response_cache.invalidate(Patient, instance.patient_id)
@@ -1,22 +1,55 @@
+import uuid
+
+from django.conf import settings
+from django.db import router
 from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
+from apps.core.conditional import ConditionalGetMixin
+from apps.core.fields import FieldSelectionMixin
 from apps.core.permissions import RoleBasedPermission
+from apps.core.response_cache import response_cache
+from apps.core.streaming import StreamingListMixin
+from apps.core.timing import TimedViewMixin, phase
+from .filters import RECORD_TYPES, filter_records
+from .formats import FAST_FORMATS, get_fast_format, raw_rows
+from .importer import RecordImporter
 from .models import MedicalRecord
+from .search import SearchPagination, parse_terms, search_records
 from .serializers import MedicalRecordSerializer
 
 
-class MedicalRecordViewSet(viewsets.ModelViewSet):
+class MedicalRecordViewSet(TimedViewMixin, ConditionalGetMixin,
+                           FieldSelectionMixin, StreamingListMixin,
+                           viewsets.ModelViewSet):
     queryset = MedicalRecord.objects.all()
     serializer_class = MedicalRecordSerializer
     permission_classes = [RoleBasedPermission]
+    use_read_replicas = True
+    # Includes a cold client config load and session authentication.
+    query_budgets = {
+        'list': 5,
+        'retrieve': 4,
+        'search': 5,
+    }
 
     def get_queryset(self):
         queryset = super().get_queryset()
         patient_id = self.request.query_params.get('patient_id')
         if patient_id:
             queryset = queryset.filter(patient_id=patient_id)
+        if self.action == 'list':
+            queryset = filter_records(queryset, self.request.query_params)
         return queryset
 
+    def serialize_list(self, objects):
+        fast_format = get_fast_format(self.request)
+        if fast_format is None:
+            return super().serialize_list(objects)
+        with phase('serialize'):
+            return FAST_FORMATS[fast_format][1](objects)
+
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(
             data=request.data,
@@ -31,29 +64,117 @@ class MedicalRecordViewSet(viewsets.ModelViewSet):
             headers=headers
         )
 
+    @action(detail=False, methods=['post'], url_path='import')
+    def import_records(self, request, *args, **kwargs):
+        stream = request.stream
+        if stream is None:
+            return Response(
+                {'detail': 'Expected an NDJSON request body.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        source = request.query_params.get('source') or uuid.uuid4().hex
+        restart = request.query_params.get('restart') == 'true'
+        max_reported = settings.RECORD_IMPORT_MAX_REPORTED_REJECTS
+        rejects = []
+
+        def collect(reject):
+            if len(rejects) < max_reported:
+                rejects.append(reject)
+
+        importer = RecordImporter(
+            f'api:{source}',
+            created_by=getattr(request, 'client_id', ''),
+            on_reject=collect
+        )
+        state = importer.run(stream, restart)
+
+        return Response({
+            'source': source,
+            'imported': importer.imported,
+            'rejected': importer.rejected,
+            'offset': state.offset,
+            'lines': state.lines,
+            'rejects': rejects,
+        })
+
+    @action(detail=False, methods=['get'], url_path='search')
+    def search(self, request, *args, **kwargs):
+        terms = parse_terms(request.query_params.get('q'))
+        if not terms:
+            raise ValidationError({'q': ['Enter at least one search term.']})
+
+        patient_id = request.query_params.get('patient_id') or None
+        if patient_id is not None and not patient_id.isdigit():
+            raise ValidationError({
+                'patient_id': ['A valid integer is required.'],
+            })
+        record_type = request.query_params.get('record_type') or None
+        if record_type is not None and record_type not in RECORD_TYPES:
+            raise ValidationError({
+                'record_type': [f'"{record_type}" is not a valid choice.'],
+            })
+
+        paginator = SearchPagination()
+        matches = paginator.paginate_matches(
+            lambda limit, after: search_records(
+                terms,
+                limit,
+                patient_id=patient_id and int(patient_id),
+                record_type=record_type,
+                after=after,
+                using=router.db_for_read(MedicalRecord)
+            ),
+            request
+        )
+
+        positions = {pk: index for index, (pk, _) in enumerate(matches)}
+        queryset = MedicalRecord.objects.filter(id__in=positions)
+        fast_format = get_fast_format(request)
+        if fast_format is not None:
+            queryset = raw_rows(queryset, FAST_FORMATS[fast_format][0])
+        objects = sorted(queryset, key=lambda obj: positions[obj.id])
+
+        return paginator.get_paginated_response(self.serialize_list(objects))
+
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
-        serializer = self.get_serializer(
-            instance,
-            context={'request': request}
-        )
-        return Response(serializer.data)
+        etag = self.get_object_etag(instance)
+        not_modified = self.not_modified_response(etag)
+        if not_modified is not None:
+            return not_modified
+
+        with phase('serialize'):
+            data = response_cache.get_or_serialize(
+                instance,
+                etag,
+                lambda: self.get_serializer(
+                    instance,
+                    context={'request': request}
+                ).data
+            )
+        return Response(data)
 
     def list(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
+        stream = self.should_stream_list(request)
+        not_modified = self.not_modified_response(
+            self.get_list_etag(queryset, paginated=not stream)
+        )
+        if not_modified is not None:
+            return not_modified
+
+        fast_format = get_fast_format(request)
+        if fast_format is not None:
+            columns = FAST_FORMATS[fast_format][0]
+            queryset = raw_rows(queryset, columns)
+
+        if stream:
+            return self.stream_list(queryset)
+
         page = self.paginate_queryset(queryset)
-        
+
         if page is not None:
-            serializer = self.get_serializer(
-                page,
-                many=True,
-                context={'request': request}
-            )
-            return self.get_paginated_response(serializer.data)
+            return self.get_paginated_response(self.serialize_list(page))
 
-        serializer = self.get_serializer(
-            queryset,
-            many=True,
-            context={'request': request}
-        )
-        return Response(serializer.data)
\ No newline at end of file
+        return Response(self.serialize_list(queryset))
\ No newline at end of file
@@ -0,0 +1,46 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Min, Q
+from django.utils import timezone
+
+from .models import SyncLineage, Tombstone
+
+
+def compact_tombstones(max_age_days=None, now=None, unresumed_hours=None):
+    """Delete tombstones every live sync lineage has already passed.
+
+    Lineages not seen for ``max_age_days``, or never resumed within
+    ``unresumed_hours``, are abandoned first; their tokens are answered
+    with 410 Gone. New syncs start their tombstone cursor at the settle
+    horizon, so with no lineages left everything before it goes.
+    """
+    if max_age_days is None:
+        max_age_days = settings.SYNC_TOKEN_MAX_AGE_DAYS
+    if unresumed_hours is None:
+        unresumed_hours = settings.SYNC_UNRESUMED_LINEAGE_HOURS
+    now = now or timezone.now()
+    horizon = now - timedelta(seconds=settings.SYNC_SETTLE_SECONDS)
+
+    with transaction.atomic():
+        abandoned, _ = SyncLineage.objects.filter(
+            Q(last_seen__lt=now - timedelta(days=max_age_days)) |
+            Q(
+                last_seen__isnull=True,
+                created_at__lt=now - timedelta(hours=unresumed_hours)
+            )
+        ).delete()
+        oldest = SyncLineage.objects.aggregate(
+            oldest=Min('position_at')
+        )['oldest']
+        watermark = horizon if oldest is None else min(oldest, horizon)
+        compacted, _ = Tombstone.objects.filter(
+            deleted_at__lt=watermark
+        ).delete()
+
+    return {
+        'lineages_expired': abandoned,
+        'tombstones_deleted': compacted,
+        'watermark': watermark,
+    }
@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.sync.compaction import compact_tombstones
+
+
+class Command(BaseCommand):
+    help = 'Delete sync tombstones that every live sync token has passed'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-age-days',
+            type=int,
+            default=settings.SYNC_TOKEN_MAX_AGE_DAYS,
+            help='Abandon sync lineages not seen for this many days'
+        )
+        parser.add_argument(
+            '--unresumed-hours',
+            type=int,
+            default=settings.SYNC_UNRESUMED_LINEAGE_HOURS,
+            help='Abandon sync lineages never resumed for this many hours'
+        )
+
+    def handle(self, *args, **options):
+        if options['max_age_days'] < 1:
+            raise CommandError('--max-age-days must be positive.')
+        if options['unresumed_hours'] < 1:
+            raise CommandError('--unresumed-hours must be positive.')
+
+        result = compact_tombstones(
+            options['max_age_days'],
+            unresumed_hours=options['unresumed_hours']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {result["tombstones_deleted"]} tombstones before '
+            f'{result["watermark"].isoformat()}; expired '
+            f'{result["lineages_expired"]} sync lineages'
+        ))
@@ -0,0 +1,41 @@
+import uuid
+
+from django.db import models
+from django.utils import timezone
+
+
+class Tombstone(models.Model):
+    RESOURCE_TYPES = [
+        ('patients', 'Patient'),
+        ('records', 'Medical record'),
+    ]
+
+    resource_type = models.CharField(max_length=20, choices=RESOURCE_TYPES)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'sync_tombstones'
+        indexes = [
+            models.Index(fields=['deleted_at', 'id']),
+        ]
+
+
+class SyncLineage(models.Model):
+    """One chain of sync tokens, usually one device.
+
+    ``position`` is the tombstone cursor of the newest token presented.
+    Tombstones before every live lineage's position are compacted.
+    ``last_seen`` stays empty until one of the lineage's tokens is
+    resumed, so lineages that never come back can be expired early.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4)
+    client_id = models.CharField(max_length=100, blank=True)
+    position_at = models.DateTimeField()
+    position_id = models.BigIntegerField(null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_seen = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    class Meta:
+        db_table = 'sync_lineages'
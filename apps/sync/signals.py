@@ -0,0 +1,21 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from apps.patients.models import Patient
+from apps.records.models import MedicalRecord
+from .models import Tombstone
+
+RESOURCE_TYPES = {
+    Patient: 'patients',
+    MedicalRecord: 'records',
+}
+
+
+@receiver(post_delete, sender=Patient)
+@receiver(post_delete, sender=MedicalRecord)
+def record_tombstone(sender, instance, **kwargs):
+    # Cascades send post_delete per record, so their deletes are kept too.
+    Tombstone.objects.create(
+        resource_type=RESOURCE_TYPES[sender],
+        object_id=instance.pk
+    )
@@ -0,0 +1,166 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from apps.core.fields import (
+    FieldSelectionMixin,
+    get_requested_fields,
+    projected_columns,
+)
+from apps.core.permissions import RoleBasedPermission
+from apps.core.timing import TimedViewMixin, phase
+from apps.patients.models import Patient
+from apps.patients.plans import get_plan
+from apps.patients.serializers import serializer_class_for_version
+from apps.patients.views import PatientViewSet
+from apps.records.models import MedicalRecord
+from apps.records.serializers import MedicalRecordSerializer
+from apps.records.views import MedicalRecordViewSet
+from .models import SyncLineage, Tombstone
+from .tokens import (
+    ExpiredToken,
+    InvalidToken,
+    cursor_key,
+    decode_token,
+    encode_token,
+    read_stream,
+)
+
+
+class SyncTokenGone(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = 'Sync token is no longer valid; sync without a token.'
+    default_code = 'sync_token_gone'
+
+
+class SyncView(TimedViewMixin, APIView):
+    """Everything changed since a sync token, oldest change first.
+
+    Without a token the first pages hold every patient and record.
+    Apply ``deleted`` after the upserts of the same page, and keep
+    requesting with ``next_token`` while ``has_more`` is true.
+    """
+
+    permission_classes = [RoleBasedPermission]
+    # Includes a cold client config load and session authentication.
+    query_budgets = {'get': 7}
+
+    def get(self, request, *args, **kwargs):
+        now = timezone.now()
+        horizon = now - timedelta(seconds=settings.SYNC_SETTLE_SECONDS)
+        limit = self.get_page_size(request)
+
+        token = request.query_params.get('token')
+        if token:
+            lineage_id, cursors = self.resume(token, now)
+        else:
+            lineage_id = SyncLineage.objects.create(
+                client_id=getattr(request, 'client_id', ''),
+                position_at=horizon
+            ).pk
+            cursors = {
+                'patients': None,
+                'records': None,
+                'tombstones': (horizon, None),
+            }
+
+        streams = {
+            'patients': (self.patient_queryset(request), 'updated_at'),
+            'records': (self.record_queryset(request), 'updated_at'),
+            'tombstones': (Tombstone.objects.all(), 'deleted_at'),
+        }
+        rows = {}
+        has_more = False
+        for name, (queryset, field) in streams.items():
+            rows[name], cursors[name], more = read_stream(
+                queryset, field, cursors[name], horizon, limit
+            )
+            has_more = has_more or more
+
+        deleted = {'patients': [], 'records': []}
+        for tombstone in rows['tombstones']:
+            deleted[tombstone.resource_type].append(tombstone.object_id)
+
+        with phase('serialize'):
+            plan = get_plan(
+                serializer_class_for_version(request.version),
+                request
+            )
+            data = {
+                'patients': [plan(patient) for patient in rows['patients']],
+                'records': MedicalRecordSerializer(
+                    rows['records'],
+                    many=True,
+                    context={'request': request}
+                ).data,
+                'deleted': deleted,
+                'has_more': has_more,
+                'next_token': encode_token(lineage_id, cursors),
+            }
+        return Response(data)
+
+    def resume(self, token, now):
+        try:
+            lineage_id, cursors = decode_token(token)
+        except ExpiredToken as exc:
+            raise SyncTokenGone(str(exc))
+        except InvalidToken as exc:
+            raise ValidationError({'token': [str(exc)]})
+
+        lineage = SyncLineage.objects.filter(pk=lineage_id).first()
+        if lineage is None:
+            raise SyncTokenGone()
+
+        # Tombstones before the lineage position may be compacted, so a
+        # token older than the newest one presented cannot be resumed.
+        position = (lineage.position_at, lineage.position_id)
+        if cursor_key(cursors['tombstones']) < cursor_key(position):
+            raise SyncTokenGone()
+
+        timestamp, pk = cursors['tombstones']
+        SyncLineage.objects.filter(pk=lineage_id).update(
+            position_at=timestamp,
+            position_id=pk,
+            last_seen=now
+        )
+        return lineage_id, cursors
+
+    def get_page_size(self, request):
+        page_size = settings.SYNC_PAGE_SIZE
+        try:
+            page_size = int(request.query_params.get('page_size', page_size))
+        except (TypeError, ValueError):
+            return settings.SYNC_PAGE_SIZE
+
+        if page_size <= 0:
+            return settings.SYNC_PAGE_SIZE
+        return min(page_size, settings.SYNC_MAX_PAGE_SIZE)
+
+    def patient_queryset(self, request):
+        return self.project(
+            request,
+            Patient.objects.all(),
+            PatientViewSet.field_selection_sources
+        )
+
+    def record_queryset(self, request):
+        return self.project(
+            request,
+            MedicalRecord.objects.all(),
+            MedicalRecordViewSet.field_selection_sources
+        )
+
+    def project(self, request, queryset, sources):
+        requested = get_requested_fields(request)
+        if requested is None:
+            return queryset
+        return queryset.only(*projected_columns(
+            queryset.model,
+            requested,
+            sources,
+            FieldSelectionMixin.field_selection_always
+        ))
@@ -1,3 +1,4 @@
+import tempfile
 from pathlib import Path
 from decouple import config, Csv
 import dj_database_url
@@ -29,9 +30,13 @@ INSTALLED_APPS = [
     'apps.patients',
     'apps.records',
     'apps.audit',
+    'apps.sync',
 ]
 
 MIDDLEWARE = [
+    'apps.core.metrics.MetricsMiddleware',
+    'apps.core.timing.ServerTimingMiddleware',
+    'apps.core.query_budget.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -40,6 +45,8 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'apps.core.middleware.ClientTypeMiddleware',
+    'apps.core.middleware.RateLimitMiddleware',
+    'apps.core.replicas.ReplicaRoutingMiddleware',
     'apps.audit.middleware.AuditMiddleware',
 ]
 
@@ -70,6 +77,31 @@ DATABASES = {
     )
 }
 
+# Read replicas, one URL each. ReplicaRoutingMiddleware sends reads of
+# views with use_read_replicas to them; see README "Read Replicas".
+DATABASE_REPLICAS = []
+for _index, _url in enumerate(
+    config('DATABASE_REPLICA_URLS', default='', cast=Csv()),
+    start=1
+):
+    DATABASES[f'replica{_index}'] = dj_database_url.parse(
+        _url,
+        conn_max_age=600
+    )
+    DATABASE_REPLICAS.append(f'replica{_index}')
+
+DATABASE_ROUTERS = ['apps.core.replicas.ReplicaRouter']
+
+CACHES = {
+    'default': {
+        'BACKEND': config(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': config('REDIS_URL', default=''),
+    }
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.'
@@ -108,8 +140,42 @@ REST_FRAMEWORK = {
     'DEFAULT_VERSION': 'v1',
     'ALLOWED_VERSIONS': ['v1', 'v2', 'v3'],
     'VERSION_PARAM': 'version',
+    'DEFAULT_PAGINATION_CLASS': 'apps.core.pagination.KeysetPagination',
+    'PAGE_SIZE': config('API_PAGE_SIZE', default=100, cast=int),
 }
 
+STREAMING_LIST_CHUNK_SIZE = config(
+    'STREAMING_LIST_CHUNK_SIZE',
+    default=500,
+    cast=int
+)
+
+CLIENT_CONFIG_CACHE_TIMEOUT = config(
+    'CLIENT_CONFIG_CACHE_TIMEOUT',
+    default=3600,
+    cast=int
+)
+CLIENT_CONFIG_NEGATIVE_CACHE_TIMEOUT = config(
+    'CLIENT_CONFIG_NEGATIVE_CACHE_TIMEOUT',
+    default=300,
+    cast=int
+)
+CLIENT_CONFIG_LOCAL_CACHE_SIZE = config(
+    'CLIENT_CONFIG_LOCAL_CACHE_SIZE',
+    default=1024,
+    cast=int
+)
+CLIENT_CONFIG_VERSION_CHECK_INTERVAL = config(
+    'CLIENT_CONFIG_VERSION_CHECK_INTERVAL',
+    default=1.0,
+    cast=float
+)
+CLIENT_CONFIG_PRELOAD = config(
+    'CLIENT_CONFIG_PRELOAD',
+    default=True,
+    cast=bool
+)
+
 CLIENT_TYPES = {
     'LEGACY_HOSPITAL': 'legacy_hospital',
     'MODERN_CLINIC': 'modern_clinic',
@@ -128,18 +194,21 @@ CLIENT_FIELD_CONFIGS = {
         'audit_enabled': False,
         'rate_limit': 1000,
         'allow_field_selection': False,
+        'list_mode': 'stream',
     },
     'modern_clinic': {
         'required_fields': ['email'],
         'audit_enabled': False,
         'rate_limit': 5000,
         'allow_field_selection': True,
+        'list_mode': 'paginated',
     },
     'mobile_app': {
         'required_fields': ['email'],
         'audit_enabled': False,
         'rate_limit': 10000,
         'allow_field_selection': True,
+        'list_mode': 'paginated',
     }
 }
 
@@ -147,4 +216,162 @@ AUDIT_ENABLED_CLIENTS = config(
     'AUDIT_ENABLED_CLIENTS',
     default='premium_clinic_1,premium_clinic_2',
     cast=Csv()
-)
\ No newline at end of file
+)
+
+AUDIT_ASYNC = config('AUDIT_ASYNC', default=True, cast=bool)
+AUDIT_QUEUE_MAX_SIZE = config('AUDIT_QUEUE_MAX_SIZE', default=10000, cast=int)
+AUDIT_BATCH_SIZE = config('AUDIT_BATCH_SIZE', default=500, cast=int)
+AUDIT_FLUSH_INTERVAL = config('AUDIT_FLUSH_INTERVAL', default=1.0, cast=float)
+AUDIT_QUEUE_PUT_TIMEOUT = config(
+    'AUDIT_QUEUE_PUT_TIMEOUT',
+    default=0.05,
+    cast=float
+)
+
+SERVER_TIMING_ENABLED = config(
+    'SERVER_TIMING_ENABLED',
+    default=False,
+    cast=bool
+)
+SERVER_TIMING_SAMPLE_RATE = config(
+    'SERVER_TIMING_SAMPLE_RATE',
+    default=0.01,
+    cast=float
+)
+SERVER_TIMING_HEADER = config('SERVER_TIMING_HEADER', default=True, cast=bool)
+
+# Views declare query_budgets; sampled requests over budget, or
+# repeating one SELECT shape QUERY_BUDGET_REPEAT_THRESHOLD times, are
+# logged, and raise under tests.
+QUERY_BUDGET_ENABLED = config('QUERY_BUDGET_ENABLED', default=True, cast=bool)
+QUERY_BUDGET_SAMPLE_RATE = config(
+    'QUERY_BUDGET_SAMPLE_RATE',
+    default=0.01,
+    cast=float
+)
+QUERY_BUDGET_RAISE = config('QUERY_BUDGET_RAISE', default=False, cast=bool)
+QUERY_BUDGET_REPEAT_THRESHOLD = config(
+    'QUERY_BUDGET_REPEAT_THRESHOLD',
+    default=5,
+    cast=int
+)
+
+# Every worker writes its metrics to <pid>.db here; /metrics sums them.
+METRICS_ENABLED = config('METRICS_ENABLED', default=True, cast=bool)
+METRICS_DIR = config(
+    'METRICS_DIR',
+    default=str(Path(tempfile.gettempdir()) / 'meditrack-metrics')
+)
+# /metrics answers these addresses, and requests that send
+# "Authorization: Bearer <METRICS_TOKEN>" when a token is set.
+METRICS_ALLOWED_IPS = config(
+    'METRICS_ALLOWED_IPS',
+    default='127.0.0.1,::1',
+    cast=Csv()
+)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# After a write, a client reads from the primary for this many seconds;
+# keep it above the worst replication lag.
+REPLICA_STICKY_SECONDS = config(
+    'REPLICA_STICKY_SECONDS',
+    default=5,
+    cast=float
+)
+REPLICA_STICKY_CACHE_ALIAS = config(
+    'REPLICA_STICKY_CACHE_ALIAS',
+    default='default'
+)
+REPLICA_HEALTH_CHECK_INTERVAL = config(
+    'REPLICA_HEALTH_CHECK_INTERVAL',
+    default=10,
+    cast=float
+)
+
+# rate_limit in client configs is requests per RATE_LIMIT_PERIOD seconds.
+RATE_LIMIT_ENABLED = config(
+    'RATE_LIMIT_ENABLED',
+    default=True,
+    cast=bool
+)
+RATE_LIMIT_PERIOD = config('RATE_LIMIT_PERIOD', default=60, cast=float)
+RATE_LIMIT_SYNC_INTERVAL = config(
+    'RATE_LIMIT_SYNC_INTERVAL',
+    default=1.0,
+    cast=float
+)
+RATE_LIMIT_MAX_CLIENTS = config(
+    'RATE_LIMIT_MAX_CLIENTS',
+    default=10000,
+    cast=int
+)
+RATE_LIMIT_CACHE_ALIAS = config('RATE_LIMIT_CACHE_ALIAS', default='default')
+
+RESPONSE_CACHE_ENABLED = config(
+    'RESPONSE_CACHE_ENABLED',
+    default=True,
+    cast=bool
+)
+RESPONSE_CACHE_MAX_OBJECTS = config(
+    'RESPONSE_CACHE_MAX_OBJECTS',
+    default=10000,
+    cast=int
+)
+RESPONSE_CACHE_MAX_VARIANTS = config(
+    'RESPONSE_CACHE_MAX_VARIANTS',
+    default=8,
+    cast=int
+)
+RESPONSE_CACHE_TIMEOUT = config(
+    'RESPONSE_CACHE_TIMEOUT',
+    default=300,
+    cast=int
+)
+
+PATIENT_BULK_MAX_ITEMS = config(
+    'PATIENT_BULK_MAX_ITEMS',
+    default=1000,
+    cast=int
+)
+PATIENT_BULK_BATCH_SIZE = config(
+    'PATIENT_BULK_BATCH_SIZE',
+    default=500,
+    cast=int
+)
+# Rotating this key invalidates every stored ssn_hash; rerun
+# `backfill_patient_keys ssn --all` afterwards.
+PATIENT_SSN_HASH_KEY = config('PATIENT_SSN_HASH_KEY', default=SECRET_KEY)
+
+# Sync reads only rows older than SYNC_SETTLE_SECONDS so writes that
+# commit after their updated_at are not skipped by the next token.
+SYNC_PAGE_SIZE = config('SYNC_PAGE_SIZE', default=500, cast=int)
+SYNC_MAX_PAGE_SIZE = config('SYNC_MAX_PAGE_SIZE', default=5000, cast=int)
+SYNC_SETTLE_SECONDS = config('SYNC_SETTLE_SECONDS', default=2, cast=float)
+SYNC_TOKEN_MAX_AGE_DAYS = config(
+    'SYNC_TOKEN_MAX_AGE_DAYS',
+    default=30,
+    cast=int
+)
+# Every tokenless sync opens a lineage; most first syncs of a device
+# resume soon, so ones that never do are expired after this long.
+SYNC_UNRESUMED_LINEAGE_HOURS = config(
+    'SYNC_UNRESUMED_LINEAGE_HOURS',
+    default=24,
+    cast=int
+)
+
+RECORD_IMPORT_BATCH_SIZE = config(
+    'RECORD_IMPORT_BATCH_SIZE',
+    default=1000,
+    cast=int
+)
+RECORD_IMPORT_MAX_LINE_BYTES = config(
+    'RECORD_IMPORT_MAX_LINE_BYTES',
+    default=1024 * 1024,
+    cast=int
+)
+RECORD_IMPORT_MAX_REPORTED_REJECTS = config(
+    'RECORD_IMPORT_MAX_REPORTED_REJECTS',
+    default=1000,
+    cast=int
+)
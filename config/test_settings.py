@@ -0,0 +1,30 @@
+from decouple import config
+
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR, DATABASES
+
+# Audit entries are written inline so tests can assert on them at once.
+AUDIT_ASYNC = config('AUDIT_ASYNC', default=False, cast=bool)
+
+# Every request is checked, and a request over budget fails its test.
+QUERY_BUDGET_SAMPLE_RATE = config(
+    'QUERY_BUDGET_SAMPLE_RATE',
+    default=1.0,
+    cast=float
+)
+QUERY_BUDGET_RAISE = config('QUERY_BUDGET_RAISE', default=True, cast=bool)
+
+METRICS_ENABLED = config('METRICS_ENABLED', default=False, cast=bool)
+RATE_LIMIT_ENABLED = config('RATE_LIMIT_ENABLED', default=False, cast=bool)
+
+# The test runner turns DEBUG off, and one process needs no shared cache.
+SILENCED_SYSTEM_CHECKS = ['core.W001']
+
+# tests/test_replicas.py routes to two SQLite replicas filled with
+# replicate_sqlite(); every other test reads from the primary.
+DATABASE_REPLICAS = []
+for _alias in ('replica1', 'replica2'):
+    DATABASES[_alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / f'{_alias}.sqlite3',
+    }
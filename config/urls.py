@@ -1,8 +1,12 @@
 from django.contrib import admin
 from django.urls import path, include
 
+from apps.core.metrics import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
     path('api/', include('apps.patients.urls')),
     path('api/', include('apps.records.urls')),
+    path('api/', include('apps.sync.urls')),
 ]
\ No newline at end of file
@@ -3,4 +3,10 @@ from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_wsgi_application()
\ No newline at end of file
+application = get_wsgi_application()
+
+from django.conf import settings  # noqa: E402
+
+if settings.CLIENT_CONFIG_PRELOAD:
+    from apps.core.models import preload_client_configs  # noqa: E402
+    preload_client_configs()
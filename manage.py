@@ -3,7 +3,11 @@ import os
 import sys
 
 if __name__ == '__main__':
-    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    # An explicit DJANGO_SETTINGS_MODULE or --settings always wins.
+    default_settings = 'config.settings'
+    if sys.argv[1:2] == ['test']:
+        default_settings = 'config.test_settings'
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', default_settings)
     try:
         from django.core.management import execute_from_command_line
     except ImportError as exc:
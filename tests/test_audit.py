@@ -1,8 +1,15 @@
-from django.test import TestCase
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
+from django.test import SimpleTestCase, TestCase
 from django.contrib.auth.models import User
+from django.db import OperationalError
+from django.utils import timezone
 from rest_framework.test import APIClient
 from apps.patients.models import Patient
 from apps.audit.models import AuditLog
+from apps.audit.writer import AuditWriter, bulk_insert
 
 
 class AuditLoggingTests(TestCase):
@@ -57,4 +64,123 @@ class AuditLoggingTests(TestCase):
         
         log = AuditLog.objects.latest('timestamp')
         self.assertEqual(log.action, 'read')
-        self.assertEqual(log.resource_id, patient.id)
\ No newline at end of file
+        self.assertEqual(log.resource_id, patient.id)
+
+    def test_ssn_lookup_is_audited_as_a_read(self):
+        response = self.client.post(
+            '/api/patients/ssn-lookup/',
+            {'ssn': '123-45-6789'},
+            format='json',
+            HTTP_X_CLIENT_ID='premium_clinic_1'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        log = AuditLog.objects.get()
+        self.assertEqual(log.action, 'read')
+        self.assertNotIn('6789', str(log.metadata))
+
+    def test_batched_entries_keep_the_time_they_were_queued(self):
+        queued_at = timezone.now() - timedelta(seconds=30)
+        bulk_insert([AuditLog(
+            action='read',
+            resource_type='patients',
+            resource_id=1,
+            client_id='premium_clinic_1',
+            timestamp=queued_at
+        )])
+
+        self.assertEqual(AuditLog.objects.get().timestamp, queued_at)
+
+
+class AuditWriterTests(SimpleTestCase):
+    def make_writer(self, **kwargs):
+        self.written = []
+        options = {
+            'batch_size': 3,
+            'flush_interval': 0.05,
+            'sink': self.written.append,
+        }
+        options.update(kwargs)
+        return AuditWriter(**options)
+
+    def test_entries_are_flushed_in_batches(self):
+        writer = self.make_writer()
+        for i in range(7):
+            writer.submit(i)
+        writer.shutdown()
+
+        self.assertEqual(sorted(sum(self.written, [])), list(range(7)))
+        self.assertTrue(all(len(batch) <= 3 for batch in self.written))
+        self.assertEqual(writer.stats()['written'], 7)
+
+    def test_partial_batch_is_flushed_after_interval(self):
+        writer = self.make_writer(batch_size=100)
+        writer.submit('entry')
+
+        deadline = time.monotonic() + 2
+        while not self.written and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual(self.written, [['entry']])
+        writer.shutdown()
+
+    def test_full_queue_falls_back_to_inline_write(self):
+        release = threading.Event()
+        batches = []
+
+        def slow_sink(entries):
+            release.wait(2)
+            batches.append(entries)
+
+        writer = AuditWriter(
+            max_queue_size=1,
+            batch_size=1,
+            flush_interval=0.01,
+            put_timeout=0.01,
+            sink=slow_sink
+        )
+        writer.submit('first')
+        time.sleep(0.05)
+        writer.submit('second')
+        writer.submit('third')
+        release.set()
+        writer.shutdown()
+
+        self.assertGreaterEqual(writer.stats()['overflow'], 1)
+        self.assertEqual(
+            sorted(sum(batches, [])),
+            ['first', 'second', 'third']
+        )
+
+    def test_failed_batch_is_retried_on_a_new_connection(self):
+        calls = []
+
+        def flaky_sink(entries):
+            calls.append(list(entries))
+            if len(calls) == 1:
+                raise OperationalError('server closed the connection')
+            self.written.append(entries)
+
+        writer = self.make_writer(flush_interval=10)
+        writer.sink = flaky_sink
+        writer.submit('entry')
+        with mock.patch('apps.audit.writer.connection') as conn, \
+                self.assertLogs('apps.audit.writer', level='WARNING'):
+            conn.in_atomic_block = False
+            writer.shutdown()
+
+        conn.close.assert_called()
+        self.assertEqual(self.written, [['entry']])
+        self.assertEqual(writer.stats()['written'], 1)
+        self.assertEqual(writer.stats()['failed'], 0)
+
+    def test_failed_batches_are_counted(self):
+        def broken_sink(entries):
+            raise RuntimeError('database unavailable')
+
+        writer = self.make_writer(sink=broken_sink, flush_interval=10)
+        writer.submit('entry')
+        with self.assertLogs('apps.audit.writer', level='ERROR'):
+            writer.shutdown()
+
+        self.assertEqual(writer.stats()['failed'], 1)
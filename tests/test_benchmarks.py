@@ -0,0 +1,158 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from apps.core.benchmarks import compare_to_baseline
+from apps.patients.models import Patient
+from apps.records.models import MedicalRecord
+
+
+class BenchmarkCommandTests(TestCase):
+    def run_benchmark(self, *suites):
+        out = StringIO()
+        call_command(
+            'benchmark',
+            *suites,
+            rows=20,
+            repeat=1,
+            stdout=out,
+            stderr=StringIO()
+        )
+        return json.loads(out.getvalue())
+
+    def test_patient_serialization_suite_reports_identical_output(self):
+        results = self.run_benchmark('patient_serialization')
+
+        for variant in results['patient_serialization'].values():
+            self.assertTrue(variant['identical_output'])
+            self.assertEqual(variant['rows'], 20)
+        self.assertFalse(Patient.objects.exists())
+
+    def test_record_serialization_suite_reports_identical_output(self):
+        results = self.run_benchmark('record_serialization')
+
+        for variant in results['record_serialization'].values():
+            self.assertTrue(variant['identical_output'])
+            self.assertEqual(variant['rows'], 20)
+        self.assertFalse(MedicalRecord.objects.exists())
+
+    def test_patient_bulk_create_suite_creates_every_row(self):
+        results = self.run_benchmark('patient_bulk_create')
+
+        for variant in results['patient_bulk_create'].values():
+            self.assertTrue(variant['all_created'])
+        self.assertFalse(Patient.objects.exists())
+
+    def test_patient_retrieve_cache_suite_serves_warm_hits(self):
+        results = self.run_benchmark('patient_retrieve_cache')
+
+        for variant in results['patient_retrieve_cache'].values():
+            self.assertTrue(variant['identical_output'])
+            self.assertEqual(variant['cache_hits'], 20)
+            self.assertEqual(variant['cache_misses'], 0)
+        self.assertFalse(Patient.objects.exists())
+
+    def test_rate_limit_overhead_suite_reports_microseconds(self):
+        results = self.run_benchmark('rate_limit_overhead')
+        suite = results['rate_limit_overhead']
+
+        self.assertEqual(suite['requests'], 20)
+        self.assertEqual(suite['throttled'], 0)
+        self.assertIn('overhead_us_per_request', suite)
+
+    def test_record_search_index_suite_restores_the_index(self):
+        results = self.run_benchmark('record_search_index')
+
+        suite = results['record_search_index']
+        self.assertIn('insert_overhead', suite)
+        self.assertFalse(MedicalRecord.objects.exists())
+        MedicalRecord.objects.create(
+            patient=Patient.objects.create(email='after@bench.com'),
+            diagnosis='Benchmark cleanup check'
+        )
+        response = self.client.get(
+            '/api/records/search/?q=cleanup',
+            HTTP_X_CLIENT_ID='modern_clinic_1'
+        )
+        self.assertEqual(len(response.json()['results']), 1)
+
+    def test_api_suites_cover_every_client_type_and_version(self):
+        results = self.run_benchmark('patient_api', 'record_api')
+
+        for suite in ('patient_api', 'record_api'):
+            self.assertEqual(len(results[suite]), 9)
+            for variant in results[suite].values():
+                for path in ('list', 'retrieve', 'create', 'bulk'):
+                    self.assertEqual(variant[path]['requests'], 10)
+                    self.assertEqual(variant[path]['errors'], 0)
+                    self.assertGreater(
+                        variant[path]['queries_per_request'], 0
+                    )
+                    self.assertLessEqual(
+                        variant[path]['p50_ms'],
+                        variant[path]['p99_ms']
+                    )
+        self.assertFalse(Patient.objects.exists())
+        self.assertFalse(MedicalRecord.objects.exists())
+
+
+class BaselineComparisonTests(TestCase):
+    def test_flags_slower_timings_and_any_extra_query(self):
+        baseline = {'suite': {'v1': {
+            'list': {'p50_ms': 10.0, 'p99_ms': 20.0,
+                     'throughput_rps': 100.0, 'queries_per_request': 2},
+        }}}
+        results = {'suite': {'v1': {
+            'list': {'p50_ms': 10.5, 'p99_ms': 30.0,
+                     'throughput_rps': 150.0, 'queries_per_request': 2.1},
+        }}}
+
+        comparison = compare_to_baseline(results, baseline, tolerance=0.1)
+
+        self.assertEqual(comparison['compared'], 4)
+        self.assertEqual(
+            [entry['metric'] for entry in comparison['regressions']],
+            ['suite/v1/list/p99_ms', 'suite/v1/list/queries_per_request']
+        )
+        self.assertEqual(
+            comparison['improvements'],
+            [{
+                'metric': 'suite/v1/list/throughput_rps',
+                'baseline': 100.0,
+                'current': 150.0,
+                'change': -0.5,
+            }]
+        )
+
+    def test_command_saves_and_compares_baselines(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'baseline.json')
+            call_command(
+                'benchmark', 'rate_limit_overhead',
+                rows=20, repeat=1, save_baseline=path,
+                stdout=StringIO(), stderr=StringIO()
+            )
+            with open(path) as f:
+                baseline = json.load(f)
+            baseline['rate_limit_overhead']['enabled']['median_ms'] = 1e-6
+            with open(path, 'w') as f:
+                json.dump(baseline, f)
+
+            out = StringIO()
+            with self.assertRaisesRegex(CommandError, 'regressed'):
+                call_command(
+                    'benchmark', 'rate_limit_overhead',
+                    rows=20, repeat=1, baseline=path,
+                    tolerance=1000, fail_on_regression=True,
+                    stdout=out, stderr=StringIO()
+                )
+
+        report = json.loads(out.getvalue())
+        self.assertIn('rate_limit_overhead', report['results'])
+        self.assertEqual(
+            [entry['metric'] for entry in report['comparison']['regressions']],
+            ['rate_limit_overhead/enabled/median_ms']
+        )
@@ -0,0 +1,257 @@
+import threading
+import time
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from apps.core.cache import MISSING, LocalLRUCache, TwoTierCache
+from apps.core.checks import check_shared_caches
+from apps.core.models import ClientConfiguration, client_config_cache
+
+LOCMEM = 'django.core.cache.backends.locmem.LocMemCache'
+
+
+class ClientConfigCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        client_config_cache.invalidate()
+
+    def test_repeated_lookups_are_served_from_memory(self):
+        ClientConfiguration.objects.create(
+            client_id='cached_clinic',
+            client_type='modern_clinic',
+            config={'required_fields': ['email', 'phone']}
+        )
+        ClientConfiguration.get_config('cached_clinic', 'modern_clinic')
+
+        with self.assertNumQueries(0):
+            config = ClientConfiguration.get_config(
+                'cached_clinic',
+                'modern_clinic'
+            )
+        self.assertEqual(config['required_fields'], ['email', 'phone'])
+
+    def test_callers_get_their_own_copy(self):
+        ClientConfiguration.objects.create(
+            client_id='shared',
+            client_type='modern_clinic',
+            config={'required_fields': ['email']}
+        )
+        first = ClientConfiguration.get_config('shared', 'modern_clinic')
+        first['required_fields'].append('phone')
+
+        config = ClientConfiguration.get_config('shared', 'modern_clinic')
+        config['audit_enabled'] = True
+
+        self.assertEqual(
+            ClientConfiguration.get_config('shared', 'modern_clinic'),
+            {'required_fields': ['email']}
+        )
+
+    def test_unknown_client_is_negatively_cached(self):
+        ClientConfiguration.get_config('unknown_hospital', 'legacy_hospital')
+
+        with self.assertNumQueries(0):
+            config = ClientConfiguration.get_config(
+                'unknown_hospital',
+                'legacy_hospital'
+            )
+        self.assertFalse(config['allow_field_selection'])
+
+    def test_creating_config_replaces_negative_entry(self):
+        ClientConfiguration.get_config('new_clinic', 'modern_clinic')
+        ClientConfiguration.objects.create(
+            client_id='new_clinic',
+            client_type='modern_clinic',
+            config={'audit_enabled': True}
+        )
+
+        config = ClientConfiguration.get_config('new_clinic', 'modern_clinic')
+        self.assertTrue(config['audit_enabled'])
+
+    def test_queryset_update_invalidates(self):
+        ClientConfiguration.objects.create(
+            client_id='bulk_clinic',
+            client_type='modern_clinic',
+            config={'audit_enabled': False}
+        )
+        ClientConfiguration.get_config('bulk_clinic', 'modern_clinic')
+
+        ClientConfiguration.objects.filter(client_id='bulk_clinic').update(
+            config={'audit_enabled': True}
+        )
+
+        config = ClientConfiguration.get_config('bulk_clinic', 'modern_clinic')
+        self.assertTrue(config['audit_enabled'])
+
+    def test_delete_invalidates(self):
+        client_config = ClientConfiguration.objects.create(
+            client_id='closing_clinic',
+            client_type='modern_clinic',
+            config={'required_fields': []}
+        )
+        ClientConfiguration.get_config('closing_clinic', 'modern_clinic')
+
+        client_config.delete()
+
+        config = ClientConfiguration.get_config(
+            'closing_clinic',
+            'modern_clinic'
+        )
+        self.assertEqual(config['required_fields'], ['email'])
+
+    def test_preload_warms_active_configurations(self):
+        ClientConfiguration.objects.create(
+            client_id='preloaded_clinic',
+            client_type='modern_clinic',
+            config={'rate_limit': 42}
+        )
+        ClientConfiguration.objects.create(
+            client_id='inactive_clinic',
+            client_type='modern_clinic',
+            config={'rate_limit': 1},
+            is_active=False
+        )
+        client_config_cache.invalidate()
+
+        self.assertEqual(ClientConfiguration.preload(), 1)
+        with self.assertNumQueries(0):
+            config = ClientConfiguration.get_config(
+                'preloaded_clinic',
+                'modern_clinic'
+            )
+        self.assertEqual(config['rate_limit'], 42)
+
+
+class TwoTierCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_invalidation_reaches_other_workers(self):
+        worker_a = TwoTierCache('shared_test', version_check_interval=0)
+        worker_b = TwoTierCache('shared_test', version_check_interval=0)
+        worker_a.set('key', 'old')
+        self.assertEqual(worker_b.get('key'), 'old')
+
+        worker_a.invalidate()
+
+        self.assertIs(worker_b.get('key'), MISSING)
+
+    def test_version_is_checked_at_most_once_per_interval(self):
+        worker_a = TwoTierCache('interval_test', version_check_interval=60)
+        worker_b = TwoTierCache('interval_test', version_check_interval=60)
+        worker_b.set('key', 'value')
+
+        worker_a.invalidate()
+
+        self.assertEqual(worker_b.get('key'), 'value')
+        self.assertEqual(worker_b.stats()['local_hits'], 1)
+
+    @override_settings(DEBUG=False)
+    def test_check_warns_when_shared_tier_is_process_local(self):
+        self.assertEqual(
+            [warning.id for warning in check_shared_caches()],
+            ['core.W001']
+        )
+
+        with override_settings(DEBUG=True):
+            self.assertEqual(check_shared_caches(), [])
+
+        redis = 'django.core.cache.backends.redis.RedisCache'
+        with override_settings(CACHES={'default': {'BACKEND': redis}}):
+            self.assertEqual(check_shared_caches(), [])
+
+        with override_settings(
+            DATABASE_REPLICAS=['replica1'],
+            CACHES={
+                'default': {'BACKEND': redis},
+                'sticky': {'BACKEND': LOCMEM},
+            },
+            REPLICA_STICKY_CACHE_ALIAS='sticky'
+        ):
+            warnings = check_shared_caches()
+        self.assertEqual(len(warnings), 1)
+        self.assertIn('replica stickiness', warnings[0].msg)
+
+    def test_lru_evicts_least_recently_used(self):
+        lru = LocalLRUCache(max_size=2)
+        lru.set('a', 1, 60)
+        lru.set('b', 2, 60)
+        lru.get('a')
+        lru.set('c', 3, 60)
+
+        self.assertEqual(lru.get('a'), 1)
+        self.assertIs(lru.get('b'), MISSING)
+
+    def test_local_entries_expire(self):
+        lru = LocalLRUCache()
+        lru.set('a', 1, -1)
+        self.assertIs(lru.get('a'), MISSING)
+
+
+class SingleFlightTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_concurrent_misses_share_one_load(self):
+        tier = TwoTierCache('flight_test')
+        calls = []
+        start = threading.Barrier(8)
+
+        def loader():
+            calls.append(1)
+            time.sleep(0.1)
+            return 'fresh'
+
+        def worker(results):
+            start.wait()
+            results.append(tier.get_or_load('key', loader))
+
+        results = []
+        threads = [
+            threading.Thread(target=worker, args=(results,))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['fresh'] * 8)
+        self.assertEqual(tier.stats()['coalesced'], 7)
+
+    def test_stale_value_is_served_while_refreshing(self):
+        tier = TwoTierCache('refresh_test', early_refresh=1.0)
+        tier.set('key', 'stale')
+        refreshed = threading.Event()
+
+        def loader():
+            refreshed.set()
+            return 'fresh'
+
+        self.assertEqual(tier.get_or_load('key', loader), 'stale')
+        self.assertTrue(refreshed.wait(2))
+
+        deadline = time.monotonic() + 2
+        while tier.stats()['refreshes'] == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(tier.get('key'), 'fresh')
+
+    def test_ttl_is_jittered_below_timeout(self):
+        tier = TwoTierCache('jitter_test', jitter=0.2)
+        now = time.time()
+        tier.set('key', 'value', 100)
+
+        _, refresh_at, expires_at = tier.local.get('key')
+        self.assertGreaterEqual(expires_at - now, 79)
+        self.assertLessEqual(expires_at - now, 101)
+        self.assertLess(refresh_at, expires_at)
+
+    def test_loader_errors_reach_caller_and_are_not_cached(self):
+        tier = TwoTierCache('error_test')
+
+        def loader():
+            raise RuntimeError('database down')
+
+        with self.assertRaises(RuntimeError):
+            tier.get_or_load('key', loader)
+        self.assertEqual(tier.get_or_load('key', lambda: 'ok'), 'ok')
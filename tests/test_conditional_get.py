@@ -0,0 +1,189 @@
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework import status
+from apps.patients.models import Patient
+from apps.patients.serializers import PatientSerializerV1
+from apps.patients.views import PatientViewSet
+from apps.records.models import MedicalRecord
+
+
+class PatientConditionalGetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.patient = Patient.objects.create(
+            email='etag@clinic.com',
+            first_name='Etag',
+            ssn_legacy='123-45-6789'
+        )
+        self.url = f'/api/patients/{self.patient.id}/'
+
+    def get(self, url, client_id='modern_clinic_1', version='v1', **headers):
+        return self.client.get(
+            url,
+            HTTP_X_CLIENT_ID=client_id,
+            HTTP_ACCEPT=f'application/json; version={version}',
+            **headers
+        )
+
+    def test_retrieve_returns_304_without_serializing(self):
+        response = self.get(self.url)
+        etag = response['ETag']
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('X-Client-ID', response['Vary'])
+
+        with mock.patch.object(
+            PatientSerializerV1,
+            'to_representation'
+        ) as to_representation:
+            response = self.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+        to_representation.assert_not_called()
+
+    def test_if_none_match_uses_weak_comparison(self):
+        etag = self.get(self.url)['ETag']
+        for header in (f'W/{etag}', f'"other", {etag}', '*'):
+            with self.subTest(header=header):
+                response = self.get(self.url, HTTP_IF_NONE_MATCH=header)
+                self.assertEqual(
+                    response.status_code,
+                    status.HTTP_304_NOT_MODIFIED
+                )
+
+    def test_etag_depends_on_representation(self):
+        etags = {
+            self.get(self.url)['ETag'],
+            self.get(self.url, version='v2')['ETag'],
+            self.get(self.url, client_id='legacy_hospital_1')['ETag'],
+            self.get(
+                f'{self.url}?fields=id',
+                client_id='mobile_app_1'
+            )['ETag'],
+        }
+        self.assertEqual(len(etags), 4)
+
+    def test_update_changes_etag(self):
+        etag = self.get(self.url)['ETag']
+        self.patient.first_name = 'Changed'
+        self.patient.save()
+
+        response = self.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['first_name'], 'Changed')
+
+    def test_permissions_run_before_304(self):
+        url = f'{self.url}?fields=id'
+        etag = self.get(url, client_id='mobile_app_1')['ETag']
+        response = self.get(
+            url,
+            client_id='mobile_app_1',
+            HTTP_IF_NONE_MATCH=etag,
+            HTTP_X_PATIENT_CONSENT='false'
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_list_returns_304_without_serializing(self):
+        etag = self.get('/api/patients/')['ETag']
+
+        with mock.patch.object(PatientViewSet, 'serialize_list') as serialize:
+            with self.assertNumQueries(1):
+                response = self.get('/api/patients/', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        serialize.assert_not_called()
+
+    def test_list_etag_tracks_writes_and_deletes(self):
+        etags = [self.get('/api/patients/')['ETag']]
+
+        other = Patient.objects.create(email='other@clinic.com')
+        etags.append(self.get('/api/patients/')['ETag'])
+
+        other.delete()
+        self.assertEqual(self.get('/api/patients/')['ETag'], etags[0])
+
+        Patient.objects.create(email='third@clinic.com')
+        etags.append(self.get('/api/patients/')['ETag'])
+        self.assertEqual(len(set(etags)), 3)
+
+        etag = self.get('/api/patients/?page_size=1')['ETag']
+        self.assertNotIn(etag, etags)
+
+    def test_list_etag_only_reads_the_page(self):
+        url = '/api/patients/?page_size=1'
+        Patient.objects.create(email='second@clinic.com')
+        Patient.objects.create(email='third@clinic.com')
+        etag = self.get(url)['ETag']
+
+        # self.patient is the oldest, so it is outside the first page.
+        self.patient.first_name = 'Changed'
+        self.patient.save()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertFalse(
+            any('COUNT(' in query['sql'] for query in queries)
+        )
+        self.assertNotEqual(self.get('/api/patients/')['ETag'], etag)
+
+    def test_ssn_migration_changes_etag(self):
+        etag = self.get(self.url, version='v2')['ETag']
+        call_command('migrate_ssn_data', '--restart', stdout=StringIO())
+
+        response = self.get(self.url, version='v2', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['ssn']['number'], '123-45-6789')
+
+
+class RecordConditionalGetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.patient = Patient.objects.create(email='records@clinic.com')
+        self.record = MedicalRecord.objects.create(
+            patient=self.patient,
+            record_type='lab_result',
+            diagnosis='Routine panel',
+            flexible_data={'test_name': 'HbA1c'}
+        )
+
+    def get(self, url, **headers):
+        return self.client.get(
+            url,
+            HTTP_X_CLIENT_ID='modern_clinic_1',
+            HTTP_ACCEPT='application/json; version=v1',
+            **headers
+        )
+
+    def test_retrieve_and_filtered_list(self):
+        for url in (f'/api/records/{self.record.id}/',
+                    '/api/records/?record_type=lab_result'):
+            with self.subTest(url=url):
+                etag = self.get(url)['ETag']
+                response = self.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(
+                    response.status_code,
+                    status.HTTP_304_NOT_MODIFIED
+                )
+
+    def test_filter_scopes_the_list_validator(self):
+        url = '/api/records/?record_type=prescription'
+        etag = self.get(url)['ETag']
+        MedicalRecord.objects.create(
+            patient=self.patient,
+            record_type='lab_result',
+            flexible_data={'test_name': 'Lipids'}
+        )
+
+        response = self.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        response = self.get('/api/records/?record_type=lab_result')
+        self.assertEqual(len(response.data['results']), 2)
@@ -0,0 +1,146 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework import status
+from apps.core.models import ClientConfiguration
+from apps.patients.models import Patient
+from apps.records.models import MedicalRecord
+
+
+def select_sql(queries, table):
+    # The list ETag validator reads only ids and updated_at.
+    validator = f'SELECT "{table}"."id", "{table}"."updated_at" FROM'
+    return [
+        query['sql'] for query in queries
+        if query['sql'].startswith('SELECT')
+        and f'FROM "{table}"' in query['sql']
+        and not query['sql'].startswith(validator)
+    ]
+
+
+class PatientFieldProjectionTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.patient = Patient.objects.create(
+            email='projection@mobile.com',
+            first_name='Mobile',
+            address='A very long address',
+            allergies='Penicillin',
+            ssn_legacy='123-45-6789'
+        )
+
+    def test_list_selects_only_requested_columns(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(
+                '/api/patients/?fields=id,email,first_name',
+                HTTP_X_CLIENT_ID='mobile_app_1'
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data['results'],
+            [{
+                'id': self.patient.id,
+                'email': 'projection@mobile.com',
+                'first_name': 'Mobile',
+            }]
+        )
+        sql = select_sql(ctx.captured_queries, 'patients')
+        self.assertEqual(len(sql), 1)
+        self.assertNotIn('"address"', sql[0])
+        self.assertNotIn('"allergies"', sql[0])
+
+    def test_ssn_selection_loads_its_source_columns(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                f'/api/patients/{self.patient.id}/?fields=id,ssn',
+                HTTP_X_CLIENT_ID='mobile_app_1',
+                HTTP_ACCEPT='application/json; version=v2'
+            )
+
+        self.assertEqual(response.data['ssn']['number'], '123-45-6789')
+
+    def test_allow_list_restricts_selectable_fields(self):
+        ClientConfiguration.objects.create(
+            client_id='mobile_app_restricted',
+            client_type='mobile_app',
+            config={
+                'required_fields': ['email'],
+                'allow_field_selection': ['id', 'email'],
+            }
+        )
+        response = self.client.get(
+            f'/api/patients/{self.patient.id}/?fields=id,email,address',
+            HTTP_X_CLIENT_ID='mobile_app_restricted'
+        )
+
+        self.assertEqual(set(response.data), {'id', 'email'})
+
+    def test_disabled_field_selection_returns_full_representation(self):
+        ClientConfiguration.objects.create(
+            client_id='mobile_app_locked',
+            client_type='mobile_app',
+            config={
+                'required_fields': ['email'],
+                'allow_field_selection': False,
+            }
+        )
+        response = self.client.get(
+            f'/api/patients/{self.patient.id}/?fields=id',
+            HTTP_X_CLIENT_ID='mobile_app_locked'
+        )
+
+        self.assertIn('address', response.data)
+
+    def test_writes_load_full_rows(self):
+        response = self.client.patch(
+            f'/api/patients/{self.patient.id}/?fields=id,last_name',
+            {'last_name': 'Updated'},
+            format='json',
+            HTTP_X_CLIENT_ID='mobile_app_1'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.patient.refresh_from_db()
+        self.assertEqual(self.patient.last_name, 'Updated')
+        self.assertEqual(self.patient.address, 'A very long address')
+
+
+class RecordFieldProjectionTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='mobileuser',
+            password='test123'
+        )
+        self.client.force_authenticate(user=self.user)
+        patient = Patient.objects.create(email='records@mobile.com')
+        self.record = MedicalRecord.objects.create(
+            patient=patient,
+            record_type='lab_result',
+            diagnosis='Long diagnosis text',
+            notes='Long notes',
+            flexible_data={'test_name': 'HbA1c'}
+        )
+
+    def test_record_list_skips_text_and_json_columns(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(
+                '/api/records/?fields=id,patient,record_type',
+                HTTP_X_CLIENT_ID='mobile_app_1'
+            )
+
+        self.assertEqual(
+            response.data['results'],
+            [{
+                'id': self.record.id,
+                'patient': self.record.patient_id,
+                'record_type': 'lab_result',
+            }]
+        )
+        sql = select_sql(ctx.captured_queries, 'medical_records')
+        self.assertEqual(len(sql), 1)
+        for column in ('diagnosis', 'treatment', 'notes', 'flexible_data'):
+            self.assertNotIn(f'"{column}"', sql[0])
@@ -0,0 +1,281 @@
+import io
+import json
+import os
+import tempfile
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+from apps.patients.models import Patient
+from apps.records.importer import RecordImporter, iter_lines
+from apps.records.models import MedicalRecord, RecordImport
+
+
+class ImportRecordsTestMixin:
+    def setUp(self):
+        self.patient = Patient.objects.create(email='import@hospital.com')
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def ndjson(self, *lines):
+        return b''.join(
+            (line if isinstance(line, bytes) else json.dumps(line).encode())
+            + b'\n'
+            for line in lines
+        )
+
+    def valid_lines(self, count):
+        return [
+            {
+                'patient': self.patient.id,
+                'record_type': 'lab_result',
+                'data': {'test_name': f'Test {i}'},
+            }
+            for i in range(count)
+        ]
+
+
+class ImportRecordsCommandTests(ImportRecordsTestMixin, TestCase):
+    def run_import(self, content, *args):
+        path = os.path.join(self.tmpdir.name, 'records.ndjson')
+        with open(path, 'wb') as f:
+            f.write(content)
+        self.rejects_file = os.path.join(self.tmpdir.name, 'rejects.ndjson')
+
+        out = StringIO()
+        call_command(
+            'import_records',
+            path,
+            *args,
+            '--rejects-file', self.rejects_file,
+            stdout=out
+        )
+        return out.getvalue()
+
+    def read_rejects(self):
+        with open(self.rejects_file) as f:
+            return [json.loads(line) for line in f]
+
+    def test_imports_valid_lines_and_reports_rejected_ones(self):
+        content = self.ndjson(
+            {
+                'patient': self.patient.id,
+                'diagnosis': 'Flu',
+                'treatment': 'Rest',
+            },
+            {
+                'patient': str(self.patient.id),
+                'record_type': 'prescription',
+                'data': {'medication': 'Aspirin'},
+            },
+            b'{not json',
+            {'patient': self.patient.id, 'record_type': 'lab_result'},
+            b'',
+            {'patient': self.patient.id + 1000, 'diagnosis': 'Ghost'},
+            {'patient': self.patient.id, 'record_type': 'x-ray'},
+        )
+
+        output = self.run_import(content, '--batch-size', '2')
+
+        records = MedicalRecord.objects.order_by('id')
+        self.assertEqual(
+            [(r.record_type, r.created_by) for r in records],
+            [('general', 'import'), ('prescription', 'import')]
+        )
+        self.assertEqual(records[1].flexible_data, {'medication': 'Aspirin'})
+
+        rejects = self.read_rejects()
+        self.assertEqual(
+            [reject['line'] for reject in rejects],
+            [3, 4, 6, 7]
+        )
+        self.assertEqual(
+            rejects[1]['errors'],
+            {'data': ['test_name is required for lab results']}
+        )
+        self.assertIn('patient', rejects[2]['errors'])
+        self.assertIn('record_type', rejects[3]['errors'])
+        self.assertEqual(rejects[0]['raw'], '{not json')
+        self.assertIn('Imported 2 records, rejected 4 lines', output)
+
+    def test_rejects_unhashable_record_types_and_huge_ids(self):
+        content = self.ndjson(
+            {'patient': self.patient.id, 'record_type': ['lab_result']},
+            {'patient': self.patient.id, 'record_type': {'a': 1}},
+            {'patient': 2 ** 63, 'diagnosis': 'Overflow'},
+            {'patient': str(2 ** 64), 'diagnosis': 'Overflow'},
+            {'patient': 0, 'diagnosis': 'Zero'},
+            {'patient': self.patient.id, 'diagnosis': 'Kept'},
+        )
+
+        output = self.run_import(content)
+
+        self.assertEqual(
+            list(MedicalRecord.objects.values_list('diagnosis', flat=True)),
+            ['Kept']
+        )
+        rejects = self.read_rejects()
+        self.assertEqual(
+            [(reject['line'], list(reject['errors'])) for reject in rejects],
+            [
+                (1, ['record_type']),
+                (2, ['record_type']),
+                (3, ['patient']),
+                (4, ['patient']),
+                (5, ['patient']),
+            ]
+        )
+        self.assertIn('Imported 1 records, rejected 5 lines', output)
+
+    @override_settings(RECORD_IMPORT_MAX_LINE_BYTES=64)
+    def test_rejects_lines_over_the_size_limit(self):
+        content = self.ndjson(
+            {'patient': self.patient.id, 'notes': 'x' * 200},
+            {'patient': self.patient.id, 'notes': 'short'},
+        )
+
+        self.run_import(content)
+
+        self.assertEqual(
+            list(MedicalRecord.objects.values_list('notes', flat=True)),
+            ['short']
+        )
+        rejects = self.read_rejects()
+        self.assertEqual(rejects[0]['line'], 1)
+        self.assertIsNone(rejects[0]['raw'])
+
+    def test_rerun_resumes_after_the_committed_offset(self):
+        content = self.ndjson(*self.valid_lines(5))
+
+        self.run_import(content)
+        output = self.run_import(content)
+
+        self.assertEqual(MedicalRecord.objects.count(), 5)
+        self.assertIn('Imported 0 records', output)
+
+        self.run_import(content, '--restart')
+        self.assertEqual(MedicalRecord.objects.count(), 10)
+
+
+class RecordImporterTests(ImportRecordsTestMixin, TestCase):
+    def test_crash_mid_import_resumes_without_duplicates(self):
+        content = self.ndjson(*self.valid_lines(7))
+
+        def crash_after_first_chunk(importer, offset):
+            raise RuntimeError('worker killed')
+
+        importer = RecordImporter(
+            'crash-test',
+            batch_size=3,
+            on_chunk=crash_after_first_chunk
+        )
+        with self.assertRaises(RuntimeError):
+            importer.run(io.BytesIO(content))
+        self.assertEqual(MedicalRecord.objects.count(), 3)
+
+        state = RecordImporter('crash-test', batch_size=3).run(
+            _Unseekable(content)
+        )
+
+        self.assertEqual(MedicalRecord.objects.count(), 7)
+        self.assertEqual(
+            sorted(MedicalRecord.objects.values_list(
+                'flexible_data__test_name',
+                flat=True
+            )),
+            sorted(f'Test {i}' for i in range(7))
+        )
+        self.assertEqual(
+            (state.offset, state.lines, state.imported),
+            (len(content), 7, 7)
+        )
+
+    def test_resolves_patients_once_per_chunk(self):
+        content = self.ndjson(*self.valid_lines(20))
+
+        with CaptureQueriesContext(connection) as queries:
+            RecordImporter('queries', batch_size=10).run(io.BytesIO(content))
+
+        patient_lookups = [
+            query for query in queries.captured_queries
+            if 'FROM "patients"' in query['sql']
+        ]
+        inserts = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith('INSERT INTO "medical_records"')
+        ]
+        self.assertEqual((len(patient_lookups), len(inserts)), (2, 2))
+
+    def test_iter_lines_reports_end_offsets(self):
+        stream = io.BytesIO(b'a\nbb\n\nccc')
+
+        self.assertEqual(
+            list(iter_lines(stream)),
+            [(2, b'a\n'), (5, b'bb\n'), (6, b'\n'), (9, b'ccc')]
+        )
+
+
+class ImportRecordsEndpointTests(ImportRecordsTestMixin, TestCase):
+    def post_import(self, content, source=None):
+        path = '/api/records/import/'
+        if source:
+            path = f'{path}?source={source}'
+        return APIClient().generic(
+            'POST',
+            path,
+            content,
+            content_type='application/x-ndjson',
+            HTTP_X_CLIENT_ID='modern_clinic_1'
+        )
+
+    def test_imports_request_body(self):
+        content = self.ndjson(
+            *self.valid_lines(2),
+            {'patient': self.patient.id, 'record_type': 'prescription'},
+        )
+
+        response = self.post_import(content, 'batch-1')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['imported'], 2)
+        self.assertEqual(response.data['rejected'], 1)
+        self.assertEqual(response.data['rejects'][0]['line'], 3)
+        self.assertEqual(response.data['offset'], len(content))
+        self.assertEqual(
+            set(MedicalRecord.objects.values_list('created_by', flat=True)),
+            {'modern_clinic_1'}
+        )
+
+    def test_resending_the_same_source_skips_committed_lines(self):
+        content = self.ndjson(*self.valid_lines(3))
+        RecordImport.objects.create(
+            source='api:retry',
+            offset=len(self.ndjson(*self.valid_lines(2))),
+            lines=2
+        )
+
+        response = self.post_import(content, 'retry')
+
+        self.assertEqual(response.data['imported'], 1)
+        self.assertEqual(response.data['lines'], 3)
+        self.assertEqual(MedicalRecord.objects.count(), 1)
+
+    def test_generates_a_source_when_none_is_given(self):
+        response = self.post_import(self.ndjson(*self.valid_lines(1)))
+
+        self.assertEqual(response.data['imported'], 1)
+        self.assertTrue(
+            RecordImport.objects.filter(
+                source=f'api:{response.data["source"]}'
+            ).exists()
+        )
+
+
+class _Unseekable(io.BytesIO):
+    def seekable(self):
+        return False
@@ -0,0 +1,254 @@
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from apps.core.metrics import MetricsRegistry, MmapValues, read_file, registry
+from apps.core.models import client_config_cache
+from apps.patients.models import Patient
+
+
+def dead_pid():
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+def samples(text):
+    values = {}
+    for line in text.splitlines():
+        if line and not line.startswith('#'):
+            name, value = line.rsplit(' ', 1)
+            values[name] = float(value)
+    return values
+
+
+class MetricsTestCase(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        settings_override = override_settings(
+            METRICS_ENABLED=True,
+            METRICS_DIR=self.directory.name
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.path = Path(self.directory.name)
+
+
+class MmapValuesTests(MetricsTestCase):
+    def test_values_survive_reopening_and_growth(self):
+        path = self.path / '1.db'
+        store = MmapValues(path)
+        keys = [('metric', '_total', (f'label-{i}' * 20,)) for i in range(500)]
+        for key in keys:
+            store.add(key, 1)
+        store.add(keys[0], 2.5)
+        store.close()
+
+        store = MmapValues(path)
+        store.add(keys[1], 1)
+        store.set(keys[2], 7)
+        store.close()
+
+        values = dict(read_file(path))
+        self.assertEqual(len(values), 500)
+        self.assertEqual(values[keys[0]], 3.5)
+        self.assertEqual(values[keys[1]], 2)
+        self.assertEqual(values[keys[2]], 7)
+
+
+class MetricsRegistryTests(MetricsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.registry = MetricsRegistry()
+        self.addCleanup(self.registry.reset)
+        self.requests = self.registry.counter(
+            'requests', 'Requests.', ('client_type',)
+        )
+        self.latency = self.registry.histogram(
+            'latency', 'Latency.', buckets=(0.1, 1)
+        )
+        self.depth = self.registry.gauge('depth', 'Depth.')
+
+    def write_worker_file(self, pid, updates):
+        store = MmapValues(self.path / f'{pid}.db')
+        for key, value in updates:
+            store.add(key, value)
+        store.close()
+
+    def test_exposition_format(self):
+        self.requests.inc(client_type='mobile_app')
+        self.requests.inc(2, client_type='mobile_app')
+        for value in (0.05, 0.5, 0.5, 3):
+            self.latency.observe(value)
+        self.depth.set(4)
+        self.depth.set(2)
+
+        text = self.registry.exposition()
+        self.assertIn('# TYPE requests counter\n', text)
+        self.assertIn('# TYPE latency histogram\n', text)
+        self.assertEqual(samples(text), {
+            'depth': 2,
+            'latency_bucket{le="0.1"}': 1,
+            'latency_bucket{le="1"}': 3,
+            'latency_bucket{le="+Inf"}': 4,
+            'latency_count': 4,
+            'latency_sum': 4.05,
+            'requests_total{client_type="mobile_app"}': 3,
+        })
+
+    def test_sums_workers_and_drops_gauges_of_dead_ones(self):
+        self.requests.inc(client_type='mobile_app')
+        self.depth.set(1)
+        self.write_worker_file(os.getppid(), [
+            (('requests', '_total', ('mobile_app',)), 2),
+            (('depth', '', ()), 5),
+        ])
+        self.write_worker_file(dead_pid(), [
+            (('requests', '_total', ('mobile_app',)), 4),
+            (('depth', '', ()), 100),
+        ])
+
+        values = samples(self.registry.exposition())
+        self.assertEqual(values['requests_total{client_type="mobile_app"}'], 7)
+        self.assertEqual(values['depth'], 6)
+
+    def test_new_worker_removes_dead_files(self):
+        dead = dead_pid()
+        alive = os.getppid()
+        for pid in (dead, alive):
+            self.write_worker_file(pid, [(('depth', '', ()), 1)])
+
+        self.requests.inc(client_type='mobile_app')
+
+        self.assertEqual(
+            sorted(path.name for path in self.path.glob('*.db')),
+            sorted([f'{alive}.db', f'{os.getpid()}.db'])
+        )
+
+    def test_disabled_registry_writes_nothing(self):
+        with override_settings(METRICS_ENABLED=False):
+            self.requests.inc(client_type='mobile_app')
+        self.assertEqual(list(self.path.glob('*.db')), [])
+
+
+class MetricsEndpointTests(MetricsTestCase):
+    def setUp(self):
+        super().setUp()
+        registry.reset()
+        self.addCleanup(registry.reset)
+        cache.clear()
+        client_config_cache.local.clear()
+        self.client = APIClient()
+        self.patient = Patient.objects.create(email='metrics@clinic.com')
+
+    def scrape(self):
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        return samples(response.content.decode())
+
+    def test_reports_requests_by_handler_version_and_client_type(self):
+        for _ in range(2):
+            self.client.get(
+                '/api/patients/',
+                HTTP_X_CLIENT_ID='modern_clinic_1'
+            )
+        self.client.get(
+            f'/api/patients/{self.patient.id}/',
+            HTTP_X_CLIENT_ID='mobile_app_1',
+            HTTP_ACCEPT='application/json; version=v2'
+        )
+
+        values = self.scrape()
+        labels = ('handler="patient-list",method="GET",version="v1",'
+                  'client_type="modern_clinic"')
+        self.assertEqual(
+            values[f'http_request_duration_seconds_count{{{labels}}}'], 2
+        )
+        self.assertEqual(
+            values[f'http_requests_total{{{labels},status="200"}}'], 2
+        )
+        self.assertGreater(
+            values[f'http_request_db_queries_sum{{{labels}}}'], 0
+        )
+        self.assertEqual(
+            values[
+                'http_request_duration_seconds_count{handler="patient-detail",'
+                'method="GET",version="v2",client_type="mobile_app"}'
+            ],
+            1
+        )
+
+    def test_reports_client_config_cache_lookups(self):
+        local_hits = client_config_cache.local_hits
+        for _ in range(3):
+            self.client.get(
+                '/api/patients/',
+                HTTP_X_CLIENT_ID='modern_clinic_1'
+            )
+
+        values = self.scrape()
+        self.assertEqual(
+            values['cache_requests_total{cache="client_config",'
+                   'result="miss"}'],
+            1
+        )
+        self.assertEqual(
+            values['cache_requests_total{cache="client_config",'
+                   'result="local_hit"}'],
+            client_config_cache.local_hits - local_hits
+        )
+
+    def test_unmatched_paths_share_one_handler(self):
+        self.client.get('/nope/one')
+        self.client.get('/nope/two')
+
+        values = self.scrape()
+        self.assertEqual(
+            values['http_requests_total{handler="unmatched",method="GET",'
+                   'version="none",client_type="modern_clinic",'
+                   'status="404"}'],
+            2
+        )
+
+    def test_unknown_methods_share_one_label(self):
+        for method in ('PROPFIND', 'BREW'):
+            self.client.generic(method, '/nope/')
+
+        values = self.scrape()
+        self.assertEqual(
+            values['http_requests_total{handler="unmatched",method="other",'
+                   'version="none",client_type="modern_clinic",'
+                   'status="404"}'],
+            2
+        )
+        self.assertFalse(any('PROPFIND' in name for name in values))
+
+    @override_settings(METRICS_ALLOWED_IPS=[], METRICS_TOKEN='')
+    def test_scrapes_need_an_allowed_ip_or_the_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+
+        with self.settings(METRICS_ALLOWED_IPS=['127.0.0.1']):
+            self.assertEqual(self.client.get('/metrics').status_code, 200)
+
+        with self.settings(METRICS_TOKEN='scrape-me'):
+            for header, status_code in [
+                ('Bearer scrape-me', 200),
+                ('Bearer wrong', 403),
+                ('', 403),
+            ]:
+                with self.subTest(header=header):
+                    response = self.client.get(
+                        '/metrics',
+                        HTTP_AUTHORIZATION=header
+                    )
+                    self.assertEqual(response.status_code, status_code)
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_disabled_endpoint_is_not_found(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 404)
@@ -0,0 +1,250 @@
+import json
+import os
+import tempfile
+from collections import Counter
+from concurrent.futures import Future
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import OperationalError
+from django.test import TestCase
+from apps.patients.models import Patient
+from apps.patients.management.commands.migrate_ssn_data import (
+    DIRECTIONS,
+    FORWARD_PENDING,
+    Command,
+    migrate_range,
+    run_range_task,
+    split_ranges,
+)
+
+
+class MigrateSSNDataTests(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.checkpoint = os.path.join(self.tmpdir.name, 'checkpoint.json')
+        self.legacy = [
+            Patient.objects.create(
+                email=f'legacy{i}@hospital.com',
+                ssn_legacy=f'123-45-000{i}'
+            )
+            for i in range(5)
+        ]
+        self.modern = Patient.objects.create(
+            email='modern@clinic.com',
+            ssn_number='999-88-7777',
+            ssn_verified=True
+        )
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def migrate(self, *args):
+        out = StringIO()
+        call_command(
+            'migrate_ssn_data',
+            *args,
+            '--checkpoint-file', self.checkpoint,
+            stdout=out
+        )
+        return out.getvalue()
+
+    def test_forward_migrates_every_row_across_batches(self):
+        output = self.migrate('--batch-size', '2')
+
+        for patient in self.legacy:
+            patient.refresh_from_db()
+            self.assertEqual(patient.ssn_number, patient.ssn_legacy)
+            self.assertFalse(patient.ssn_verified)
+        self.assertIn('Successfully migrated 5 patients', output)
+        self.assertIn('rows/s', output)
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_dry_run_makes_no_changes(self):
+        output = self.migrate('--dry-run')
+
+        self.assertIn('Found 5 patients to migrate', output)
+        self.assertEqual(Patient.objects.filter(ssn_number='').count(), 5)
+
+    def test_rollback_restores_legacy_format(self):
+        self.migrate()
+        output = self.migrate('--rollback', '--batch-size', '3')
+
+        self.modern.refresh_from_db()
+        self.assertEqual(self.modern.ssn_legacy, '999-88-7777')
+        self.assertEqual(self.modern.ssn_number, '')
+        self.assertFalse(self.modern.ssn_verified)
+        self.assertFalse(
+            Patient.objects.exclude(ssn_number='').exists()
+        )
+        self.assertIn('Successfully rolled back 6', output)
+
+    def test_ssn_lookups_follow_migration_and_rollback(self):
+        both = Patient.objects.create(
+            email='both@clinic.com',
+            ssn_legacy='111-11-1111',
+            ssn_number='222-22-2222'
+        )
+
+        self.migrate()
+        for patient in self.legacy:
+            patient.refresh_from_db()
+            self.assertEqual(patient.ssn_number_hash, patient.ssn_hash)
+        self.assertEqual(Patient.objects.by_ssn('222222222').get(), both)
+
+        self.migrate('--rollback')
+        self.assertFalse(Patient.objects.by_ssn('222-22-2222').exists())
+        self.assertEqual(Patient.objects.by_ssn('111-11-1111').get(), both)
+        self.assertEqual(
+            Patient.objects.by_ssn('999-88-7777').get(),
+            self.modern
+        )
+        self.assertFalse(Patient.objects.exclude(ssn_number_hash='').exists())
+
+    def test_resumes_after_checkpoint(self):
+        migrate_range(self.legacy[0].id, self.legacy[2].id + 1)
+        with open(self.checkpoint, 'w') as f:
+            json.dump({
+                'direction': 'forward',
+                'last_id': self.legacy[2].id,
+                'processed': 3,
+            }, f)
+
+        output = self.migrate()
+
+        self.assertIn(f'Resuming after id {self.legacy[2].id}', output)
+        self.assertIn('Successfully migrated 5 patients', output)
+        self.assertNotIn('Migrated 1/5', output)
+        for patient in self.legacy:
+            patient.refresh_from_db()
+            self.assertEqual(patient.ssn_number, patient.ssn_legacy)
+
+    def test_checkpoint_for_other_direction_is_ignored(self):
+        with open(self.checkpoint, 'w') as f:
+            json.dump({
+                'direction': 'rollback',
+                'last_id': self.modern.id,
+                'processed': 1,
+            }, f)
+
+        self.migrate()
+
+        self.assertEqual(Patient.objects.filter(ssn_number='').count(), 0)
+
+
+class InlineExecutor:
+    def __init__(self, max_workers=None, mp_context=None):
+        self.max_workers = max_workers
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def submit(self, fn, *args):
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as exc:
+            future.set_exception(exc)
+        return future
+
+
+class ParallelMigrateSSNDataTests(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.checkpoint = os.path.join(self.tmpdir.name, 'checkpoint.json')
+        self.patients = [
+            Patient.objects.create(
+                email=f'shard{i}@hospital.com',
+                ssn_legacy=f'555-00-000{i}'
+            )
+            for i in range(6)
+        ]
+        patcher = mock.patch.object(Command, 'executor_class', InlineExecutor)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def migrate(self, *args):
+        out = StringIO()
+        call_command(
+            'migrate_ssn_data',
+            *args,
+            '--workers', '3',
+            '--checkpoint-file', self.checkpoint,
+            stdout=out,
+            stderr=StringIO()
+        )
+        return out.getvalue()
+
+    def test_split_ranges_are_disjoint_and_cover_id_space(self):
+        ranges = split_ranges(3, 11, 4)
+        self.assertEqual(ranges, [(3, 7), (7, 11), (11, 15)])
+
+    def test_workers_migrate_all_ranges_and_verify(self):
+        output = self.migrate('--batch-size', '2')
+
+        self.assertIn('with 3 workers', output)
+        self.assertIn('Verified: 6 legacy SSNs, 6 new-format SSNs', output)
+        self.assertFalse(
+            Patient.objects.filter(ssn_number='').exists()
+        )
+
+    def test_failed_range_is_retried(self):
+        calls = Counter()
+        original = migrate_range
+
+        def flaky(start, end):
+            calls[start] += 1
+            if calls[start] == 1 and start == self.patients[0].id:
+                raise RuntimeError('worker crashed')
+            return original(start, end)
+
+        with mock.patch.dict(DIRECTIONS, {
+            'forward': (FORWARD_PENDING, flaky, 'Migrated'),
+        }):
+            output = self.migrate('--batch-size', '2')
+
+        self.assertIn('Retrying range', output)
+        self.assertIn('Successfully migrated 6 patients', output)
+
+    def test_exhausted_retries_keep_checkpoint_and_fail(self):
+        def broken(start, end):
+            if start == self.patients[2].id:
+                raise RuntimeError('worker crashed')
+            return migrate_range(start, end)
+
+        with mock.patch.dict(DIRECTIONS, {
+            'forward': (FORWARD_PENDING, broken, 'Migrated'),
+        }):
+            with self.assertRaises(CommandError):
+                self.migrate('--batch-size', '2', '--max-retries', '1')
+
+        with open(self.checkpoint) as f:
+            checkpoint = json.load(f)
+        self.assertEqual(checkpoint['last_id'], self.patients[2].id - 1)
+
+    def test_locked_database_is_retried_inside_worker(self):
+        attempts = []
+
+        def locked_once(start, end):
+            attempts.append(start)
+            if len(attempts) == 1:
+                raise OperationalError('database is locked')
+            return 2
+
+        with mock.patch.dict(DIRECTIONS, {
+            'forward': (FORWARD_PENDING, locked_once, 'Migrated'),
+        }), mock.patch(
+            'apps.patients.management.commands.migrate_ssn_data.LOCK_BACKOFF',
+            0
+        ):
+            rows = run_range_task('forward', 1, 3)
+
+        self.assertEqual(rows, 2)
+        self.assertEqual(len(attempts), 2)
@@ -0,0 +1,125 @@
+from django.test import TestCase
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework import status
+from apps.core.models import ClientConfiguration
+from apps.patients.models import Patient
+from apps.records.models import MedicalRecord
+
+
+class PatientKeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.patients = [
+            Patient.objects.create(email=f'page{i}@clinic.com')
+            for i in range(5)
+        ]
+
+    def test_list_returns_envelope_with_next_cursor(self):
+        response = self.client.get(
+            '/api/patients/?page_size=2',
+            HTTP_X_CLIENT_ID='modern_clinic_1'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNotNone(response.data['next'])
+        self.assertIsNone(response.data['previous'])
+
+    def test_walking_cursors_visits_every_row_once(self):
+        seen = []
+        url = '/api/patients/?page_size=2'
+        while url:
+            response = self.client.get(url, HTTP_X_CLIENT_ID='modern_clinic_1')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+
+        expected = [p.id for p in reversed(self.patients)]
+        self.assertEqual(seen, expected)
+
+    def test_inserts_do_not_shift_following_pages(self):
+        response = self.client.get(
+            '/api/patients/?page_size=2',
+            HTTP_X_CLIENT_ID='modern_clinic_1'
+        )
+        next_url = response.data['next']
+        Patient.objects.create(email='late@clinic.com')
+
+        response = self.client.get(
+            next_url,
+            HTTP_X_CLIENT_ID='modern_clinic_1'
+        )
+        ids = [item['id'] for item in response.data['results']]
+        self.assertEqual(ids, [self.patients[2].id, self.patients[1].id])
+
+    def test_previous_cursor_returns_prior_page(self):
+        first = self.client.get(
+            '/api/patients/?page_size=2',
+            HTTP_X_CLIENT_ID='modern_clinic_1'
+        )
+        second = self.client.get(
+            first.data['next'],
+            HTTP_X_CLIENT_ID='modern_clinic_1'
+        )
+        back = self.client.get(
+            second.data['previous'],
+            HTTP_X_CLIENT_ID='modern_clinic_1'
+        )
+        self.assertEqual(back.data['results'], first.data['results'])
+
+    def test_invalid_cursor_returns_404(self):
+        response = self.client.get(
+            '/api/patients/?cursor=not-a-cursor',
+            HTTP_X_CLIENT_ID='modern_clinic_1'
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_array_mode_returns_bare_list_with_link_header(self):
+        ClientConfiguration.objects.create(
+            client_id='array_clinic_1',
+            client_type='modern_clinic',
+            config={'required_fields': ['email'], 'list_mode': 'array'}
+        )
+        response = self.client.get(
+            '/api/patients/?page_size=2',
+            HTTP_X_CLIENT_ID='array_clinic_1'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsInstance(response.data, list)
+        self.assertEqual(len(response.data), 2)
+        self.assertIn('rel="next"', response['Link'])
+
+
+class RecordKeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='pager',
+            password='test123'
+        )
+        self.client.force_authenticate(user=self.user)
+        patient = Patient.objects.create(email='records@clinic.com')
+        self.records = [
+            MedicalRecord.objects.create(
+                patient=patient,
+                diagnosis=f'Diagnosis {i}'
+            )
+            for i in range(3)
+        ]
+
+    def test_records_list_is_paginated(self):
+        response = self.client.get(
+            '/api/records/?page_size=2',
+            HTTP_X_CLIENT_ID='modern_clinic_1'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        ids = [item['id'] for item in response.data['results']]
+        self.assertEqual(ids, [self.records[2].id, self.records[1].id])
+
+        response = self.client.get(
+            response.data['next'],
+            HTTP_X_CLIENT_ID='modern_clinic_1'
+        )
+        ids = [item['id'] for item in response.data['results']]
+        self.assertEqual(ids, [self.records[0].id])
+        self.assertIsNone(response.data['next'])
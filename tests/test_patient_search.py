@@ -0,0 +1,355 @@
+from datetime import date
+from io import StringIO
+from unittest import skipUnless
+from django.core.management import call_command
+from django.db import connection
+from django.http import QueryDict
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework import status
+from apps.patients.models import Patient
+from apps.patients.search import search_patients
+from apps.patients.search_keys import (
+    normalize_name,
+    phonetic_key,
+    prefix_upper_bound,
+    ssn_hash,
+)
+
+
+class SearchKeyTests(TestCase):
+    def test_normalize_name_strips_accents_case_and_punctuation(self):
+        self.assertEqual(normalize_name("  O'Brién-Núñez "), 'obriennunez')
+
+    def test_phonetic_key_matches_similar_spellings(self):
+        self.assertEqual(phonetic_key('Smith'), phonetic_key('Smyth'))
+        self.assertEqual(phonetic_key('Ashcraft'), 'A261')
+        self.assertEqual(phonetic_key('Tymczak'), 'T522')
+        self.assertEqual(phonetic_key('123'), '')
+
+    def test_prefix_upper_bound(self):
+        self.assertEqual(prefix_upper_bound('smi'), 'smj')
+        self.assertEqual(prefix_upper_bound('a\U0010ffff'), 'b')
+        self.assertIsNone(prefix_upper_bound(''))
+
+    def test_keys_are_maintained_on_save(self):
+        patient = Patient.objects.create(
+            email='Zoë.Smith@Example.com',
+            first_name='Zoë',
+            last_name='Smith'
+        )
+        self.assertEqual(
+            (patient.first_name_key, patient.last_name_key, patient.email_key),
+            ('zoe', 'smith', 'zoe.smith@example.com')
+        )
+
+        patient.last_name = 'Brown'
+        patient.save(update_fields=['last_name'])
+        patient.refresh_from_db()
+        self.assertEqual(patient.last_name_key, 'brown')
+        self.assertEqual(patient.last_name_phonetic, 'B650')
+
+
+class PatientSearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.smith = Patient.objects.create(
+            email='john.smith@hospital.com',
+            first_name='John',
+            last_name='Smith',
+            date_of_birth=date(1980, 1, 1)
+        )
+        self.smyth = Patient.objects.create(
+            email='jane.smyth@clinic.com',
+            first_name='Jane',
+            last_name='Smyth',
+            date_of_birth=date(1975, 6, 30)
+        )
+        self.nunez = Patient.objects.create(
+            email='maria@clinic.com',
+            first_name='María',
+            last_name='Núñez',
+            date_of_birth=date(1980, 1, 1)
+        )
+
+    def search(self, query, client_id='modern_clinic_1'):
+        response = self.client.get(
+            f'/api/patients/search/?{query}',
+            HTTP_X_CLIENT_ID=client_id
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [patient['id'] for patient in response.data['results']]
+
+    def test_last_name_prefix(self):
+        self.assertEqual(
+            self.search('last_name=smi&fuzzy=false'),
+            [self.smith.id]
+        )
+
+    def test_typo_tolerant_name_match(self):
+        self.assertEqual(
+            self.search('last_name=Smithe'),
+            [self.smith.id, self.smyth.id]
+        )
+
+    def test_accents_are_ignored(self):
+        self.assertEqual(self.search('last_name=nunez'), [self.nunez.id])
+        self.assertEqual(self.search('first_name=MARIA'), [self.nunez.id])
+
+    def test_email_prefix_is_case_insensitive(self):
+        self.assertEqual(self.search('email=JOHN.S'), [self.smith.id])
+
+    def test_date_of_birth_combines_with_name(self):
+        self.assertEqual(
+            self.search('date_of_birth=1980-01-01'),
+            [self.nunez.id, self.smith.id]
+        )
+        self.assertEqual(
+            self.search('date_of_birth=1980-01-01&last_name=sm'),
+            [self.smith.id]
+        )
+
+    def test_limit(self):
+        results = self.search('date_of_birth=1980-01-01&limit=1')
+        self.assertEqual(len(results), 1)
+
+    def test_serializes_with_the_client_variant(self):
+        response = self.client.get(
+            '/api/patients/search/?last_name=smith&fields=id,email',
+            HTTP_X_CLIENT_ID='mobile_app_1'
+        )
+        self.assertEqual(
+            response.data['results'][0],
+            {'id': self.smith.id, 'email': 'john.smith@hospital.com'}
+        )
+        self.assertNotIn('last_name_key', self.client.get(
+            f'/api/patients/{self.smith.id}/',
+            HTTP_X_CLIENT_ID='modern_clinic_1'
+        ).data)
+
+    def test_rejects_invalid_parameters(self):
+        for query in ['', 'last_name=---', 'date_of_birth=1980-13-01',
+                      'date_of_birth=yesterday', 'email=a&limit=x']:
+            with self.subTest(query=query):
+                response = self.client.get(
+                    f'/api/patients/search/?{query}',
+                    HTTP_X_CLIENT_ID='modern_clinic_1'
+                )
+                self.assertEqual(
+                    response.status_code,
+                    status.HTTP_400_BAD_REQUEST
+                )
+
+    def test_rejects_blank_email(self):
+        response = self.client.get(
+            '/api/patients/search/?email=%20',
+            HTTP_X_CLIENT_ID='modern_clinic_1'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('email', response.data)
+
+
+@skipUnless(
+    connection.vendor in ('sqlite', 'postgresql'),
+    'Search key plans are checked on SQLite and PostgreSQL'
+)
+class PatientSearchIndexTests(TestCase):
+    def explain(self, query):
+        queryset = search_patients(Patient.objects.all(), QueryDict(query))
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.explain()
+
+    def test_name_prefix_uses_key_index(self):
+        plan = self.explain('last_name=smi&fuzzy=false')
+        self.assertIn('patients_last_name_key_idx', plan)
+
+    def test_fuzzy_name_uses_key_and_phonetic_indexes(self):
+        plan = self.explain('last_name=smith')
+        self.assertIn('patients_last_name_key_idx', plan)
+        self.assertIn('patients_phonetic_idx', plan)
+
+    def test_email_prefix_uses_key_index(self):
+        self.assertIn('patients_email_key_idx', self.explain('email=john'))
+
+    def test_date_of_birth_uses_index(self):
+        self.assertIn(
+            'patients_dob_last_name_idx',
+            self.explain('date_of_birth=1980-01-01')
+        )
+
+
+class BackfillPatientKeysTests(TestCase):
+    def test_backfills_missing_keys_in_batches(self):
+        patients = [
+            Patient.objects.create(
+                email=f'Backfill{i}@Example.com',
+                first_name='Renée',
+                last_name=f'Smith{i}'
+            )
+            for i in range(5)
+        ]
+        Patient.objects.update(
+            first_name_key='',
+            last_name_key='',
+            first_name_phonetic='',
+            last_name_phonetic='',
+            email_key=''
+        )
+
+        out = StringIO()
+        call_command('backfill_patient_keys', '--batch-size', '2', stdout=out)
+
+        for i, patient in enumerate(patients):
+            patient.refresh_from_db()
+            self.assertEqual(patient.first_name_key, 'renee')
+            self.assertEqual(patient.last_name_key, f'smith{i}')
+            self.assertEqual(patient.email_key, f'backfill{i}@example.com')
+        self.assertIn('Successfully backfilled 5 search keys', out.getvalue())
+
+        out = StringIO()
+        call_command('backfill_patient_keys', 'search', stdout=out)
+        self.assertIn('Found 0 patients', out.getvalue())
+
+
+class SsnLookupTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.legacy = Patient.objects.create(
+            email='legacy@hospital.com',
+            ssn_legacy='123-45-6789'
+        )
+        self.modern = Patient(email='modern@clinic.com')
+        self.modern.set_ssn_from_object({'number': '987654321'})
+        self.modern.save()
+
+    def lookup(self, data, client_id='modern_clinic_1'):
+        return self.client.post(
+            '/api/patients/ssn-lookup/',
+            data,
+            format='json',
+            HTTP_X_CLIENT_ID=client_id
+        )
+
+    def test_hash_ignores_formatting_and_hides_the_ssn(self):
+        self.assertEqual(ssn_hash('123-45-6789'), ssn_hash(' 123 45 6789'))
+        self.assertEqual(len(self.legacy.ssn_hash), 64)
+        self.assertNotIn('6789', self.legacy.ssn_hash)
+        self.assertEqual(ssn_hash(''), '')
+
+    @override_settings(PATIENT_SSN_HASH_KEY='another-key')
+    def test_hash_is_keyed(self):
+        self.assertNotEqual(ssn_hash('123-45-6789'), self.legacy.ssn_hash)
+
+    def test_by_ssn_matches_either_storage_format(self):
+        self.assertEqual(
+            list(Patient.objects.by_ssn('123456789')),
+            [self.legacy]
+        )
+        self.assertEqual(
+            list(Patient.objects.by_ssn('987-65-4321')),
+            [self.modern]
+        )
+        self.assertFalse(Patient.objects.by_ssn('n/a').exists())
+
+    def test_by_ssn_matches_both_values_when_they_differ(self):
+        self.legacy.set_ssn_from_object({'number': '111-22-3333'})
+        self.legacy.save()
+
+        for ssn in ('123-45-6789', '111-22-3333'):
+            with self.subTest(ssn=ssn):
+                self.assertEqual(
+                    list(Patient.objects.by_ssn(ssn)),
+                    [self.legacy]
+                )
+        self.assertEqual(self.modern.ssn_number_hash, '')
+
+    def test_hash_follows_ssn_updates(self):
+        self.legacy.set_ssn_from_object({'number': '111-22-3333'})
+        self.legacy.save(update_fields=['ssn_number'])
+        self.legacy.refresh_from_db()
+        self.assertEqual(self.legacy.ssn_hash, ssn_hash('123456789'))
+        self.assertEqual(self.legacy.ssn_number_hash, ssn_hash('111223333'))
+
+        self.legacy.ssn_legacy = ''
+        self.legacy.save(update_fields=['ssn_legacy'])
+        self.assertTrue(Patient.objects.by_ssn('111223333').exists())
+        self.assertFalse(Patient.objects.by_ssn('123456789').exists())
+
+    def test_lookup_endpoint(self):
+        response = self.lookup({'ssn': '123 45 6789'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [patient['id'] for patient in response.data['results']],
+            [self.legacy.id]
+        )
+        self.assertNotIn('ssn_hash', response.data['results'][0])
+
+        response = self.lookup({'ssn': '000-00-0000'})
+        self.assertEqual(response.data['results'], [])
+
+    def test_lookup_requires_digits(self):
+        for data in [{}, {'ssn': '---'}, {'ssn': 123456789}, ['123']]:
+            with self.subTest(data=data):
+                response = self.lookup(data)
+                self.assertEqual(
+                    response.status_code,
+                    status.HTTP_400_BAD_REQUEST
+                )
+
+    def test_bulk_create_sets_hash(self):
+        response = self.client.post(
+            '/api/patients/bulk/',
+            [{'email': 'bulk@clinic.com', 'ssn': '555-66-7777'}],
+            format='json',
+            HTTP_X_CLIENT_ID='modern_clinic_1'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            Patient.objects.by_ssn('555667777').get().email,
+            'bulk@clinic.com'
+        )
+
+    def test_backfill_ssn_group(self):
+        self.legacy.set_ssn_from_object({'number': '111-22-3333'})
+        self.legacy.save()
+        Patient.objects.update(ssn_hash='', ssn_number_hash='')
+        out = StringIO()
+        call_command('backfill_patient_keys', 'ssn', stdout=out)
+
+        self.assertIn('Successfully backfilled 2 ssn keys', out.getvalue())
+        for ssn in ('123456789', '111223333'):
+            self.assertEqual(Patient.objects.by_ssn(ssn).get(), self.legacy)
+
+        Patient.objects.update(ssn_number_hash='')
+        out = StringIO()
+        call_command('backfill_patient_keys', 'ssn', stdout=out)
+        self.assertIn('Successfully backfilled 1 ssn keys', out.getvalue())
+
+    def test_backfill_clears_stale_number_hashes(self):
+        # A bulk update that clears ssn_number leaves its hash behind.
+        Patient.objects.filter(pk=self.modern.pk).update(
+            ssn_legacy='111-22-3333',
+            ssn_number='',
+            ssn_hash=ssn_hash('111-22-3333'),
+            ssn_number_hash=ssn_hash('987654321')
+        )
+        self.assertTrue(Patient.objects.by_ssn('987654321').exists())
+
+        out = StringIO()
+        call_command('backfill_patient_keys', 'ssn', stdout=out)
+
+        self.assertIn('Successfully backfilled 1 ssn keys', out.getvalue())
+        self.assertFalse(Patient.objects.by_ssn('987654321').exists())
+        self.assertEqual(
+            Patient.objects.by_ssn('111223333').get(),
+            self.modern
+        )
+
+    def test_lookup_uses_hash_index(self):
+        plan = Patient.objects.by_ssn('123456789').explain()
+        if connection.vendor == 'sqlite':
+            self.assertIn('patients_ssn_hash_idx', plan)
+            self.assertIn('patients_ssn_number_hash_idx', plan)
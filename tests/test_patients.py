@@ -1,7 +1,16 @@
-from django.test import TestCase
-from rest_framework.test import APIClient
+import math
+from datetime import date
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
 from rest_framework import status
 from apps.patients.models import Patient
+from apps.patients.plans import get_plan
+from apps.patients.serializers import PatientSerializerV1, PatientSerializerV2
 
 
 class LegacyHospitalPatientTests(TestCase):
@@ -172,4 +181,256 @@ class BackwardCompatibilityTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIsInstance(response.data['ssn'], dict)
         self.assertEqual(response.data['ssn']['number'], '888-99-0000')
-        self.assertFalse(response.data['ssn']['verified'])
\ No newline at end of file
+        self.assertFalse(response.data['ssn']['verified'])
+
+
+class CompiledSerializerPlanTests(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.patients = [
+            Patient.objects.create(
+                email='plan-legacy@test.com',
+                first_name='Ana',
+                date_of_birth=date(1980, 1, 2),
+                ssn_legacy='123-45-6789'
+            ),
+            Patient.objects.create(
+                email='plan-modern@test.com',
+                last_name='Núñez',
+                ssn_number='987-65-4321',
+                ssn_verified=True,
+                ssn_verification_date=date(2024, 1, 15)
+            ),
+            Patient.objects.create(email='plan-empty@test.com'),
+        ]
+
+    def make_request(self, version, client_type, fields=None):
+        params = {'fields': fields} if fields else {}
+        request = Request(self.factory.get('/api/patients/', params))
+        request.version = version
+        request.client_type = client_type
+        request.client_id = f'{client_type}_1'
+        return request
+
+    def test_plans_render_identically_to_serializers(self):
+        variants = [
+            (version, client_type, fields)
+            for version in ('v1', 'v2', 'v3')
+            for client_type in ('legacy_hospital', 'modern_clinic',
+                                'mobile_app')
+            for fields in (None, 'id,email,ssn', 'first_name,created_at')
+        ]
+        renderer = JSONRenderer()
+
+        for version, client_type, fields in variants:
+            with self.subTest(version=version, client=client_type,
+                              fields=fields):
+                request = self.make_request(version, client_type, fields)
+                serializer_class = (
+                    PatientSerializerV1 if version == 'v1'
+                    else PatientSerializerV2
+                )
+                expected = serializer_class(
+                    self.patients,
+                    many=True,
+                    context={'request': request}
+                ).data
+                plan = get_plan(serializer_class, request)
+                actual = [plan(patient) for patient in self.patients]
+
+                self.assertEqual(
+                    renderer.render(actual),
+                    renderer.render(expected)
+                )
+
+    def test_plan_is_compiled_once_per_variant(self):
+        first = get_plan(
+            PatientSerializerV1,
+            self.make_request('v1', 'mobile_app', 'id,email')
+        )
+        second = get_plan(
+            PatientSerializerV1,
+            self.make_request('v1', 'mobile_app', 'email,id')
+        )
+        other = get_plan(
+            PatientSerializerV1,
+            self.make_request('v1', 'legacy_hospital')
+        )
+
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+        self.assertEqual(first.field_names, ('id', 'email'))
+
+
+class BulkPatientCreateTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def post_bulk(self, items, client_id='legacy_hospital_1', version='v1'):
+        return self.client.post(
+            '/api/patients/bulk/',
+            items,
+            format='json',
+            HTTP_X_CLIENT_ID=client_id,
+            HTTP_ACCEPT=f'application/json; version={version}'
+        )
+
+    def legacy_payload(self, i, **overrides):
+        payload = {
+            'email': f'bulk{i}@hospital.com',
+            'first_name': 'John',
+            'last_name': f'Doe{i}',
+            'date_of_birth': '1980-01-01',
+            'phone': '555-0100',
+            'ssn': f'123-45-{i:04d}',
+        }
+        payload.update(overrides)
+        return payload
+
+    def test_creates_all_valid_patients_with_ssn(self):
+        response = self.post_bulk([self.legacy_payload(i) for i in range(3)])
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created'], 3)
+        self.assertEqual(
+            [result['data']['ssn'] for result in response.data['results']],
+            ['123-45-0000', '123-45-0001', '123-45-0002']
+        )
+        patient = Patient.objects.get(email='bulk1@hospital.com')
+        self.assertEqual(patient.ssn_legacy, '123-45-0001')
+        self.assertEqual(response.data['results'][1]['data']['id'], patient.id)
+
+    def test_reports_per_item_errors(self):
+        Patient.objects.create(email='taken@hospital.com')
+        items = [
+            self.legacy_payload(0),
+            {'email': 'incomplete@hospital.com'},
+            self.legacy_payload(2, email='taken@hospital.com'),
+            self.legacy_payload(3, email='bulk0@hospital.com'),
+            'not-an-object',
+        ]
+
+        response = self.post_bulk(items)
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['failed'], 4)
+        results = response.data['results']
+        self.assertEqual(
+            [result['index'] for result in results],
+            [0, 1, 2, 3, 4]
+        )
+        self.assertEqual(results[0]['status'], 201)
+        self.assertIn('first_name', results[1]['errors'])
+        self.assertEqual(
+            results[2]['errors']['email'],
+            ['patient with this email already exists.']
+        )
+        self.assertEqual(
+            results[3]['errors']['email'],
+            ['patient with this email already exists.']
+        )
+        self.assertIn('non_field_errors', results[4]['errors'])
+        self.assertEqual(Patient.objects.count(), 2)
+
+    def test_applies_structured_ssn_for_v2(self):
+        items = [
+            {
+                'email': 'v2@clinic.com',
+                'ssn': {
+                    'number': '111-22-3333',
+                    'verified': True,
+                    'verification_date': '2024-01-15',
+                },
+            },
+            {
+                'email': 'bad-date@clinic.com',
+                'ssn': {'number': '1', 'verification_date': 'not a date'},
+            },
+        ]
+
+        response = self.post_bulk(items, 'modern_clinic_1', 'v2')
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(
+            response.data['results'][0]['data']['ssn'],
+            {
+                'number': '111-22-3333',
+                'verified': True,
+                'verification_date': '2024-01-15',
+            }
+        )
+        self.assertIn('ssn', response.data['results'][1]['errors'])
+        patient = Patient.objects.get(email='v2@clinic.com')
+        self.assertEqual(patient.ssn_verification_date, date(2024, 1, 15))
+
+    def test_rejects_malformed_ssn_per_item(self):
+        items = [
+            {'email': 'number@clinic.com', 'ssn': {'number': 123456789}},
+            {
+                'email': 'date@clinic.com',
+                'ssn': {'number': '1', 'verification_date': 20240101},
+            },
+            {'email': 'long@clinic.com', 'ssn': {'number': '1' * 50}},
+            {'email': 'list@clinic.com', 'ssn': ['123-45-6789']},
+            {'email': 'ok@clinic.com', 'ssn': {'number': '111-22-3333'}},
+        ]
+
+        response = self.post_bulk(items, 'modern_clinic_1', 'v2')
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(
+            [result['status'] for result in response.data['results']],
+            [400, 400, 400, 400, 201]
+        )
+        for result in response.data['results'][:4]:
+            self.assertIn('ssn', result['errors'])
+        self.assertEqual(
+            list(Patient.objects.values_list('email', flat=True)),
+            ['ok@clinic.com']
+        )
+
+    def test_query_count_only_grows_with_insert_batches(self):
+        def count_queries(prefix, size):
+            items = [
+                self.legacy_payload(i, email=f'{prefix}{i}@hospital.com')
+                for i in range(size)
+            ]
+            with CaptureQueriesContext(connection) as queries:
+                response = self.post_bulk(items)
+            self.assertEqual(response.data['created'], size)
+            return len(queries)
+
+        def insert_batches(size):
+            # The backend caps bulk_create batches by its parameter limit.
+            fields = [
+                field for field in Patient._meta.concrete_fields
+                if not field.primary_key
+            ]
+            batch_size = min(
+                settings.PATIENT_BULK_BATCH_SIZE,
+                connection.ops.bulk_batch_size(fields, [Patient()] * size)
+            )
+            return math.ceil(size / batch_size)
+
+        count_queries('warm', 1)
+        self.assertEqual(
+            count_queries('big', 50) - count_queries('small', 3),
+            insert_batches(50) - insert_batches(3)
+        )
+
+    def test_rejects_invalid_payloads(self):
+        self.assertEqual(
+            self.post_bulk({'email': 'one@hospital.com'}).status_code,
+            status.HTTP_400_BAD_REQUEST
+        )
+        self.assertEqual(
+            self.post_bulk([]).status_code,
+            status.HTTP_400_BAD_REQUEST
+        )
+        with override_settings(PATIENT_BULK_MAX_ITEMS=2):
+            response = self.post_bulk(
+                [self.legacy_payload(i) for i in range(3)]
+            )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Patient.objects.exists())
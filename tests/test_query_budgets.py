@@ -0,0 +1,184 @@
+from unittest import mock
+from django.conf import settings
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from apps.core.query_budget import (
+    QueryBudgetExceeded,
+    query_budget,
+    resolve_budget,
+    sql_shape,
+)
+from apps.patients.models import Patient
+from apps.patients.views import PatientViewSet
+from apps.records.models import MedicalRecord
+from apps.records.views import MedicalRecordViewSet
+
+CLIENT_IDS = {
+    settings.CLIENT_TYPES['LEGACY_HOSPITAL']: 'legacy_hospital_1',
+    settings.CLIENT_TYPES['MODERN_CLINIC']: 'modern_clinic_1',
+    settings.CLIENT_TYPES['MOBILE_APP']: 'mobile_app_1',
+}
+VERSIONS = settings.REST_FRAMEWORK['ALLOWED_VERSIONS']
+ENDPOINTS = {
+    'patients': (PatientViewSet, '/api/patients/'),
+    'records': (MedicalRecordViewSet, '/api/records/'),
+}
+
+
+class QueryBudgetMatrixTests(TestCase):
+    """Every endpoint, client type and version stays within its budget.
+
+    Each test serves ten patients with two records each, so a query per
+    row trips both the budget and the repeated-shape check.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        for index in range(10):
+            patient = Patient.objects.create(
+                email=f'budget{index}@clinic.com',
+                first_name='Budget',
+                ssn_legacy='123-45-6789'
+            )
+            for _ in range(2):
+                MedicalRecord.objects.create(
+                    patient=patient,
+                    record_type='lab_result',
+                    diagnosis='Budget check'
+                )
+        cls.ids = {
+            'patients': Patient.objects.first().id,
+            'records': MedicalRecord.objects.first().id,
+        }
+
+    def assert_within_budget(self, endpoint, action, client_type, version):
+        view, url = ENDPOINTS[endpoint]
+        if action == 'retrieve':
+            url = f'{url}{self.ids[endpoint]}/'
+        budget = resolve_budget(
+            view.query_budgets, action, client_type, version
+        )
+        self.assertIsNotNone(budget)
+
+        client = APIClient()
+        with query_budget(budget, label=f'{url} {client_type} {version}'):
+            response = client.get(
+                url,
+                HTTP_X_CLIENT_ID=CLIENT_IDS[client_type],
+                HTTP_ACCEPT=f'application/json; version={version}'
+            )
+            if response.streaming:
+                b''.join(response.streaming_content)
+        self.assertEqual(response.status_code, 200)
+
+
+def _make_matrix_test(endpoint, action, client_type, version):
+    def test(self):
+        self.assert_within_budget(endpoint, action, client_type, version)
+    return test
+
+
+for _endpoint in ENDPOINTS:
+    for _action in ('list', 'retrieve'):
+        for _client_type in CLIENT_IDS:
+            for _version in VERSIONS:
+                setattr(
+                    QueryBudgetMatrixTests,
+                    f'test_{_endpoint}_{_action}_{_client_type}_{_version}',
+                    _make_matrix_test(
+                        _endpoint, _action, _client_type, _version
+                    )
+                )
+
+
+class QueryBudgetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        for index in range(6):
+            patient = Patient.objects.create(email=f'n{index}@clinic.com')
+            MedicalRecord.objects.create(patient=patient, diagnosis='x')
+
+    def get_records_with_n_plus_one(self):
+        def serialize_list(view, objects):
+            return [
+                {
+                    'id': record.id,
+                    'patients': Patient.objects.filter(
+                        records__id=record.id
+                    ).count(),
+                }
+                for record in objects
+            ]
+
+        with mock.patch.object(
+            MedicalRecordViewSet, 'serialize_list', serialize_list
+        ):
+            return self.client.get(
+                '/api/records/',
+                HTTP_X_CLIENT_ID='modern_clinic_1'
+            )
+
+    def test_sql_shape_ignores_literals_and_in_list_length(self):
+        self.assertEqual(
+            sql_shape('SELECT * FROM t WHERE id IN (%s, %s) LIMIT 21'),
+            sql_shape('SELECT * FROM t WHERE id IN (%s) LIMIT 5')
+        )
+        self.assertEqual(
+            sql_shape("SELECT 'a' FROM t0 WHERE x = 1"),
+            "SELECT ? FROM t0 WHERE x = ?"
+        )
+
+    def test_resolve_budget_prefers_the_most_specific_key(self):
+        budgets = {
+            'list': 5,
+            ('list', 'mobile_app'): 4,
+            ('list', '*', 'v3'): 3,
+            ('list', 'mobile_app', 'v3'): 2,
+        }
+        self.assertEqual(
+            resolve_budget(budgets, 'list', 'mobile_app', 'v3'), 2
+        )
+        self.assertEqual(
+            resolve_budget(budgets, 'list', 'modern_clinic', 'v3'), 3
+        )
+        self.assertEqual(
+            resolve_budget(budgets, 'list', 'mobile_app', 'v1'), 4
+        )
+        self.assertEqual(
+            resolve_budget(budgets, 'list', 'modern_clinic', 'v1'), 5
+        )
+        self.assertIsNone(resolve_budget(budgets, 'create', '', 'v1'))
+
+    def test_context_manager_flags_repeated_queries(self):
+        with self.assertRaisesRegex(QueryBudgetExceeded, 'shaped like'):
+            with query_budget(100, repeat_threshold=5):
+                for patient in Patient.objects.all():
+                    patient.records.first()
+
+    def test_context_manager_flags_too_many_queries(self):
+        with self.assertRaisesRegex(QueryBudgetExceeded, '2 queries'):
+            with query_budget(1):
+                Patient.objects.count()
+                MedicalRecord.objects.count()
+
+    def test_middleware_fails_tests_on_n_plus_one(self):
+        with self.assertRaisesRegex(
+            QueryBudgetExceeded,
+            r'MedicalRecordViewSet\.list \(modern_clinic, v1\)'
+        ):
+            with self.assertLogs('apps.core.query_budget', 'WARNING'):
+                self.get_records_with_n_plus_one()
+
+    @override_settings(QUERY_BUDGET_RAISE=False)
+    def test_middleware_only_logs_in_production(self):
+        with self.assertLogs('apps.core.query_budget', 'WARNING') as logs:
+            response = self.get_records_with_n_plus_one()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('"budget": 5', logs.output[0])
+
+    @override_settings(QUERY_BUDGET_SAMPLE_RATE=0.0)
+    def test_unsampled_requests_are_not_checked(self):
+        with self.assertNoLogs('apps.core.query_budget'):
+            response = self.get_records_with_n_plus_one()
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,155 @@
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework import status
+from apps.core.models import ClientConfiguration
+from apps.core.ratelimit import RateLimiter, TokenBucket, rate_limiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TokenBucketTests(TestCase):
+    def test_refills_at_limit_per_period(self):
+        bucket = TokenBucket(3, 60, now=0)
+
+        self.assertEqual([bucket.take(0) for _ in range(3)], [0, 0, 0])
+        self.assertAlmostEqual(bucket.take(0), 20)
+        self.assertAlmostEqual(bucket.take(5), 15)
+        self.assertEqual(bucket.take(20), 0)
+        self.assertEqual(bucket.pending, 4)
+
+    def test_missing_limit_is_unlimited(self):
+        bucket = TokenBucket(None, 60, now=0)
+        self.assertEqual([bucket.take(0) for _ in range(100)], [0] * 100)
+
+
+class RateLimiterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.clock = FakeClock()
+        patcher = mock.patch('apps.core.ratelimit.time.monotonic', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def make_limiter(self, sync_interval=1.0, max_clients=100):
+        return RateLimiter(
+            period=60,
+            sync_interval=sync_interval,
+            max_clients=max_clients,
+            namespace='test-ratelimit'
+        )
+
+    def test_limits_each_client_separately(self):
+        limiter = self.make_limiter()
+        for _ in range(2):
+            self.assertEqual(limiter.check('a', lambda: 2), 0)
+        self.assertGreater(limiter.check('a', lambda: 2), 0)
+        self.assertEqual(limiter.check('b', lambda: 2), 0)
+        self.assertEqual(
+            limiter.stats(),
+            {'allowed': 3, 'throttled': 1, 'syncs': 0, 'sync_errors': 0,
+             'clients': 2}
+        )
+
+    def test_reads_the_limit_only_for_new_clients_and_syncs(self):
+        limiter = self.make_limiter()
+        load_limit = mock.Mock(return_value=100)
+        for _ in range(10):
+            limiter.check('a', load_limit)
+        self.assertEqual(load_limit.call_count, 1)
+
+        self.clock.now += 1
+        limiter.check('a', load_limit)
+        self.assertEqual(load_limit.call_count, 2)
+
+    def test_workers_share_one_global_budget(self):
+        first = self.make_limiter(sync_interval=0)
+        second = self.make_limiter(sync_interval=0)
+        self.assertEqual(second.check('a', lambda: 10), 0)
+        for _ in range(8):
+            self.assertEqual(first.check('a', lambda: 10), 0)
+
+        # The second worker learns about the first one's 8 requests on
+        # its next sync, so only the last of the 10 tokens is left.
+        admitted = sum(
+            1 for _ in range(5) if second.check('a', lambda: 10) == 0
+        )
+        self.assertEqual(admitted, 1)
+        self.assertEqual(cache.get('test-ratelimit:a'), 10)
+
+    def test_limit_changes_apply_on_sync(self):
+        limiter = self.make_limiter()
+        limiter.check('a', lambda: 100)
+
+        self.clock.now += 1
+        self.assertEqual(limiter.check('a', lambda: 1), 0)
+        self.assertEqual(limiter.check('a', lambda: 1), 0)
+        self.assertGreater(limiter.check('a', lambda: 1), 0)
+
+    def test_shared_store_errors_fall_back_to_local_limits(self):
+        limiter = self.make_limiter(sync_interval=0)
+        with mock.patch.object(cache, 'incr', side_effect=ConnectionError):
+            with self.assertLogs('apps.core.ratelimit', 'WARNING'):
+                results = [limiter.check('a', lambda: 2) for _ in range(3)]
+
+        self.assertEqual(results[:2], [0, 0])
+        self.assertGreater(results[2], 0)
+        self.assertEqual(limiter.stats()['sync_errors'], 3)
+        self.assertEqual(limiter.buckets['a'].pending, 2)
+
+    def test_evicts_least_recently_seen_clients(self):
+        limiter = self.make_limiter(max_clients=2)
+        for client_id in ('a', 'b', 'a', 'c'):
+            limiter.check(client_id, lambda: 10)
+        self.assertEqual(list(limiter.buckets), ['a', 'c'])
+
+
+@override_settings(RATE_LIMIT_ENABLED=True)
+class RateLimitMiddlewareTests(TestCase):
+    def setUp(self):
+        rate_limiter.reset()
+        self.addCleanup(rate_limiter.reset)
+        self.client = APIClient()
+        ClientConfiguration.objects.create(
+            client_id='throttled_clinic',
+            client_type='modern_clinic',
+            config={'required_fields': ['email'], 'rate_limit': 2}
+        )
+
+    def get(self, client_id):
+        return self.client.get(
+            '/api/patients/',
+            HTTP_X_CLIENT_ID=client_id
+        )
+
+    def test_returns_429_with_retry_after(self):
+        for _ in range(2):
+            self.assertEqual(
+                self.get('throttled_clinic').status_code,
+                status.HTTP_200_OK
+            )
+
+        response = self.get('throttled_clinic')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '30')
+        self.assertIn('throttled', response.json()['detail'])
+
+        self.assertEqual(
+            self.get('modern_clinic_1').status_code,
+            status.HTTP_200_OK
+        )
+
+    @override_settings(RATE_LIMIT_ENABLED=False)
+    def test_can_be_disabled(self):
+        for _ in range(3):
+            self.assertEqual(
+                self.get('throttled_clinic').status_code,
+                status.HTTP_200_OK
+            )
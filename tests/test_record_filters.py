@@ -0,0 +1,146 @@
+from datetime import timedelta
+from unittest import skipUnless
+from django.db import connection
+from django.http import QueryDict
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from apps.patients.models import Patient
+from apps.records.filters import filter_records
+from apps.records.models import MedicalRecord
+
+
+class RecordFilterTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.patient = Patient.objects.create(email='filters@clinic.com')
+        self.hba1c = self.create('lab_result', test_name='HbA1c',
+                                 results={'value': 6.4, 'unit': '%'})
+        self.old_hba1c = self.create('lab_result', test_name='HbA1c',
+                                     results={'value': 7.9, 'unit': '%'})
+        MedicalRecord.objects.filter(pk=self.old_hba1c.pk).update(
+            created_at=timezone.now() - timedelta(days=120)
+        )
+        self.lipids = self.create('lab_result', test_name='Lipid panel',
+                                  results={'value': 'n/a'})
+        self.aspirin = self.create('prescription', medication='Aspirin')
+
+    def create(self, record_type, **flexible_data):
+        return MedicalRecord.objects.create(
+            patient=self.patient,
+            record_type=record_type,
+            flexible_data=flexible_data
+        )
+
+    def list_ids(self, query):
+        response = self.client.get(
+            f'/api/records/?{query}',
+            HTTP_X_CLIENT_ID='modern_clinic_1'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [record['id'] for record in response.data['results']]
+
+    def test_filters_by_data_key_and_created_at(self):
+        since = (timezone.now() - timedelta(days=90)).date().isoformat()
+
+        self.assertEqual(
+            self.list_ids(
+                'record_type=lab_result&data.test_name=HbA1c'
+                f'&created_after={since}'
+            ),
+            [self.hba1c.id]
+        )
+        self.assertEqual(
+            self.list_ids('record_type=lab_result&data.test_name=HbA1c'),
+            [self.hba1c.id, self.old_hba1c.id]
+        )
+
+    def test_filters_numeric_ranges_and_skips_non_numeric_values(self):
+        self.assertEqual(
+            self.list_ids(
+                'record_type=lab_result&data.result_value__gte=6'
+                '&data.result_value__lt=7'
+            ),
+            [self.hba1c.id]
+        )
+        self.assertEqual(
+            self.list_ids('record_type=lab_result&data.result_value__gt=0'),
+            [self.hba1c.id, self.old_hba1c.id]
+        )
+
+    def test_filters_by_record_type(self):
+        self.assertEqual(
+            self.list_ids('record_type=prescription&data.medication=Aspirin'),
+            [self.aspirin.id]
+        )
+        self.assertEqual(
+            self.list_ids('record_type=prescription'),
+            [self.aspirin.id]
+        )
+
+    def test_rejects_invalid_filters(self):
+        for query in [
+            'data.test_name=HbA1c',
+            'record_type=lab_result&data.medication=Aspirin',
+            'record_type=lab_result&data.test_name__gte=A',
+            'record_type=lab_result&data.result_value__gte=high',
+            'record_type=lab_result&data.result_value__in=1',
+            'record_type=x-ray',
+            'created_after=yesterday',
+        ]:
+            with self.subTest(query=query):
+                response = self.client.get(
+                    f'/api/records/?{query}',
+                    HTTP_X_CLIENT_ID='modern_clinic_1'
+                )
+                self.assertEqual(
+                    response.status_code,
+                    status.HTTP_400_BAD_REQUEST
+                )
+
+    def test_filters_only_apply_to_the_list(self):
+        for query in ['record_type=zzz', 'record_type=prescription']:
+            with self.subTest(query=query):
+                response = self.client.get(
+                    f'/api/records/{self.hba1c.id}/?{query}',
+                    HTTP_X_CLIENT_ID='modern_clinic_1'
+                )
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(response.data['id'], self.hba1c.id)
+
+
+@skipUnless(
+    connection.vendor in ('sqlite', 'postgresql'),
+    'Expression index plans are checked on SQLite and PostgreSQL'
+)
+class RecordFilterIndexTests(TestCase):
+    def explain(self, query):
+        queryset = filter_records(
+            MedicalRecord.objects.order_by('-created_at', '-id'),
+            QueryDict(query)
+        )
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.explain()
+
+    def test_text_key_uses_expression_index(self):
+        plan = self.explain(
+            'record_type=lab_result&data.test_name=HbA1c'
+            '&created_after=2024-01-01'
+        )
+        self.assertIn('rec_test_name_idx', plan)
+
+    def test_numeric_range_uses_expression_index(self):
+        plan = self.explain(
+            'record_type=lab_result&data.result_value__gte=6'
+            '&data.result_value__lte=7'
+        )
+        self.assertIn('rec_result_value_idx', plan)
+
+    def test_index_is_scoped_to_its_record_type(self):
+        plan = self.explain(
+            'record_type=prescription&data.medication=Aspirin'
+        )
+        self.assertIn('rec_medication_idx', plan)
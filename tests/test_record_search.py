@@ -0,0 +1,147 @@
+from unittest import skipUnless
+from django.db import connection
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework import status
+from apps.patients.models import Patient
+from apps.records.checks import check_search_schema
+from apps.records.models import MedicalRecord
+from apps.records.search import (
+    INDEX_TEARDOWN,
+    parse_terms,
+    search_records,
+)
+
+
+@skipUnless(
+    connection.vendor in ('sqlite', 'postgresql'),
+    'Record search needs FTS5 or tsvector support'
+)
+class RecordSearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.patient = Patient.objects.create(email='search@clinic.com')
+        self.other = Patient.objects.create(email='other@clinic.com')
+        self.diabetes = self.create(
+            self.patient,
+            diagnosis='Type 2 diabetes',
+            treatment='Metformin'
+        )
+        self.risk = self.create(
+            self.patient,
+            diagnosis='Hypertension',
+            notes='Elevated diabetes risk'
+        )
+        self.flu = self.create(self.patient, diagnosis='Influenza')
+        self.other_diabetes = self.create(
+            self.other,
+            diagnosis='Diabetic neuropathy'
+        )
+
+    def create(self, patient, **fields):
+        return MedicalRecord.objects.create(patient=patient, **fields)
+
+    def search(self, query, client_id='modern_clinic_1'):
+        response = self.client.get(
+            f'/api/records/search/?{query}',
+            HTTP_X_CLIENT_ID=client_id
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def ids(self, data):
+        return [record['id'] for record in data['results']]
+
+    def test_ranks_diagnosis_matches_above_notes(self):
+        data = self.search(f'q=diabetes&patient_id={self.patient.id}')
+
+        self.assertEqual(self.ids(data), [self.diabetes.id, self.risk.id])
+        self.assertEqual(data['results'][0]['diagnosis'], 'Type 2 diabetes')
+
+    def test_prefix_query(self):
+        self.assertEqual(
+            set(self.ids(self.search('q=diabet*'))),
+            {self.diabetes.id, self.risk.id, self.other_diabetes.id}
+        )
+        self.assertEqual(self.ids(self.search('q=influ*')), [self.flu.id])
+
+    def test_terms_are_stemmed(self):
+        self.assertEqual(
+            self.ids(self.search('q=diabetic&record_type=general')),
+            self.ids(self.search('q=diabetes&record_type=general'))
+        )
+
+    def test_all_terms_must_match(self):
+        self.assertEqual(
+            self.ids(self.search('q=diabetes metformin')),
+            [self.diabetes.id]
+        )
+
+    def test_patient_scope(self):
+        data = self.search(f'q=diabet*&patient_id={self.other.id}')
+
+        self.assertEqual(self.ids(data), [self.other_diabetes.id])
+
+    def test_cursor_pagination_walks_every_match_once(self):
+        seen = []
+        data = self.search('q=diabet*&page_size=1', 'mobile_app_1')
+        while True:
+            seen.extend(self.ids(data))
+            if not data['next']:
+                break
+            response = self.client.get(
+                data['next'],
+                HTTP_X_CLIENT_ID='mobile_app_1'
+            )
+            data = response.data
+
+        expected = [pk for pk, _ in search_records(parse_terms('diabet*'), 10)]
+        self.assertEqual(seen, expected)
+        self.assertEqual(len(seen), 3)
+
+    def test_index_follows_updates_and_deletes(self):
+        self.flu.diagnosis = 'Seasonal allergies'
+        self.flu.save()
+        self.risk.delete()
+
+        self.assertEqual(self.ids(self.search('q=influenza')), [])
+        self.assertEqual(self.ids(self.search('q=allergies')), [self.flu.id])
+        self.assertEqual(
+            self.ids(self.search(f'q=diabetes&patient_id={self.patient.id}')),
+            [self.diabetes.id]
+        )
+
+    def test_query_syntax_is_not_interpreted(self):
+        data = self.search('q=diabetes" OR "flu NEAR(')
+
+        self.assertEqual(data['results'], [])
+
+    def test_rejects_invalid_parameters(self):
+        for query in ['q=', 'q=***', 'q=flu&patient_id=abc',
+                      'q=flu&record_type=x-ray']:
+            with self.subTest(query=query):
+                response = self.client.get(
+                    f'/api/records/search/?{query}',
+                    HTTP_X_CLIENT_ID='modern_clinic_1'
+                )
+                self.assertEqual(
+                    response.status_code,
+                    status.HTTP_400_BAD_REQUEST
+                )
+
+        response = self.client.get(
+            '/api/records/search/?q=flu&cursor=garbage',
+            HTTP_X_CLIENT_ID='modern_clinic_1'
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_check_reports_missing_search_objects(self):
+        self.assertEqual(check_search_schema(databases=['default']), [])
+
+        with connection.cursor() as cursor:
+            for sql in INDEX_TEARDOWN[connection.vendor]:
+                cursor.execute(sql)
+        errors = check_search_schema(databases=['default'])
+
+        self.assertEqual([error.id for error in errors], ['records.E001'])
+        self.assertIn('0005_record_search', errors[0].hint)
@@ -1,9 +1,22 @@
+from unittest import mock
 from django.test import TestCase
 from django.contrib.auth.models import User
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APIClient
 from rest_framework import status
+from apps.core.benchmarks import make_api_request
 from apps.patients.models import Patient
+from apps.records.formats import (
+    FLEXIBLE_COLUMNS,
+    LEGACY_COLUMNS,
+    flexible_format_rows,
+    legacy_format_rows,
+)
 from apps.records.models import MedicalRecord
+from apps.records.serializers import (
+    MedicalRecordFlexibleSerializer,
+    MedicalRecordLegacySerializer,
+)
 
 
 class LegacyHospitalRecordTests(TestCase):
@@ -188,4 +201,88 @@ class RecordBackwardCompatibilityTests(TestCase):
             f'/api/records/{record.id}/',
             HTTP_X_CLIENT_ID='modern_clinic_1'
         )
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class RecordFastFormatTests(TestCase):
+    def setUp(self):
+        patient = Patient.objects.create(email='fast@clinic.com')
+        self.records = [
+            MedicalRecord.objects.create(
+                patient=patient,
+                diagnosis='Flu',
+                treatment='Rest',
+                notes='Follow up',
+                flexible_data={'severity': 'mild'}
+            ),
+            MedicalRecord.objects.create(
+                patient=patient,
+                record_type='lab_result',
+                diagnosis='Ignored for flexible output',
+                flexible_data={
+                    'test_name': 'HbA1c',
+                    'results': {'value': 6.1, 'unit': '%'},
+                }
+            ),
+            MedicalRecord.objects.create(
+                patient=patient,
+                record_type='prescription',
+                flexible_data={'medication': 'Metformin', 'dosage': '500mg'}
+            ),
+            MedicalRecord.objects.create(
+                patient=patient,
+                record_type='note',
+                notes='Plain note'
+            ),
+        ]
+        self.queryset = MedicalRecord.objects.order_by('id')
+
+    def render_serializer(self, serializer_class, client_type):
+        request = make_api_request('/api/records/', client_type=client_type)
+        return JSONRenderer().render(
+            serializer_class(
+                self.queryset,
+                many=True,
+                context={'request': request}
+            ).data
+        )
+
+    def test_flexible_rows_match_flexible_serializer(self):
+        rows = self.queryset.values_list(*FLEXIBLE_COLUMNS)
+
+        self.assertEqual(
+            JSONRenderer().render(flexible_format_rows(rows)),
+            self.render_serializer(
+                MedicalRecordFlexibleSerializer,
+                'modern_clinic'
+            )
+        )
+
+    def test_legacy_rows_match_legacy_serializer(self):
+        rows = self.queryset.values_list(*LEGACY_COLUMNS)
+
+        self.assertEqual(
+            JSONRenderer().render(legacy_format_rows(rows)),
+            self.render_serializer(
+                MedicalRecordLegacySerializer,
+                'legacy_hospital'
+            )
+        )
+
+    def test_modern_list_is_served_without_model_instances(self):
+        client = APIClient()
+        with mock.patch.object(
+            MedicalRecord,
+            'get_flexible_format',
+            side_effect=AssertionError('model instance built')
+        ):
+            response = client.get(
+                '/api/records/',
+                HTTP_X_CLIENT_ID='modern_clinic_1'
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['results']
+        self.assertEqual(results[0]['record_type'], 'note')
+        self.assertEqual(results[2]['test_name'], 'HbA1c')
+        self.assertNotIn('diagnosis', results[2])
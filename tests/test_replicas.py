@@ -0,0 +1,176 @@
+from unittest import mock, skipUnless
+from django.conf import settings
+from django.core.cache import caches
+from django.db import OperationalError, connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+from apps.core.replicas import (
+    ReplicaRouter,
+    ReplicaRoutingMiddleware,
+    _read_alias,
+    is_sticky,
+    replica_pool,
+    replicate_sqlite,
+)
+from apps.patients.models import Patient
+
+REPLICAS = ['replica1', 'replica2']
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Replicas are copied SQLite files')
+@override_settings(
+    DATABASE_REPLICAS=REPLICAS,
+    REPLICA_STICKY_SECONDS=60,
+    REPLICA_HEALTH_CHECK_INTERVAL=60,
+    SYNC_SETTLE_SECONDS=0
+)
+class ReplicaRoutingTests(TransactionTestCase):
+    """Two SQLite replicas that only change when ``replicate_sqlite`` runs,
+    so anything written since the last copy is lagging."""
+
+    databases = {'default', *REPLICAS}
+
+    def setUp(self):
+        self.client = APIClient()
+        caches[settings.REPLICA_STICKY_CACHE_ALIAS].clear()
+        Patient.objects.create(email='replicated@clinic.com')
+        replicate_sqlite()
+        replica_pool.reset()
+        for alias in REPLICAS:
+            replica_pool.is_healthy(alias)
+
+    def get(self, url, client_id='modern_clinic_1'):
+        return self.client.get(url, HTTP_X_CLIENT_ID=client_id)
+
+    def test_reads_lag_until_replicated(self):
+        patient = Patient.objects.create(email='new@clinic.com')
+        url = f'/api/patients/{patient.id}/'
+
+        self.assertEqual(self.get(url).status_code, 404)
+        replicate_sqlite()
+        self.assertEqual(self.get(url).status_code, 200)
+
+    def test_reads_are_balanced_across_replicas(self):
+        Patient.objects.create(email='only-in-replica1@clinic.com')
+        replicate_sqlite(targets=['replica1'])
+
+        counts = {
+            len(self.get('/api/patients/').data['results'])
+            for _ in range(2)
+        }
+        self.assertEqual(counts, {1, 2})
+
+    def test_client_reads_its_own_writes(self):
+        response = self.client.post(
+            '/api/patients/',
+            {'email': 'mine@clinic.com'},
+            format='json',
+            HTTP_X_CLIENT_ID='modern_clinic_1'
+        )
+        self.assertEqual(response.status_code, 201)
+        url = f'/api/patients/{response.data["id"]}/'
+
+        self.assertEqual(self.get(url).status_code, 200)
+        self.assertEqual(self.get(url, 'modern_clinic_2').status_code, 404)
+
+    def test_ssn_lookup_does_not_make_the_client_sticky(self):
+        patient = Patient.objects.create(email='new@clinic.com')
+        response = self.client.post(
+            '/api/patients/ssn-lookup/',
+            {'ssn': '123-45-6789'},
+            format='json',
+            HTTP_X_CLIENT_ID='modern_clinic_1'
+        )
+        self.assertEqual(response.status_code, 200)
+
+        url = f'/api/patients/{patient.id}/'
+        self.assertEqual(self.get(url).status_code, 404)
+
+    def test_failed_write_does_not_make_the_client_sticky(self):
+        patient = Patient.objects.create(email='new@clinic.com')
+        response = self.client.post(
+            '/api/patients/',
+            {'first_name': 'No email'},
+            format='json',
+            HTTP_X_CLIENT_ID='modern_clinic_1'
+        )
+        self.assertEqual(response.status_code, 400)
+
+        url = f'/api/patients/{patient.id}/'
+        self.assertEqual(self.get(url).status_code, 404)
+
+    def test_write_without_client_id_makes_no_one_sticky(self):
+        request = RequestFactory().post('/api/patients/')
+        request.client_id = ''
+
+        ReplicaRoutingMiddleware(lambda r: HttpResponse(status=201))(request)
+
+        self.assertFalse(is_sticky(''))
+
+    def test_stickiness_expires(self):
+        with self.settings(REPLICA_STICKY_SECONDS=0):
+            response = self.client.post(
+                '/api/patients/',
+                {'email': 'mine@clinic.com'},
+                format='json',
+                HTTP_X_CLIENT_ID='modern_clinic_1'
+            )
+        url = f'/api/patients/{response.data["id"]}/'
+
+        self.assertEqual(self.get(url).status_code, 404)
+
+    def test_failed_replica_is_dropped_until_healthy(self):
+        patient = Patient.objects.create(email='new@clinic.com')
+        replicate_sqlite(targets=['replica2'])
+        url = f'/api/patients/{patient.id}/'
+        replica_pool.reset()
+
+        with mock.patch.object(
+            replica_pool, 'check', lambda alias: alias != 'replica1'
+        ), self.assertLogs('apps.core.replicas', 'WARNING') as logs:
+            statuses = [self.get(url).status_code for _ in range(2)]
+        self.assertIn('Replica replica1 is down', logs.output[0])
+        self.assertEqual(statuses, [200, 200])
+        self.assertEqual(
+            replica_pool.stats(),
+            {'replica1': False, 'replica2': True}
+        )
+
+        with self.settings(REPLICA_HEALTH_CHECK_INTERVAL=0), \
+                self.assertLogs('apps.core.replicas', 'WARNING'):
+            statuses = {self.get(url).status_code for _ in range(2)}
+        self.assertEqual(statuses, {200, 404})
+
+    def test_connection_errors_mark_the_replica_down(self):
+        request = RequestFactory().get('/api/patients/')
+        request.read_alias = 'replica1'
+
+        with self.assertLogs('apps.core.replicas', 'WARNING'):
+            ReplicaRoutingMiddleware(lambda r: None).process_exception(
+                request,
+                OperationalError('server closed the connection')
+            )
+
+        self.assertFalse(replica_pool.stats()['replica1'])
+        self.assertEqual(replica_pool.choose(), 'replica2')
+
+    def test_writes_go_to_the_primary_and_pin_the_request(self):
+        router = ReplicaRouter()
+        token = _read_alias.set('replica1')
+        try:
+            self.assertEqual(router.db_for_read(Patient), 'replica1')
+            self.assertEqual(router.db_for_write(Patient), 'default')
+            self.assertIsNone(router.db_for_read(Patient))
+        finally:
+            _read_alias.reset(token)
+
+    def test_views_without_opt_in_read_the_primary(self):
+        patient = Patient.objects.create(email='new@clinic.com')
+
+        response = self.get('/api/sync/', 'mobile_app_1')
+
+        self.assertIn(
+            patient.id,
+            [p['id'] for p in response.data['patients']]
+        )
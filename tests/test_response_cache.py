@@ -0,0 +1,176 @@
+from unittest import mock
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from apps.core.response_cache import ResponseCache, response_cache
+from apps.patients.models import Patient
+from apps.patients.serializers import PatientSerializerV1
+from apps.records.models import MedicalRecord
+from apps.records.serializers import MedicalRecordFlexibleSerializer
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        self.cache = ResponseCache(max_size=2, timeout=60, max_variants=2)
+        self.patients = [
+            Patient.objects.create(email=f'lru{i}@clinic.com')
+            for i in range(3)
+        ]
+
+    def test_evicts_least_recently_used_objects(self):
+        first, second, third = self.patients
+        self.cache.get_or_serialize(first, '"a"', lambda: {'id': 1})
+        self.cache.get_or_serialize(second, '"a"', lambda: {'id': 2})
+        self.cache.get_or_serialize(first, '"a"', lambda: {'id': 0})
+        self.cache.get_or_serialize(third, '"a"', lambda: {'id': 3})
+
+        self.assertEqual(
+            self.cache.get_or_serialize(first, '"a"', dict),
+            {'id': 1}
+        )
+        self.assertEqual(self.cache.get_or_serialize(second, '"a"', dict), {})
+        self.assertEqual(
+            self.cache.stats(),
+            {'hits': 2, 'misses': 4, 'invalidations': 0, 'size': 2}
+        )
+
+    def test_caps_variants_per_object(self):
+        patient = self.patients[0]
+        for etag in ('"a"', '"b"', '"c"'):
+            self.cache.get_or_serialize(patient, etag, lambda: {'v': etag})
+
+        self.assertEqual(self.cache.get_or_serialize(patient, '"a"', dict), {})
+        self.assertEqual(
+            self.cache.get_or_serialize(patient, '"c"', dict),
+            {'v': '"c"'}
+        )
+
+    def test_invalidate_drops_every_variant(self):
+        patient = self.patients[0]
+        self.cache.get_or_serialize(patient, '"a"', lambda: {'v': 1})
+        self.cache.get_or_serialize(patient, '"b"', lambda: {'v': 2})
+        self.cache.invalidate(Patient, patient.pk)
+
+        self.assertEqual(self.cache.get_or_serialize(patient, '"a"', dict), {})
+        self.assertEqual(self.cache.get_or_serialize(patient, '"b"', dict), {})
+
+
+class CachedRetrieveTests(TestCase):
+    def setUp(self):
+        response_cache.clear()
+        self.client = APIClient()
+        self.patient = Patient.objects.create(
+            email='cached@clinic.com',
+            first_name='Cached',
+            ssn_legacy='123-45-6789'
+        )
+        self.record = MedicalRecord.objects.create(
+            patient=self.patient,
+            record_type='lab_result',
+            diagnosis='Routine panel',
+            flexible_data={'test_name': 'HbA1c'}
+        )
+        self.url = f'/api/patients/{self.patient.id}/'
+
+    def get(self, url, client_id='modern_clinic_1', version='v1', **headers):
+        return self.client.get(
+            url,
+            HTTP_X_CLIENT_ID=client_id,
+            HTTP_ACCEPT=f'application/json; version={version}',
+            **headers
+        )
+
+    def count_serializations(self, serializer_class, url, times=3, **kwargs):
+        original = serializer_class.to_representation
+        with mock.patch.object(
+            serializer_class,
+            'to_representation',
+            autospec=True,
+            side_effect=original
+        ) as to_representation:
+            responses = [self.get(url, **kwargs) for _ in range(times)]
+        return to_representation.call_count, responses
+
+    def test_repeated_retrieves_serialize_once(self):
+        before = response_cache.stats()
+        calls, responses = self.count_serializations(
+            PatientSerializerV1,
+            self.url
+        )
+
+        self.assertEqual(calls, 1)
+        self.assertEqual(responses[0].data, responses[2].data)
+        self.assertEqual(responses[2].data['first_name'], 'Cached')
+        stats = response_cache.stats()
+        self.assertEqual(stats['hits'] - before['hits'], 2)
+        self.assertEqual(stats['misses'] - before['misses'], 1)
+
+    def test_variants_are_cached_separately(self):
+        v1 = self.get(self.url).data
+        v2 = self.get(self.url, version='v2').data
+        mobile = self.get(f'{self.url}?fields=id', client_id='mobile_app_1')
+
+        self.assertEqual(v1['ssn'], '123-45-6789')
+        self.assertEqual(v2['ssn']['number'], '123-45-6789')
+        self.assertEqual(mobile.data, {'id': self.patient.id})
+        self.assertEqual(self.get(self.url).data, v1)
+
+    def test_save_invalidates_cached_variants(self):
+        self.get(self.url)
+        self.patient.first_name = 'Renamed'
+        self.patient.save()
+
+        self.assertEqual(self.get(self.url).data['first_name'], 'Renamed')
+
+    def test_record_changes_invalidate_patient(self):
+        self.get(self.url)
+        before = response_cache.stats()['invalidations']
+        self.record.diagnosis = 'Follow-up'
+        self.record.save()
+
+        self.assertEqual(response_cache.stats()['invalidations'], before + 2)
+        calls, _ = self.count_serializations(PatientSerializerV1, self.url, 1)
+        self.assertEqual(calls, 1)
+
+    def test_record_retrieve_is_cached_and_invalidated(self):
+        url = f'/api/records/{self.record.id}/'
+        calls, _ = self.count_serializations(
+            MedicalRecordFlexibleSerializer,
+            url
+        )
+        self.assertEqual(calls, 1)
+
+        self.record.flexible_data = {'test_name': 'Lipids'}
+        self.record.save()
+        self.assertEqual(self.get(url).data['test_name'], 'Lipids')
+
+        self.record.delete()
+        self.assertEqual(
+            self.get(url).status_code,
+            status.HTTP_404_NOT_FOUND
+        )
+
+    def test_writes_without_signals_are_not_served_stale(self):
+        self.get(self.url)
+        Patient.objects.filter(pk=self.patient.pk).update(
+            first_name='Elsewhere',
+            updated_at=timezone.now()
+        )
+
+        self.assertEqual(self.get(self.url).data['first_name'], 'Elsewhere')
+
+    def test_object_permissions_run_on_cache_hits(self):
+        url = f'{self.url}?fields=id'
+        self.get(url, client_id='mobile_app_1')
+        response = self.get(
+            url,
+            client_id='mobile_app_1',
+            HTTP_X_PATIENT_CONSENT='false'
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(RESPONSE_CACHE_ENABLED=False)
+    def test_can_be_disabled(self):
+        calls, _ = self.count_serializations(PatientSerializerV1, self.url)
+        self.assertEqual(calls, 3)
@@ -0,0 +1,84 @@
+import json
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from apps.core.timing import NULL_PHASE, phase
+from apps.patients.models import Patient
+
+
+def parse_server_timing(header):
+    metrics = {}
+    for metric in header.split(', '):
+        name, *params = metric.split(';')
+        metrics[name] = dict(param.split('=', 1) for param in params)
+    return metrics
+
+
+@override_settings(SERVER_TIMING_ENABLED=True, SERVER_TIMING_SAMPLE_RATE=1.0)
+class ServerTimingTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.patient = Patient.objects.create(email='timing@clinic.com')
+
+    def get(self, url):
+        return self.client.get(url, HTTP_X_CLIENT_ID='modern_clinic_1')
+
+    def test_header_reports_each_phase(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.get(f'/api/patients/{self.patient.id}/')
+
+        metrics = parse_server_timing(response['Server-Timing'])
+        for name in ('total', 'db', 'client_type', 'client_config', 'view',
+                     'serialize', 'audit'):
+            self.assertIn(name, metrics)
+            self.assertGreaterEqual(float(metrics[name]['dur']), 0)
+        self.assertEqual(
+            metrics['db']['desc'],
+            f'"{len(ctx.captured_queries)} queries"'
+        )
+        self.assertEqual(metrics['view']['desc'], metrics['db']['desc'])
+
+    def test_logs_a_structured_line(self):
+        with self.assertLogs('apps.core.timing', 'INFO') as logs:
+            self.get('/api/patients/')
+
+        entry = json.loads(logs.records[0].getMessage())
+        self.assertEqual(entry['event'], 'request_timing')
+        self.assertEqual(entry['path'], '/api/patients/')
+        self.assertEqual(entry['status'], 200)
+        self.assertEqual(entry['client_id'], 'modern_clinic_1')
+        self.assertEqual(
+            entry['queries'],
+            entry['phases']['view']['queries']
+        )
+        self.assertGreaterEqual(
+            entry['total_ms'],
+            entry['phases']['view']['ms']
+        )
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=0.0)
+    def test_unsampled_requests_are_untouched(self):
+        with self.assertNoLogs('apps.core.timing'):
+            response = self.get('/api/patients/')
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(SERVER_TIMING_HEADER=False)
+    def test_header_can_be_kept_private(self):
+        with self.assertLogs('apps.core.timing', 'INFO'):
+            response = self.get('/api/patients/')
+        self.assertNotIn('Server-Timing', response)
+
+    def test_phase_is_a_no_op_outside_sampled_requests(self):
+        self.assertIs(phase('serialize'), NULL_PHASE)
+        with phase('serialize'):
+            pass
+
+
+class ServerTimingDisabledTests(TestCase):
+    def test_disabled_by_default(self):
+        response = APIClient().get(
+            '/api/patients/',
+            HTTP_X_CLIENT_ID='modern_clinic_1'
+        )
+        self.assertNotIn('Server-Timing', response)
@@ -0,0 +1,94 @@
+import json
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework import status
+from apps.patients.models import Patient
+from apps.records.models import MedicalRecord
+
+
+def read_stream(response):
+    return json.loads(b''.join(response.streaming_content))
+
+
+@override_settings(STREAMING_LIST_CHUNK_SIZE=2)
+class LegacyStreamingListTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='streamer',
+            password='test123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.patients = [
+            Patient.objects.create(
+                email=f'stream{i}@hospital.com',
+                ssn_legacy=f'000-00-000{i}'
+            )
+            for i in range(5)
+        ]
+
+    def test_legacy_patient_list_streams_full_array(self):
+        response = self.client.get(
+            '/api/patients/',
+            HTTP_X_CLIENT_ID='legacy_hospital_1',
+            HTTP_ACCEPT='application/json; version=v1'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+
+        data = read_stream(response)
+        self.assertEqual(
+            [item['id'] for item in data],
+            [p.id for p in reversed(self.patients)]
+        )
+        self.assertEqual(data[0]['ssn'], '000-00-0004')
+        self.assertNotIn('ssn_number', data[0])
+
+    def test_streamed_items_match_retrieve_representation(self):
+        patient = self.patients[0]
+        streamed = read_stream(self.client.get(
+            '/api/patients/',
+            HTTP_X_CLIENT_ID='legacy_hospital_1'
+        ))
+        retrieved = self.client.get(
+            f'/api/patients/{patient.id}/',
+            HTTP_X_CLIENT_ID='legacy_hospital_1'
+        )
+        self.assertEqual(streamed[-1], json.loads(retrieved.content))
+
+    def test_empty_table_streams_empty_array(self):
+        Patient.objects.all().delete()
+        response = self.client.get(
+            '/api/patients/',
+            HTTP_X_CLIENT_ID='legacy_hospital_1'
+        )
+        self.assertEqual(read_stream(response), [])
+
+    def test_legacy_record_list_uses_legacy_serializer(self):
+        MedicalRecord.objects.create(
+            patient=self.patients[0],
+            record_type='lab_result',
+            diagnosis='Anemia',
+            treatment='Iron',
+            flexible_data={'test_name': 'CBC'}
+        )
+        response = self.client.get(
+            '/api/records/',
+            HTTP_X_CLIENT_ID='legacy_hospital_1'
+        )
+        self.assertTrue(response.streaming)
+
+        data = read_stream(response)
+        self.assertEqual(len(data), 1)
+        self.assertEqual(data[0]['diagnosis'], 'Anemia')
+        self.assertNotIn('data', data[0])
+
+    def test_explicit_cursor_request_is_paginated(self):
+        response = self.client.get(
+            '/api/patients/?page_size=2',
+            HTTP_X_CLIENT_ID='legacy_hospital_1'
+        )
+        self.assertFalse(response.streaming)
+        self.assertEqual(len(response.data), 2)
+        self.assertIn('rel="next"', response['Link'])
@@ -0,0 +1,219 @@
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from apps.patients.models import Patient
+from apps.records.models import MedicalRecord
+from apps.sync.models import SyncLineage, Tombstone
+
+
+@override_settings(SYNC_SETTLE_SECONDS=0)
+class SyncTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.patients = [
+            Patient.objects.create(
+                email=f'sync{index}@clinic.com',
+                first_name='Sync',
+                ssn_legacy='123-45-6789'
+            )
+            for index in range(3)
+        ]
+        self.record = MedicalRecord.objects.create(
+            patient=self.patients[0],
+            record_type='lab_result',
+            diagnosis='Baseline'
+        )
+
+    def sync(self, token=None, client_id='mobile_app_1', **params):
+        if token:
+            params['token'] = token
+        return self.client.get(
+            '/api/sync/',
+            params,
+            HTTP_X_CLIENT_ID=client_id
+        )
+
+    def sync_all(self, token=None, **params):
+        pages = []
+        while True:
+            response = self.sync(token, **params)
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.data)
+            token = response.data['next_token']
+            if not response.data['has_more']:
+                return pages, token
+
+    def test_first_sync_returns_everything(self):
+        response = self.sync()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [patient['id'] for patient in response.data['patients']],
+            [patient.id for patient in self.patients]
+        )
+        self.assertEqual(
+            [record['id'] for record in response.data['records']],
+            [self.record.id]
+        )
+        self.assertEqual(
+            response.data['deleted'],
+            {'patients': [], 'records': []}
+        )
+        self.assertFalse(response.data['has_more'])
+
+    def test_token_returns_only_changes(self):
+        token = self.sync().data['next_token']
+
+        patient = self.patients[1]
+        patient.first_name = 'Changed'
+        patient.save()
+        record = MedicalRecord.objects.create(
+            patient=patient,
+            diagnosis='New'
+        )
+        response = self.sync(token)
+
+        self.assertEqual(
+            [(p['id'], p['first_name']) for p in response.data['patients']],
+            [(patient.id, 'Changed')]
+        )
+        self.assertEqual(
+            [r['id'] for r in response.data['records']],
+            [record.id]
+        )
+
+        response = self.sync(response.data['next_token'])
+        self.assertEqual(response.data['patients'], [])
+        self.assertEqual(response.data['records'], [])
+
+    def test_cascading_deletes_leave_tombstones(self):
+        token = self.sync().data['next_token']
+        patient_id = self.patients[0].id
+
+        self.patients[0].delete()
+        response = self.sync(token)
+
+        self.assertEqual(
+            response.data['deleted'],
+            {'patients': [patient_id], 'records': [self.record.id]}
+        )
+        response = self.sync(response.data['next_token'])
+        self.assertEqual(
+            response.data['deleted'],
+            {'patients': [], 'records': []}
+        )
+
+    def test_large_deltas_are_paged_without_gaps(self):
+        for index in range(4):
+            MedicalRecord.objects.create(
+                patient=self.patients[index % 3],
+                diagnosis=f'Paged {index}'
+            )
+
+        pages, _ = self.sync_all(page_size=2)
+
+        self.assertEqual(len(pages), 3)
+        self.assertTrue(all(len(page['patients']) <= 2 for page in pages))
+        self.assertEqual(
+            sorted(p['id'] for page in pages for p in page['patients']),
+            sorted(patient.id for patient in self.patients)
+        )
+        record_ids = [r['id'] for page in pages for r in page['records']]
+        self.assertEqual(len(record_ids), 5)
+        self.assertEqual(
+            set(record_ids),
+            set(MedicalRecord.objects.values_list('id', flat=True))
+        )
+
+    def test_every_client_type_can_sync(self):
+        for client_id in ('legacy_hospital_1', 'modern_clinic_1'):
+            response = self.sync(client_id=client_id)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data['patients']), 3)
+            self.assertEqual(len(response.data['records']), 1)
+
+    def test_mobile_field_selection_is_honored(self):
+        response = self.sync(fields='id,email')
+
+        self.assertEqual(
+            set(response.data['patients'][0]),
+            {'id', 'email'}
+        )
+        self.assertEqual(set(response.data['records'][0]), {'id'})
+
+    def test_writes_inside_the_settle_window_are_deferred(self):
+        token = self.sync().data['next_token']
+
+        patient = Patient.objects.create(email='late@clinic.com')
+        with self.settings(SYNC_SETTLE_SECONDS=60):
+            response = self.sync(token)
+        self.assertEqual(response.data['patients'], [])
+
+        response = self.sync(response.data['next_token'])
+        self.assertEqual(
+            [p['id'] for p in response.data['patients']],
+            [patient.id]
+        )
+
+    def test_invalid_token_is_rejected(self):
+        response = self.sync('not-a-token')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('token', response.data)
+
+    def test_superseded_token_is_gone(self):
+        first = self.sync().data['next_token']
+        Patient.objects.create(email='later@clinic.com')
+        second = self.sync(first).data['next_token']
+        self.assertEqual(self.sync(second).status_code, 200)
+
+        self.assertEqual(self.sync(first).status_code, 410)
+
+    def test_compaction_keeps_tombstones_a_token_has_not_passed(self):
+        token = self.sync().data['next_token']
+        lineage = SyncLineage.objects.get()
+        old = Tombstone.objects.create(
+            resource_type='patients',
+            object_id=999,
+            deleted_at=lineage.position_at - timedelta(seconds=1)
+        )
+        patient_id = self.patients[2].id
+        self.patients[2].delete()
+
+        call_command('compact_tombstones', stdout=StringIO())
+
+        self.assertFalse(Tombstone.objects.filter(pk=old.pk).exists())
+        response = self.sync(token)
+        self.assertEqual(response.data['deleted']['patients'], [patient_id])
+
+    def test_compaction_expires_abandoned_lineages(self):
+        token = self.sync().data['next_token']
+        self.patients[2].delete()
+        SyncLineage.objects.update(
+            last_seen=timezone.now() - timedelta(days=31)
+        )
+
+        out = StringIO()
+        call_command('compact_tombstones', stdout=out)
+
+        self.assertIn('expired 1 sync lineages', out.getvalue())
+        self.assertFalse(Tombstone.objects.exists())
+        self.assertEqual(self.sync(token).status_code, 410)
+
+    def test_compaction_expires_unresumed_lineages_sooner(self):
+        abandoned = self.sync().data['next_token']
+        resumed = self.sync().data['next_token']
+        resumed = self.sync(resumed).data['next_token']
+        SyncLineage.objects.update(
+            created_at=timezone.now() - timedelta(hours=25)
+        )
+
+        out = StringIO()
+        call_command('compact_tombstones', stdout=out)
+
+        self.assertIn('expired 1 sync lineages', out.getvalue())
+        self.assertEqual(self.sync(abandoned).status_code, 410)
+        self.assertEqual(self.sync(resumed).status_code, 200)
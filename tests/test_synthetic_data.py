@@ -0,0 +1,93 @@
+import json
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from apps.audit.models import AuditLog
+from apps.core.synthetic import SyntheticDataGenerator
+from apps.patients.models import Patient
+from apps.records.models import MedicalRecord
+from apps.records.serializers import validate_record_data
+
+
+def snapshot():
+    return (
+        list(Patient.objects.order_by('id').values_list(
+            'email', 'first_name', 'date_of_birth', 'ssn_legacy',
+            'ssn_number', 'ssn_hash', 'email_key'
+        )),
+        list(MedicalRecord.objects.order_by('id').values_list(
+            'record_type', 'diagnosis', 'flexible_data', 'created_by'
+        )),
+        list(AuditLog.objects.order_by('id').values_list(
+            'action', 'resource_type', 'client_id', 'ip_address'
+        )),
+    )
+
+
+class SyntheticDataGeneratorTests(TestCase):
+    def generate(self, seed=7, batch_size=40):
+        return SyntheticDataGenerator(seed, batch_size).generate(
+            patients=50,
+            records=200,
+            audit_logs=100
+        )
+
+    def test_same_seed_produces_the_same_rows(self):
+        self.assertEqual(
+            self.generate(),
+            {'patients': 50, 'records': 200, 'audit_logs': 100}
+        )
+        first = snapshot()
+        for model in (AuditLog, MedicalRecord, Patient):
+            model.objects.all().delete()
+
+        self.generate(batch_size=17)
+        self.assertEqual(snapshot(), first)
+
+    def test_records_are_valid_for_every_record_type(self):
+        self.generate()
+
+        self.assertEqual(
+            set(MedicalRecord.objects.values_list('record_type', flat=True)),
+            {'general', 'lab_result', 'prescription', 'note'}
+        )
+        for record in MedicalRecord.objects.all():
+            validate_record_data(record.record_type, record.flexible_data)
+        lab = MedicalRecord.objects.filter(record_type='lab_result').first()
+        self.assertIsInstance(lab.flexible_data['results']['value'], float)
+
+    def test_patients_are_searchable(self):
+        self.generate()
+        patient = Patient.objects.first()
+
+        self.assertTrue(patient.email_key)
+        ssn = patient.ssn_legacy or patient.ssn_number
+        self.assertIn(patient, Patient.objects.by_ssn(ssn))
+
+
+class GenerateSyntheticDataCommandTests(TestCase):
+    def run_command(self, **options):
+        out = StringIO()
+        call_command(
+            'generate_synthetic_data',
+            stdout=out,
+            stderr=StringIO(),
+            **options
+        )
+        return json.loads(out.getvalue())
+
+    def test_defaults_scale_with_patients(self):
+        report = self.run_command(patients=10, seed=3)
+
+        self.assertEqual(report['patients'], 10)
+        self.assertEqual(report['records'], 30)
+        self.assertEqual(report['audit_logs'], 50)
+        self.assertEqual(MedicalRecord.objects.count(), 30)
+
+    def test_refuses_to_generate_a_seed_twice(self):
+        self.run_command(patients=1, records=0, audit_logs=0, seed=3)
+        with self.assertRaisesRegex(CommandError, 'another --seed'):
+            self.run_command(patients=1, seed=3)
+        self.run_command(patients=1, records=0, audit_logs=0, seed=4)
+        self.assertEqual(Patient.objects.count(), 2)